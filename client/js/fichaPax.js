@@ -12,6 +12,10 @@
   let parsedRows = [];
   let grouped = []; // groups by voucher (computed after parsing)
 
+  // Servicio local de render (python/render_server.py, iniciado por launcher.sh).
+  // Si no responde, la ficha se genera en el navegador con pdf-lib.
+  const RENDER_SERVICE_URL = `http://${window.location.hostname || 'localhost'}:8001`;
+
   function preventDefaults(e){e.preventDefault();e.stopPropagation();}
   ['dragenter','dragover','dragleave','drop'].forEach(evt => dropArea.addEventListener(evt, preventDefaults));
 
@@ -156,10 +160,12 @@
     try {
       // Generar ficha de pasajero
       status.textContent = '⏳ Generando ficha de pasajero...';
-      const templateUrl = '/python/fichaPax/fichaPax.pdf';
-      const templateBytes = await fetch(templateUrl).then(r=>r.arrayBuffer());
-      
-      const fichaPdfBytes = await fillTemplate(templateBytes, group, 0);
+      let fichaPdfBytes = await renderWithService(group);
+      if(!fichaPdfBytes){
+        const templateUrl = '/python/fichaPax/fichaPax.pdf';
+        const templateBytes = await fetch(templateUrl).then(r=>r.arrayBuffer());
+        fichaPdfBytes = await fillTemplate(templateBytes, group, 0);
+      }
       
       // Descargar ficha
       const nameBase = sanitizeFilename((group.voucher || group.titular['Apellido y nombre'] || group.titular['Nombre'] || 'ficha').toString());
@@ -186,6 +192,26 @@
     }
   }
 
+  // Pide la ficha al servicio de render; devuelve null si no está disponible
+  async function renderWithService(group){
+    try{
+      const response = await fetch(`${RENDER_SERVICE_URL}/ficha`, {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({
+          titular: group.titular,
+          acompanantes: group.acompanantes,
+          habitaciones: group.todas_habitaciones,
+          num_pasajeros: group.num_pasajeros
+        })
+      });
+      if(!response.ok) return null;
+      return await response.arrayBuffer();
+    }catch(e){
+      return null;
+    }
+  }
+
   async function fillTemplate(templateBytes, group, idx){
     // Use the positions map extracted from generar_con_overlay.py (python/fichaPax/positions.json)
     const pdfDoc = await PDFLib.PDFDocument.load(templateBytes);
@@ -84,8 +84,16 @@ function processFile(file) {
   reader.onload = () => {
     const fileContents = reader.result;
 
+    // JSON de python/comidas/reporte_comidas.py: las filas ya vienen procesadas
+    const report = file.name.toLowerCase().endsWith('.json') ? JSON.parse(fileContents) : null;
+    const reportModeMismatch = report !== null && report.mode !== APP_CONFIG.mode;
+
     // Procesar y obtener filas relevantes
-    relevantData = processData(fileContents, APP_CONFIG.mode);
+    if (report) {
+      relevantData = reportModeMismatch ? [] : report.rows;
+    } else {
+      relevantData = processData(fileContents, APP_CONFIG.mode);
+    }
 
     const resultOutput = document.getElementById('resultOutput');
     const noDataMessage = document.getElementById('noDataMessage');
@@ -100,24 +108,31 @@ function processFile(file) {
       noDataMessage.style.display = 'none';
     }
 
-    // Extraer todos los registros parseados para validaciones adicionales
-    const allParsed = parseCSV(fileContents);
+    // Extraer todos los registros parseados para validaciones adicionales (el reporte ya trae los conteos)
+    const allParsed = report ? [] : parseCSV(fileContents);
 
     // Contar filas con Pensión Completa (PC)
     const normalize = (text) => (text || '').toUpperCase().normalize('NFD').replace(/[\u0300-\u036f]/g, '');
-    const pcCount = allParsed.reduce((acc, r) => acc + (normalize(r.servicios).includes('PENSION COMPLETA') ? 1 : 0), 0);
+    const pcCount = report
+      ? report.warnings.pension_completa_rows
+      : allParsed.reduce((acc, r) => acc + (normalize(r.servicios).includes('PENSION COMPLETA') ? 1 : 0), 0);
 
     // Contar filas con fechas inválidas / duración inválida en los datos relevantes
     const invalidDates = relevantData.reduce((acc, r) => acc + (isNaN(r.stayDuration) || r.stayDuration <= 0 ? 1 : 0), 0);
 
     // Construir mensajes de advertencia
     let warnings = [];
+    if (reportModeMismatch) {
+      warnings.push(`El reporte cargado es de modo ${report.mode}: generelo con reporte_comidas.py --mode ${APP_CONFIG.mode}.`);
+    }
     if (pcCount > 0 && APP_CONFIG.mode === 'MAP') {
       warnings.push(`${pcCount} fila(s) con Pensión Completa detectadas: se están ignorando en modo MAP.`);
       warnings.push('Para procesar PC use la página <a href="vouchers-pc.html" style="color:#856404;text-decoration:underline">Vouchers Pensión Completa</a>.');
     }
     
-    const mapCount = allParsed.reduce((acc, r) => acc + (normalize(r.servicios).includes('MEDIA PENSION') ? 1 : 0), 0);
+    const mapCount = report
+      ? report.warnings.media_pension_rows
+      : allParsed.reduce((acc, r) => acc + (normalize(r.servicios).includes('MEDIA PENSION') ? 1 : 0), 0);
     if (mapCount > 0 && APP_CONFIG.mode === 'PC') {
       warnings.push(`${mapCount} fila(s) con Media Pensión detectadas: se están ignorando en modo PC.`);
       warnings.push('Para procesar MAP use la página <a href="vouchers.html" style="color:#856404;text-decoration:underline">Vouchers Media Pensión</a>.');
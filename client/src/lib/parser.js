@@ -1,24 +1,81 @@
 // parser.js — Parsing y normalización de CSV compartido entre MAP y PC
 
+// Columnas del formato viejo (pruebas_ppj.csv), con nombre y apellido separados
+const LEGACY_FIELDS_COUNT = 19;
+const OBSERVATION_INDEX = 4;
+
 /**
- * Parsea el contenido CSV y normaliza los campos principales
+ * Separa una línea CSV; los campos entre comillas pueden contener el separador
+ * @param {string} line - Línea del CSV
+ * @param {string} delimiter - Separador de campos
+ * @returns {Array} Campos de la línea
+ */
+function splitCSVLine(line, delimiter = ',') {
+  if (!line.includes('"')) return line.split(delimiter);
+
+  const fields = [];
+  let field = '';
+  let insideQuotes = false;
+  for (let i = 0; i < line.length; i++) {
+    const char = line[i];
+    if (char === '"') {
+      if (insideQuotes && line[i + 1] === '"') {
+        field += '"';
+        i++;
+      } else {
+        insideQuotes = !insideQuotes;
+      }
+    } else if (char === delimiter && !insideQuotes) {
+      fields.push(field);
+      field = '';
+    } else {
+      field += char;
+    }
+  }
+  fields.push(field);
+  return fields;
+}
+
+/**
+ * Parsea el contenido CSV y normaliza los campos principales.
+ * El formato (export de regimen o formato viejo) y el separador se detectan una
+ * sola vez, por el encabezado; el CSV normalizado por python/normalizar_csv.py
+ * ya viene reparado y entra directo por el primer formato.
  * @param {string} fileContents - Contenido del archivo CSV
  * @returns {Array} Array de objetos con campos parseados y normalizados
  */
 function parseCSV(fileContents) {
   const lines = fileContents.split('\n');
+  const headerLine = (lines[0] || '').replace(/^\uFEFF/, '').trim();
+  const delimiter = [',', ';', '\t'].reduce((best, candidate) =>
+    headerLine.split(candidate).length > headerLine.split(best).length ? candidate : best
+  );
+  const header = splitCSVLine(headerLine, delimiter).map((name) => name.trim());
+  const expectedFields = header.length;
+  const legacyFormat = expectedFields === LEGACY_FIELDS_COUNT && !header.includes('Apellido y nombre');
   const parsedData = [];
 
   for (let i = 1; i < lines.length; i++) {
     const line = lines[i].trim();
     if (line === '') continue;
 
-    let fields = line.split(',');
+    let fields = splitCSVLine(line, delimiter);
+
+    // Corrección de CSV roto (campo Observación con comas extras), igual que common/regimen_csv.py
+    if (fields.length > expectedFields) {
+      const extraFields = fields.length - expectedFields;
+      const endObservationIndex = OBSERVATION_INDEX + extraFields;
+      const correctedObservation = fields.slice(OBSERVATION_INDEX, endObservationIndex + 1).join(';');
+      fields = [
+        ...fields.slice(0, OBSERVATION_INDEX),
+        correctedObservation,
+        ...fields.slice(endObservationIndex + 1)
+      ];
+    }
 
-    // Detectar formato del CSV según número de campos
     let parsed;
-    
-    if (fields.length >= 28) {
+
+    if (!legacyFormat) {
       // Formato CSV real (3feb.csv) - nombre completo junto en columna 13
       parsed = {
         id: fields[0],
@@ -47,20 +104,6 @@ function parseCSV(fileContents) {
       parsed.apellido = '';
     } else {
       // Formato CSV antiguo (pruebas_ppj.csv) - nombre y apellido separados
-      // Corrección de CSV roto (campo Observación con comas extras)
-      const EXPECTED_FIELDS_COUNT = 19;
-      if (fields.length > EXPECTED_FIELDS_COUNT) {
-        const extraFields = fields.length - EXPECTED_FIELDS_COUNT;
-        const endObservationIndex = 4 + extraFields;
-        const correctedObservation = fields.slice(4, endObservationIndex + 1).join(';');
-        const fixedFields = [
-          ...fields.slice(0, 4),
-          correctedObservation,
-          ...fields.slice(endObservationIndex + 1)
-        ];
-        fields = fixedFields;
-      }
-      
       parsed = {
         id: fields[0],
         hotel: fields[1],
@@ -134,6 +177,7 @@ function calculateStayDuration(dinRaw, doutRaw) {
 
 // Exportar funciones al scope global
 window.parseCSV = parseCSV;
+window.splitCSVLine = splitCSVLine;
 window.normalizePassengerName = normalizePassengerName;
 window.formatDate = formatDate;
 window.calculateStayDuration = calculateStayDuration;
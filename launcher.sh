@@ -5,8 +5,9 @@
 SCRIPT_DIR="$( cd "$( dirname "${BASH_SOURCE[0]}" )" && pwd )"
 cd "$SCRIPT_DIR"
 
-# Puerto a usar
+# Puertos a usar
 PORT=8000
+RENDER_PORT=8001
 
 # Verificar si el puerto ya está en uso
 if lsof -Pi :$PORT -sTCP:LISTEN -t >/dev/null 2>&1 ; then
@@ -28,6 +29,18 @@ else
     echo "✅ Servidor iniciado (PID: $SERVER_PID)"
     echo "📝 Log: /tmp/suteba-server.log"
     echo ""
+
+    # Servicio de render Python (plantillas precargadas para fichas y vouchers)
+    if python3 -c "import reportlab, pypdf" > /dev/null 2>&1; then
+        python3 python/render_server.py --port $RENDER_PORT > /tmp/suteba-render.log 2>&1 &
+        RENDER_PID=$!
+        echo $RENDER_PID > /tmp/suteba-render.pid
+        echo "✅ Servicio de render iniciado (PID: $RENDER_PID) en http://localhost:$RENDER_PORT"
+        echo "📝 Log: /tmp/suteba-render.log"
+    else
+        echo "ℹ️  reportlab/pypdf no instalados: las fichas se generan en el navegador"
+    fi
+    echo ""
     
     # Esperar un momento para que el servidor inicie
     sleep 2
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Presupuesto de arranque de los CLI generadores (``python -X importtime``).
+
+Importa cada CLI en un proceso nuevo con ``-X importtime``, suma el tiempo
+acumulado de los imports de primer nivel y falla si supera el presupuesto o si
+aparece algún módulo del stack PDF (reportlab, pypdf): esos solo deben cargarse
+cuando empieza el render, no para ``--help``, un error de argumentos o
+``--dry-run``. Cada CLI se mide varias veces y se toma el mínimo, que es lo
+menos afectado por el ruido de la máquina.
+
+    python3 python/benchmarks/import_budget.py --budget-ms 75
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Tuple
+
+PYTHON_DIR = Path(__file__).resolve().parent.parent
+
+# (carpeta del script, módulo) de cada CLI
+CLI_MODULES = [
+    ("vouchersAlicante", "generar_vouchers_overlay"),
+    ("fichaPax", "llenar_fichas"),
+]
+HEAVY_PACKAGES = ("reportlab", "pypdf")
+DEFAULT_BUDGET_MS = 75.0
+DEFAULT_RUNS = 5
+
+
+@dataclass
+class ImportResult:
+    module: str
+    total_ms: float
+    heavy: List[str]
+
+
+def parse_importtime(stderr: str) -> Tuple[float, List[str]]:
+    """Devuelve (ms acumulados de los imports de primer nivel, módulos pesados cargados)."""
+    total_us = 0
+    heavy = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        package = name.strip().split(".")[0]
+        if package in HEAVY_PACKAGES and package not in heavy:
+            heavy.append(package)
+        # Los imports anidados vienen indentados; solo los de primer nivel suman
+        if not name.startswith("  "):
+            total_us += int(cumulative)
+    return total_us / 1000, heavy
+
+
+def measure_module(folder: str, module: str, runs: int) -> ImportResult:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(PYTHON_DIR / folder), str(PYTHON_DIR)]))
+    samples = []
+    heavy: List[str] = []
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        total_ms, heavy = parse_importtime(completed.stderr)
+        samples.append(total_ms)
+    return ImportResult(module=module, total_ms=min(samples), heavy=heavy)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Controla el tiempo de import de los CLI generadores")
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=DEFAULT_BUDGET_MS,
+        help=f"Tiempo de import máximo por CLI en ms, incluida la biblioteca estándar (default: {DEFAULT_BUDGET_MS:g})",
+    )
+    parser.add_argument(
+        "--runs",
+        type=int,
+        default=DEFAULT_RUNS,
+        help=f"Mediciones por CLI; se toma la mínima (default: {DEFAULT_RUNS})",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    failures = []
+    print(f"{'cli':<28} {'import ms':>10}  stack PDF")
+    for folder, module in CLI_MODULES:
+        result = measure_module(folder, module, max(1, args.runs))
+        print(f"{module:<28} {result.total_ms:>10.1f}  {', '.join(result.heavy) or '-'}")
+        if result.heavy:
+            failures.append(f"{module} importa {', '.join(result.heavy)} al cargar el módulo")
+        if result.total_ms > args.budget_ms:
+            failures.append(f"{module}: {result.total_ms:.1f} ms > {args.budget_ms:g} ms")
+
+    if failures:
+        print("⚠️ Fuera de presupuesto:")
+        for line in failures:
+            print(f"   - {line}")
+        sys.exit(1)
+    print(f"✅ Todos los CLI importan en menos de {args.budget_ms:g} ms sin cargar el stack PDF")
+
+
+if __name__ == "__main__":
+    main()
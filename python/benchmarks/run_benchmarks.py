@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""Benchmarks del pipeline de impresión (vouchers Alicante y fichas).
+
+Para cada tamaño genera un CSV sintético (ver ``synthetic_regimen.py``) y mide
+por separado cada etapa: tiempo de pared, tiempo de CPU y pico de memoria
+(``tracemalloc``, en una segunda pasada para no inflar los tiempos). El
+resultado se guarda en un JSON; con ``--baseline`` se compara contra un
+reporte anterior y la corrida falla si alguna etapa empeoró más de la
+tolerancia.
+
+    python3 python/benchmarks/run_benchmarks.py --sizes 100,1000,10000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+PYTHON_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PYTHON_DIR))
+sys.path.insert(0, str(PYTHON_DIR / "vouchersAlicante"))
+sys.path.insert(0, str(PYTHON_DIR / "fichaPax"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import generar_con_overlay as fichas  # noqa: E402
+import generar_vouchers_overlay as vouchers  # noqa: E402
+import llenar_fichas  # noqa: E402
+from common.csv_cache import CsvCache, build_cache, load_groups, open_cache  # noqa: E402
+from common.pdf_text import ENGINES  # noqa: E402
+from synthetic_regimen import write_regimen_csv  # noqa: E402
+
+DEFAULT_SIZES = "100,1000,10000"
+DEFAULT_FICHA_LIMIT = 300
+REPORT_VERSION = 1
+
+
+@dataclass
+class StageResult:
+    stage: str
+    passengers: int
+    items: int
+    wall_s: float
+    cpu_s: float
+    peak_mb: float | None
+    items_per_s: float
+
+
+def measure(stage_fn: Callable[[], int], with_memory: bool) -> Tuple[int, float, float, float | None]:
+    """Corre la etapa una vez cronometrada y, si se pide, otra con tracemalloc."""
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    items = stage_fn()
+    wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+
+    peak_mb = None
+    if with_memory:
+        tracemalloc.start()
+        try:
+            stage_fn()
+            peak_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        finally:
+            tracemalloc.stop()
+    return items, wall, cpu, peak_mb
+
+
+def benchmark_size(passengers: int, work_dir: str, ficha_limit: int, engines: List[str], with_memory: bool) -> List[StageResult]:
+    csv_path = write_regimen_csv(os.path.join(work_dir, f"regimen_{passengers}.csv"), passengers)
+    template_pdf = str(vouchers.SCRIPT_DIR / "VOUCHER ALICANTE.pdf")
+    logo_path = vouchers.resolve_default_logo_path()
+    plantilla = fichas.cargar_plantilla()
+
+    rows = vouchers.load_csv_rows(csv_path)
+    records = vouchers.group_by_voucher(rows)
+    grupos = llenar_fichas.agrupar_por_voucher(csv_path)
+
+    def ficha_stage() -> int:
+        output_dir = os.path.join(work_dir, "fichas")
+        os.makedirs(output_dir, exist_ok=True)
+        count = 0
+        for voucher, grupo in list(grupos.items())[:ficha_limit]:
+            titular, acompanantes = llenar_fichas.obtener_titular_y_acompanantes(grupo.passengers)
+            habitaciones = list({p.room for p in grupo.passengers})
+            nombre_salida = os.path.join(output_dir, f"ficha_voucher_{voucher}.pdf")
+            fichas.generar_ficha_sobre_original(
+                titular, grupo.pax, nombre_salida, acompanantes, habitaciones, plantilla=plantilla
+            )
+            count += 1
+        return count
+
+    stages: Dict[str, Callable[[], int]] = {
+        "load_csv_rows": lambda: len(vouchers.load_csv_rows(csv_path)),
+        "group_by_voucher": lambda: len(vouchers.group_by_voucher(rows)),
+        "build_cache": lambda: CsvCache(build_cache(csv_path)).row_count,
+        "load_groups": lambda: len(load_groups(csv_path)),
+        "cached_records": lambda: sum(1 for _ in vouchers.iter_cached_voucher_records(open_cache(csv_path))),
+    }
+    for engine in engines:
+        output_pdf = os.path.join(work_dir, f"vouchers_{engine}.pdf")
+        stages[f"generate_pdf[{engine}]"] = lambda output_pdf=output_pdf, engine=engine: vouchers.generate_pdf(
+            template_pdf, output_pdf, records, 0.0, 0.0, logo_path, True, engine=engine
+        )
+    stages["agrupar_por_voucher"] = lambda: len(llenar_fichas.agrupar_por_voucher(csv_path))
+    stages["generar_ficha_sobre_original"] = ficha_stage
+
+    results = []
+    for stage, stage_fn in stages.items():
+        items, wall, cpu, peak_mb = measure(stage_fn, with_memory)
+        results.append(
+            StageResult(
+                stage=stage,
+                passengers=passengers,
+                items=items,
+                wall_s=round(wall, 4),
+                cpu_s=round(cpu, 4),
+                peak_mb=round(peak_mb, 2) if peak_mb is not None else None,
+                items_per_s=round(items / wall, 1) if wall > 0 else 0.0,
+            )
+        )
+        print(f"   {stage:<30} {wall:8.3f} s  {items:>7} items", flush=True)
+    return results
+
+
+def compare_with_baseline(results: List[StageResult], baseline_path: str, tolerance: float) -> List[str]:
+    """Devuelve las etapas cuyo tiempo por ítem empeoró más que ``tolerance``."""
+    with open(baseline_path, mode="r", encoding="utf-8") as handle:
+        baseline = json.load(handle)
+    previous = {(item["stage"], item["passengers"]): item for item in baseline.get("results", [])}
+
+    regressions = []
+    for result in results:
+        before = previous.get((result.stage, result.passengers))
+        if not before or not before["items_per_s"] or not result.items_per_s:
+            continue
+        slowdown = before["items_per_s"] / result.items_per_s - 1
+        if slowdown > tolerance:
+            regressions.append(
+                f"{result.stage} ({result.passengers} pax): {before['items_per_s']} -> {result.items_per_s} items/s "
+                f"({slowdown:+.0%})"
+            )
+    return regressions
+
+
+def print_table(results: List[StageResult]) -> None:
+    print(f"\n{'etapa':<30} {'pax':>7} {'items':>7} {'pared s':>9} {'cpu s':>8} {'pico MB':>8} {'items/s':>9}")
+    for result in results:
+        peak = f"{result.peak_mb:.2f}" if result.peak_mb is not None else "-"
+        print(
+            f"{result.stage:<30} {result.passengers:>7} {result.items:>7} {result.wall_s:>9.3f} "
+            f"{result.cpu_s:>8.3f} {peak:>8} {result.items_per_s:>9.1f}"
+        )
+
+
+def parse_sizes(value: str) -> List[int]:
+    sizes = [int(item) for item in value.split(",") if item.strip()]
+    if not sizes or any(size < 1 for size in sizes):
+        raise argparse.ArgumentTypeError(f"Tamaños inválidos: {value}")
+    return sizes
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmarks de los generadores de vouchers y fichas")
+    parser.add_argument(
+        "--sizes",
+        type=parse_sizes,
+        default=parse_sizes(DEFAULT_SIZES),
+        help=f"Cantidades de pasajeros separadas por coma, hasta 100000 (default: {DEFAULT_SIZES})",
+    )
+    parser.add_argument(
+        "--ficha-limit",
+        type=int,
+        default=DEFAULT_FICHA_LIMIT,
+        help=f"Máximo de fichas individuales a generar por tamaño (default: {DEFAULT_FICHA_LIMIT})",
+    )
+    parser.add_argument(
+        "--engines",
+        default=",".join(ENGINES),
+        help="Motores de generate_pdf a medir, separados por coma (default: todos)",
+    )
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="No mide el pico de memoria")
+    parser.add_argument("--output", default="bench_report.json", help="Reporte JSON (default: bench_report.json)")
+    parser.add_argument("--baseline", default=None, help="Reporte JSON anterior contra el cual comparar")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Empeoramiento de items/s tolerado contra --baseline antes de fallar (default: 0.25 = 25%%)",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    engines = [engine for engine in args.engines.split(",") if engine]
+    unknown = [engine for engine in engines if engine not in ENGINES]
+    if unknown:
+        raise ValueError(f"Motores desconocidos en --engines: {', '.join(unknown)}")
+
+    results: List[StageResult] = []
+    with tempfile.TemporaryDirectory(prefix="suteba_bench_") as work_dir:
+        for size in args.sizes:
+            print(f"ℹ️ {size} pasajeros")
+            results.extend(benchmark_size(size, work_dir, args.ficha_limit, engines, args.memory))
+
+    report = {
+        "version": REPORT_VERSION,
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "results": [asdict(result) for result in results],
+    }
+    with open(args.output, mode="w", encoding="utf-8") as handle:
+        json.dump(report, handle, ensure_ascii=False, indent=1)
+
+    print_table(results)
+    print(f"\n✅ Reporte guardado: {args.output}")
+
+    if args.baseline:
+        regressions = compare_with_baseline(results, args.baseline, args.tolerance)
+        if regressions:
+            print("⚠️ Etapas más lentas que el baseline:")
+            for line in regressions:
+                print(f"   - {line}")
+            sys.exit(1)
+        print(f"✅ Sin regresiones contra {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
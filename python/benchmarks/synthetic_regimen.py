@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""Genera CSV sintéticos con el formato de consultaRegimenReport.csv.
+
+Los datos son inventados (no se versionan CSV reales con datos personales) pero
+siguen distribuciones parecidas a una temporada real: grupos de 1 a 6
+pasajeros con mayoría de parejas y familias, vouchers de grupos grandes
+repartidos en dos habitaciones, nombres con tildes y eñes, y el export en
+orden de carga (no ordenado por voucher).
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import random
+import unicodedata
+from typing import Iterator, List
+
+HEADERS = [
+    "Cód. Alojamiento",
+    "Descripción",
+    "Nro. habitación",
+    "Tipo habitación",
+    "Observación habitación",
+    "Cantidad plazas",
+    "Voucher",
+    "Sede",
+    "Fecha de ingreso",
+    "Fecha de egreso",
+    "Plazas ocupadas",
+    "Tipo documento",
+    "Nro. doc.",
+    "Apellido y nombre",
+    "Edad",
+    "Entidad",
+    "Servicios",
+    "Paquete",
+    "Fecha de nacimiento",
+    "Email",
+    "Teléfono",
+    "Celular",
+]
+
+# Cantidad de pasajeros por voucher -> peso relativo
+GROUP_SIZE_WEIGHTS = {1: 18, 2: 34, 3: 20, 4: 18, 5: 7, 6: 3}
+# Probabilidad de que el grupo ocupe dos habitaciones, según su tamaño
+MULTI_ROOM_PROBABILITY = {1: 0.0, 2: 0.05, 3: 0.1, 4: 0.45, 5: 0.7, 6: 0.9}
+ROOM_TYPES = {1: "SGL", 2: "DBL", 3: "TPL", 4: "CPL", 5: "CPL", 6: "CPL"}
+
+SURNAMES = [
+    "ACUÑA", "ÁLVAREZ", "BENÍTEZ", "BROVIA", "CASTRO", "DÍAZ", "FERNÁNDEZ", "GARCÍA", "GÓMEZ",
+    "GONZÁLEZ", "IBÁÑEZ", "LÓPEZ", "MARTÍNEZ", "MUÑOZ", "NÚÑEZ", "PEÑA", "PÉREZ", "QUIROGA",
+    "RAMOS", "RODRÍGUEZ", "ROMERO", "RUIZ", "SÁNCHEZ", "SOSA", "TORRES", "VILLALBA",
+]
+FIRST_NAMES = [
+    "AGUSTÍN", "ÁNGEL", "CAMILA", "INÉS", "JOAQUÍN", "JOSÉ", "JUAN", "LUCÍA", "MARCELO", "MARÍA",
+    "MARÍA JOSÉ", "MARTÍN", "MATÍAS", "NICOLÁS", "RAMÓN", "ROCÍO", "SOFÍA", "VALENTINA",
+]
+SEDES = [
+    "1 - LA PLATA", "7 - AVELLANEDA", "12 - QUILMES", "21 - MAR DEL PLATA", "33 - BAHÍA BLANCA",
+    "39 - CHIVILCOY", "45 - JUNÍN", "58 - MORÓN",
+]
+SERVICES_WEIGHTS = {"MEDIA PENSIÓN": 50, "PENSIÓN COMPLETA": 20, "DESAYUNO": 30}
+HOTELS = ["23 DE MAYO", "BALNEARIO ALICANTE"]
+
+
+def _weighted(rng: random.Random, weights: dict) -> object:
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def _ascii(value: str) -> str:
+    return unicodedata.normalize("NFKD", value).encode("ascii", "ignore").decode("ascii")
+
+
+def _person(rng: random.Random, surname: str, age: int) -> tuple:
+    name = f"{surname} {rng.choice(FIRST_NAMES)}"
+    birth_year = 2025 - age
+    return name, age, f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{birth_year}"
+
+
+def iter_regimen_rows(passengers: int, seed: int = 1) -> Iterator[List[str]]:
+    """Filas del CSV (sin encabezado) hasta completar ``passengers`` pasajeros."""
+    rng = random.Random(seed)
+    sequences = {sede: 0 for sede in SEDES}
+    row_id = 0
+    doc_number = 20_000_000
+
+    while row_id < passengers:
+        size = min(_weighted(rng, GROUP_SIZE_WEIGHTS), passengers - row_id)
+        sede = rng.choice(SEDES)
+        sequences[sede] += 1
+        voucher = f"{int(sede.split(' - ')[0]):02d}{sequences[sede]:06d}"
+
+        first_room = rng.randint(100, 180)
+        rooms = [str(first_room)]
+        if rng.random() < MULTI_ROOM_PROBABILITY[size]:
+            rooms.append(str(first_room + rng.choice((1, 2))))
+
+        day = rng.randint(1, 24)
+        nights = rng.choice((4, 5, 5, 6, 7))
+        from_date = f"{day:02d}/01/2026"
+        to_date = f"{day + nights:02d}/01/2026"
+        services = _weighted(rng, SERVICES_WEIGHTS)
+        hotel = rng.choice(HOTELS)
+        surname = rng.choice(SURNAMES)
+
+        # Titular adulto, pareja adulta y el resto hijos menores
+        ages = [rng.randint(25, 78)]
+        if size > 1:
+            ages.append(max(18, ages[0] + rng.randint(-6, 6)))
+        ages += [rng.randint(1, 17) for _ in range(size - len(ages))]
+
+        for index, age in enumerate(ages):
+            row_id += 1
+            doc_number += rng.randint(1, 9)
+            person_surname = surname if index != 1 or rng.random() < 0.3 else rng.choice(SURNAMES)
+            name, age, birth_date = _person(rng, person_surname, age)
+            room = rooms[index % len(rooms)]
+            holder = index == 0
+            yield [
+                str(row_id),
+                hotel,
+                room,
+                ROOM_TYPES[size if len(rooms) == 1 else max(2, size // 2)],
+                "Cuna, vista al mar" if rng.random() < 0.05 else "",
+                str(size),
+                voucher,
+                sede,
+                from_date,
+                to_date,
+                str(size),
+                "DNI",
+                str(doc_number),
+                name,
+                str(age),
+                "SUTEBA",
+                services,
+                "TEMPORADA 2026",
+                birth_date,
+                f"{_ascii(name.split()[0]).lower()}{row_id}@correo.com.ar" if holder and rng.random() < 0.8 else "No informado",
+                f"2346 {rng.randint(10, 99)}-{rng.randint(1000, 9999)}" if holder and rng.random() < 0.5 else "",
+                f"11 {rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}" if holder and rng.random() < 0.7 else "",
+            ]
+
+
+def write_regimen_csv(path: str, passengers: int, seed: int = 1) -> str:
+    with open(path, mode="w", encoding="utf-8", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(HEADERS)
+        writer.writerows(iter_regimen_rows(passengers, seed))
+    return path
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Genera un consultaRegimenReport.csv sintético")
+    parser.add_argument("--passengers", type=int, default=1000, help="Cantidad de pasajeros (default: 1000)")
+    parser.add_argument("--seed", type=int, default=1, help="Semilla para obtener siempre el mismo CSV (default: 1)")
+    parser.add_argument("--output", default="consultaRegimenReport_sintetico.csv", help="Archivo CSV de salida")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.passengers < 1:
+        raise ValueError(f"--passengers debe ser 1 o mayor: {args.passengers}")
+    write_regimen_csv(args.output, args.passengers, args.seed)
+    print(f"✅ CSV sintético generado: {args.output} ({args.passengers} pasajeros)")
+
+
+if __name__ == "__main__":
+    main()
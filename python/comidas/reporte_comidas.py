@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Reporte de comidas MAP/PC/Balneario precalculado para las páginas de vouchers.
+
+Aplica las mismas reglas que ``client/src/lib/business.js`` (ver
+``common.meals``) sobre el CSV completo y deja un JSON que ``vouchers.html`` y
+``vouchers-pc.html`` cargan en lugar del CSV, sin volver a procesar fila por
+fila en el navegador. Con ``--format csv`` escribe solo los totales por día,
+unidad turística y servicio, separados por ``;`` para LibreOffice.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPT_DIR.parent))
+
+from common.meals import MODES, MealReport, meal_report_from_csv  # noqa: E402
+
+
+def default_output_path(csv_path: str, mode: str, output_format: str) -> str:
+    return f"{os.path.splitext(csv_path)[0]}_comidas_{mode.lower()}.{output_format}"
+
+
+def write_json(report: MealReport, output_path: str) -> None:
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, mode="w", encoding="utf-8") as target:
+        json.dump(report.to_dict(), target, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, output_path)
+
+
+def write_summary_csv(report: MealReport, output_path: str) -> None:
+    tmp_path = f"{output_path}.tmp"
+    # BOM para que LibreOffice/Excel detecten UTF-8, igual que la descarga de rooming.html
+    with open(tmp_path, mode="w", encoding="utf-8-sig", newline="") as target:
+        writer = csv.writer(target, delimiter=";")
+        writer.writerow(["Resumen", "Clave", "Vouchers", "Pax", "Comidas"])
+        for label, tallies in (("Día", report.by_day), ("U.Turística", report.by_hotel), ("Servicio", report.by_service)):
+            for key, tally in sorted(tallies.items()):
+                writer.writerow([label, key, tally.vouchers, tally.pax, tally.meals])
+        total = report.total
+        writer.writerow(["Total", report.mode, total.vouchers, total.pax, total.meals])
+    os.replace(tmp_path, output_path)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Calcula las comidas MAP/PC/Balneario del CSV de regimen")
+    parser.add_argument("--csv", required=True, help="CSV exportado del sistema de reservas")
+    parser.add_argument("--mode", choices=MODES, default="MAP", help="Servicio a contar (default: MAP)")
+    parser.add_argument(
+        "--format",
+        dest="output_format",
+        choices=("json", "csv"),
+        default="json",
+        help="json: reporte completo para las páginas de vouchers (default); csv: solo los totales",
+    )
+    parser.add_argument("--output", default=None, help="Archivo de salida (default: <csv>_comidas_<modo>.<formato>)")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if not os.path.exists(args.csv):
+        raise FileNotFoundError(f"No se encontró el CSV: {args.csv}")
+    output_path = args.output or default_output_path(args.csv, args.mode, args.output_format)
+
+    start = time.perf_counter()
+    report = meal_report_from_csv(args.csv, args.mode)
+    if args.output_format == "json":
+        write_json(report, output_path)
+    else:
+        write_summary_csv(report, output_path)
+    elapsed = time.perf_counter() - start
+
+    total = report.total
+    print(f"✅ Reporte {args.mode}: {output_path} ({elapsed:.2f} s)")
+    print(f"   Vouchers: {total.vouchers} · Pax: {total.pax} · Comidas: {total.meals} · Días: {len(report.by_day)}")
+    if report.warnings["invalid_dates"]:
+        print(f"⚠️ {report.warnings['invalid_dates']} registro(s) con fechas inválidas o duración <= 0")
+
+
+if __name__ == "__main__":
+    main()
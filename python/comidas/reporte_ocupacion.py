@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Ocupación y comidas por noche de toda la temporada (o de un rango de fechas).
+
+Arma el índice de ``common.occupancy`` sobre la caché del CSV: en lugar de
+recorrer las noches de cada pasajero, cada estadía suma en su ingreso y resta
+en su egreso, así la temporada completa se calcula y se consulta en
+milisegundos. ``--mode`` filtra por servicio (MAP/PC/BALNEARIO, con las reglas
+de ``common.meals``) y cuenta las comidas; ``--hotel`` limita a una unidad
+turística.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPT_DIR.parent))
+
+from common.csv_cache import open_cache  # noqa: E402
+from common.meals import MODES, parse_date  # noqa: E402
+from common.occupancy import DayOccupancy, OccupancyIndex, occupancy_from_cache  # noqa: E402
+
+
+def parse_day(value: str) -> date:
+    day = parse_date(value)
+    if day is None:
+        raise argparse.ArgumentTypeError(f"Fecha inválida (dd/mm/aaaa): {value}")
+    return day
+
+
+def format_day(day: date) -> str:
+    return day.strftime("%d/%m/%Y")
+
+
+def default_output_path(csv_path: str, output_format: str) -> str:
+    return f"{os.path.splitext(csv_path)[0]}_ocupacion.{output_format}"
+
+
+def print_table(days: list[DayOccupancy]) -> None:
+    print(f"{'Noche':<12}{'Ingresos':>10}{'Egresos':>10}{'Pax':>10}{'Comidas':>10}")
+    for day in days:
+        print(f"{format_day(day.day):<12}{day.arrivals:>10}{day.departures:>10}{day.pax:>10}{day.meals:>10}")
+
+
+def write_csv(days: list[DayOccupancy], output_path: str) -> None:
+    tmp_path = f"{output_path}.tmp"
+    # Mismo formato que reporte_comidas.py --format csv (BOM y ';' para LibreOffice)
+    with open(tmp_path, mode="w", encoding="utf-8-sig", newline="") as target:
+        writer = csv.writer(target, delimiter=";")
+        writer.writerow(["Noche", "Ingresos", "Egresos", "Pax", "Comidas"])
+        for day in days:
+            writer.writerow([format_day(day.day), day.arrivals, day.departures, day.pax, day.meals])
+    os.replace(tmp_path, output_path)
+
+
+def write_json(index: OccupancyIndex, days: list[DayOccupancy], args: argparse.Namespace, output_path: str) -> None:
+    peak_day, peak_pax = index.peak(args.start, args.end)
+    report = {
+        "mode": args.mode,
+        "hotel": args.hotel,
+        "stays": index.stays,
+        "invalid": index.invalid,
+        "nights": sum(day.pax for day in days),
+        "meals": sum(day.meals for day in days),
+        "peak": {"day": peak_day.isoformat(), "pax": peak_pax},
+        "days": [{**vars(day), "day": day.day.isoformat()} for day in days],
+    }
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, mode="w", encoding="utf-8") as target:
+        json.dump(report, target, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, output_path)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Ocupación y comidas por noche del CSV de regimen")
+    parser.add_argument("--csv", required=True, help="CSV exportado del sistema de reservas")
+    parser.add_argument("--mode", choices=MODES, default=None, help="Contar solo un servicio (default: todos)")
+    parser.add_argument("--hotel", default=None, help="Contar solo una unidad turística (columna Descripción)")
+    parser.add_argument("--desde", dest="start", type=parse_day, default=None, help="Primera noche (dd/mm/aaaa)")
+    parser.add_argument("--hasta", dest="last", type=parse_day, default=None, help="Última noche, incluida (dd/mm/aaaa)")
+    parser.add_argument(
+        "--format",
+        dest="output_format",
+        choices=("table", "csv", "json"),
+        default="table",
+        help="table: por pantalla (default); csv/json: a --output",
+    )
+    parser.add_argument("--output", default=None, help="Archivo de salida (default: <csv>_ocupacion.<formato>)")
+    args = parser.parse_args()
+    args.end = args.last + timedelta(days=1) if args.last else None
+    if args.start and args.end and args.end <= args.start:
+        parser.error("--hasta no puede ser anterior a --desde")
+    return args
+
+
+def main() -> None:
+    args = parse_args()
+    if not os.path.exists(args.csv):
+        raise FileNotFoundError(f"No se encontró el CSV: {args.csv}")
+
+    start = time.perf_counter()
+    index = occupancy_from_cache(open_cache(args.csv), args.mode, args.hotel)
+    days = index.days(args.start, args.end)
+    elapsed = time.perf_counter() - start
+
+    if args.output_format == "table":
+        print_table(days)
+    else:
+        output_path = args.output or default_output_path(args.csv, args.output_format)
+        if args.output_format == "csv":
+            write_csv(days, output_path)
+        else:
+            write_json(index, days, args, output_path)
+        print(f"✅ Ocupación: {output_path}")
+
+    peak_day, peak_pax = index.peak(args.start, args.end)
+    nights = index.nights(args.start or index.first_day, args.end or index.last_day)
+    print(f"📊 {index.stays} estadías · {nights} pasajero-noches · {nights * index.meals_per_night} comidas ({elapsed * 1000:.0f} ms)")
+    if peak_pax:
+        print(f"   Pico: {peak_pax} pax la noche del {format_day(peak_day)}")
+    if index.invalid:
+        print(f"⚠️ {index.invalid} pasajero(s) con fechas inválidas o sin noches")
+
+
+if __name__ == "__main__":
+    main()
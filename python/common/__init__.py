@@ -0,0 +1 @@
+"""Módulos compartidos por los generadores de vouchers Alicante y fichaPax."""
@@ -0,0 +1,261 @@
+"""Caché binaria y columnar del CSV de regimen, agrupada por voucher.
+
+El mismo export del día se lee varias veces (vouchers, fichas, vista previa).
+La primera lectura lo convierte en ``<csv>.cache`` y las siguientes mapean ese
+archivo en memoria (``mmap``) en lugar de volver a tokenizar el texto:
+
+* tabla de strings sin repetidos (UTF-8 + offsets): nombres, fechas, sedes...
+  aparecen una sola vez aunque se repitan en miles de filas
+* una columna de ids de string por cada atributo de ``Passenger`` (la edad,
+  como entero), con las filas ya agrupadas por voucher y en el orden del CSV
+  dentro de cada grupo
+* tabla de grupos: voucher, primera fila y cantidad de filas
+
+Las columnas se leen directo del mapeo (``memoryview.cast``) sin copiarlas; solo
+se decodifican los strings de los pasajeros que se piden. La caché se invalida
+si cambia el CSV: primero se comparan tamaño y fecha de modificación y, si la
+fecha cambió pero el contenido es el mismo (sha256), se sigue usando.
+"""
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Dict, Iterator, List, Tuple
+
+from common.records import Passenger, VoucherGroup, normalize
+from common.regimen_csv import iter_export_rows
+
+
+CACHE_MAGIC = b"SUTEBAC1"
+CACHE_VERSION = 2
+# magic, versión, orden de bytes, tamaño y mtime del CSV, sha256, columnas, filas, grupos, strings
+_HEADER = struct.Struct("<8sHc5xQq32sIIII")
+_MTIME_OFFSET = struct.calcsize("<8sHc5xQ")
+_BYTEORDER = b"L" if sys.byteorder == "little" else b"B"
+STRING_COLUMNS = tuple(attr for attr in Passenger.__slots__ if attr != "age")
+
+
+def cache_path_for(csv_path: str) -> str:
+    return f"{csv_path}.cache"
+
+
+def _file_sha256(path: str) -> bytes:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.digest()
+
+
+def _padded(data: bytes) -> bytes:
+    return data + b"\0" * (-len(data) % 4)
+
+
+def build_cache(csv_path: str, cache_path: str | None = None) -> str:
+    """Convierte ``csv_path`` a la caché binaria; devuelve la ruta escrita."""
+    cache_path = cache_path or cache_path_for(csv_path)
+    stat = os.stat(csv_path)
+    sha256 = _file_sha256(csv_path)
+
+    strings: Dict[str, int] = {}
+    groups: Dict[str, List[Tuple[List[int], int]]] = {}
+    for row in iter_export_rows(csv_path):
+        passenger = Passenger.from_row(row)
+        ids = [strings.setdefault(getattr(passenger, attr), len(strings)) for attr in STRING_COLUMNS]
+        groups.setdefault(passenger.voucher, []).append((ids, passenger.age))
+
+    columns = [array("I") for _ in STRING_COLUMNS]
+    ages = array("i")
+    group_table = array("I")
+    for voucher, rows in groups.items():
+        group_table.extend((strings.setdefault(voucher, len(strings)), len(ages), len(rows)))
+        for ids, age in rows:
+            for column, string_id in zip(columns, ids):
+                column.append(string_id)
+            ages.append(age)
+
+    blob = bytearray()
+    string_offsets = array("I", [0])
+    for value in strings:
+        blob += value.encode("utf-8")
+        string_offsets.append(len(blob))
+
+    header = _HEADER.pack(
+        CACHE_MAGIC,
+        CACHE_VERSION,
+        _BYTEORDER,
+        stat.st_size,
+        stat.st_mtime_ns,
+        sha256,
+        len(STRING_COLUMNS),
+        len(ages),
+        len(groups),
+        len(strings),
+    )
+    import tempfile
+
+    # Un temporal propio por corrida: el CLI y render_server.py pueden armar la misma caché a la vez
+    directory, name = os.path.split(cache_path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory or ".", prefix=f"{name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as target:
+            target.write(header)
+            target.write(string_offsets.tobytes())
+            target.write(_padded(bytes(blob)))
+            for column in columns:
+                target.write(column.tobytes())
+            target.write(ages.tobytes())
+            target.write(group_table.tobytes())
+        # mkstemp crea el archivo solo para el dueño; la caché se comparte como el CSV
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, cache_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return cache_path
+
+
+class CsvCache:
+    """Vista de solo lectura sobre una caché mapeada en memoria."""
+
+    def __init__(self, cache_path: str) -> None:
+        with open(cache_path, "rb") as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        (
+            _,
+            _,
+            _,
+            self.source_size,
+            self.source_mtime_ns,
+            self.source_sha256,
+            column_count,
+            self.row_count,
+            self.group_count,
+            string_count,
+        ) = _HEADER.unpack_from(self._map)
+
+        view = memoryview(self._map)
+        position = _HEADER.size
+        self._string_offsets = view[position : position + 4 * (string_count + 1)].cast("I")
+        position += 4 * (string_count + 1)
+        blob_size = self._string_offsets[-1] if string_count else 0
+        self._blob = view[position : position + blob_size]
+        position += blob_size + (-blob_size % 4)
+        self._columns = []
+        for _ in range(column_count):
+            self._columns.append(view[position : position + 4 * self.row_count].cast("I"))
+            position += 4 * self.row_count
+        self._ages = view[position : position + 4 * self.row_count].cast("i")
+        position += 4 * self.row_count
+        self._groups = view[position : position + 12 * self.group_count].cast("I")
+        self._strings: List[str | None] = [None] * string_count
+
+    def string(self, string_id: int) -> str:
+        value = self._strings[string_id]
+        if value is None:
+            start, end = self._string_offsets[string_id], self._string_offsets[string_id + 1]
+            value = self._strings[string_id] = str(self._blob[start:end], "utf-8")
+        return value
+
+    def passenger(self, row: int) -> Passenger:
+        passenger = Passenger.__new__(Passenger)
+        for attr, column in zip(STRING_COLUMNS, self._columns):
+            setattr(passenger, attr, self.string(column[row]))
+        passenger.age = self._ages[row]
+        return passenger
+
+    def column(self, attr: str) -> memoryview:
+        """Columna completa de ``attr`` sin copiar: ids de string, o las edades para ``age``."""
+        if attr == "age":
+            return self._ages
+        return self._columns[STRING_COLUMNS.index(attr)]
+
+    def group_spans(self) -> Iterator[Tuple[int, int, int]]:
+        """(id de string del voucher, primera fila, cantidad de filas) de cada grupo."""
+        groups = self._groups
+        for index in range(0, 3 * self.group_count, 3):
+            yield groups[index], groups[index + 1], groups[index + 2]
+
+    def iter_groups(self) -> Iterator[VoucherGroup]:
+        """Grupos en el orden en que aparece cada voucher en el CSV."""
+        for voucher_id, start, count in self.group_spans():
+            yield VoucherGroup(self.string(voucher_id), [self.passenger(row) for row in range(start, start + count)])
+
+    def vouchers(self) -> List[Tuple[str, int]]:
+        """(voucher, índice de grupo) de todos los grupos."""
+        return [(self.string(self._groups[index * 3]), index) for index in range(self.group_count)]
+
+    def group(self, index: int) -> VoucherGroup:
+        voucher_id, start, count = self._groups[index * 3 : index * 3 + 3]
+        return VoucherGroup(self.string(voucher_id), [self.passenger(row) for row in range(start, start + count)])
+
+
+def _is_valid(cache_path: str, csv_path: str) -> bool:
+    try:
+        with open(cache_path, "rb") as handle:
+            header = handle.read(_HEADER.size)
+    except OSError:
+        return False
+    if len(header) != _HEADER.size:
+        return False
+    magic, version, byteorder, size, mtime_ns, sha256, column_count, *_ = _HEADER.unpack(header)
+    if (magic, version, byteorder, column_count) != (CACHE_MAGIC, CACHE_VERSION, _BYTEORDER, len(STRING_COLUMNS)):
+        return False
+
+    stat = os.stat(csv_path)
+    if size != stat.st_size:
+        return False
+    if mtime_ns == stat.st_mtime_ns:
+        return True
+    # Misma longitud y otra fecha (p. ej. el export copiado de nuevo): decide el contenido
+    if sha256 != _file_sha256(csv_path):
+        return False
+    # Se anota la fecha nueva para no volver a calcular el sha256; si la caché
+    # no se puede escribir, se usa igual
+    try:
+        with open(cache_path, "r+b") as handle:
+            handle.seek(_MTIME_OFFSET)
+            handle.write(struct.pack("<q", stat.st_mtime_ns))
+    except OSError:
+        pass
+    return True
+
+
+def open_cache(csv_path: str) -> CsvCache:
+    """Caché vigente de ``csv_path``; la arma si falta o el CSV cambió.
+
+    Si no se puede escribir junto al CSV, se arma en un archivo temporal que
+    se borra apenas queda mapeado.
+    """
+    cache_path = cache_path_for(csv_path)
+    if _is_valid(cache_path, csv_path):
+        return CsvCache(cache_path)
+    try:
+        return CsvCache(build_cache(csv_path, cache_path))
+    except OSError:
+        import tempfile
+
+        fd, tmp_path = tempfile.mkstemp(suffix=".cache")
+        os.close(fd)
+        try:
+            return CsvCache(build_cache(csv_path, tmp_path))
+        finally:
+            os.remove(tmp_path)
+
+
+def load_groups(csv_path: str) -> Dict[str, VoucherGroup]:
+    """Igual que ``group_passengers`` sobre todas las filas del CSV, leído desde la caché."""
+    return {group.voucher: group for group in open_cache(csv_path).iter_groups()}
+
+
+def iter_groups_by_voucher(csv_path: str) -> Iterator[VoucherGroup]:
+    """Grupos con voucher no vacío, ordenados por número de voucher."""
+    cache = open_cache(csv_path)
+    for voucher, index in sorted(cache.vouchers()):
+        if normalize(voucher):
+            yield cache.group(index)
+
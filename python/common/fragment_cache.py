@@ -0,0 +1,120 @@
+"""Caché en disco de fragmentos de overlay ya renderizados, acotada por tamaño (LRU).
+
+Un fragmento es el contenido PDF que dibuja los datos de un solo registro (un
+voucher) con el origen de su slot en (0, 0); la página se arma trasladando
+cada fragmento a su slot (ver ``common.pdf_text.placed_content``). Así una
+reimpresión, un lote parcial o una corrida con otros ``--x-adjust-mm`` /
+``--slot-N-y-adjust-mm`` reutilizan lo ya dibujado: la clave depende solo del
+contenido del registro y del layout, no de la posición ni de los ajustes.
+
+Cada fragmento es un archivo ``<clave>.frag`` en la carpeta de la caché. La
+fecha de modificación marca el último uso: cada acierto la actualiza y, si la
+carpeta supera ``max_bytes`` (contando lo que ocupa cada archivo en disco, en
+bloques de 4 KiB), se borran primero los menos usados. Varios
+procesos pueden compartir la carpeta (las escrituras son atómicas y un
+fragmento borrado por otro proceso es solo un fallo más).
+"""
+from __future__ import annotations
+
+import os
+from collections import OrderedDict
+from typing import Dict
+
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+FRAGMENT_SUFFIX = ".frag"
+_BLOCK_SIZE = 4096
+
+
+def _disk_size(size: int) -> int:
+    return -(-size // _BLOCK_SIZE) * _BLOCK_SIZE
+
+
+class FragmentCache:
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        if max_bytes < 0:
+            raise ValueError(f"El tamaño máximo de la caché no puede ser negativo: {max_bytes}")
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # clave -> tamaño, del menos al más usado; se arma al primer acceso
+        self._entries: OrderedDict[str, int] | None = None
+        self._size = 0
+
+    def __getstate__(self) -> Dict[str, object]:
+        # Los procesos worker reciben solo la carpeta y el límite, y releen el índice
+        return {"directory": self.directory, "max_bytes": self.max_bytes}
+
+    def __setstate__(self, state: Dict[str, object]) -> None:
+        self.__init__(state["directory"], state["max_bytes"])
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}{FRAGMENT_SUFFIX}")
+
+    def _load_entries(self) -> OrderedDict[str, int]:
+        if self._entries is None:
+            os.makedirs(self.directory, exist_ok=True)
+            found = []
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.name.endswith(FRAGMENT_SUFFIX) and entry.is_file():
+                        stat = entry.stat()
+                        found.append((stat.st_mtime_ns, entry.name[: -len(FRAGMENT_SUFFIX)], _disk_size(stat.st_size)))
+            found.sort()
+            self._entries = OrderedDict((key, size) for _, key, size in found)
+            self._size = sum(size for _, _, size in found)
+            # Si se achicó el límite, la carpeta se recorta de entrada
+            self._evict()
+        return self._entries
+
+    def get(self, key: str) -> bytes | None:
+        entries = self._load_entries()
+        if key not in entries:
+            self.misses += 1
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as handle:
+                data = handle.read()
+            os.utime(path)
+        except FileNotFoundError:
+            # Lo desalojó otro proceso
+            self._size -= entries.pop(key)
+            self.misses += 1
+            return None
+        entries.move_to_end(key)
+        self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        entries = self._load_entries()
+        size = _disk_size(len(data))
+        if size > self.max_bytes:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as target:
+            target.write(data)
+        os.replace(tmp_path, path)
+        self._size += size - entries.pop(key, 0)
+        entries[key] = size
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = self._entries
+        while self._size > self.max_bytes and entries:
+            key, size = entries.popitem(last=False)
+            self._size -= size
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    @property
+    def size(self) -> int:
+        self._load_entries()
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._load_entries())
@@ -0,0 +1,173 @@
+"""Motor de layout: posiciones de campos en JSON compiladas a un plan de dibujo.
+
+El JSON describe cada campo en mm desde el borde superior izquierdo de la
+página (o del slot, si el layout define varios ``slots`` por página).
+``load_layout`` lo compila una sola vez a operaciones con coordenadas en puntos
+ya resueltas y agrupadas por fuente, así renderizar un registro solo consiste
+en completar los valores sobre el plan.
+
+Formas de campo admitidas (ver ``fichaPax/positions.json``):
+
+* simple: ``{"x_mm", "y_top_mm", "size", "font"}`` -> clave ``<campo>``
+* columnas: ``x_mm_<col>`` en lugar de ``x_mm`` -> clave ``<campo>.<col>``
+* filas: ``y_first_top_mm``, ``spacing_mm`` y ``max`` en lugar de ``y_top_mm``
+  -> clave ``<campo>[.<col>].<fila>``
+* imagen: ``{"type": "image", "x_mm", "y_top_mm", "width_mm", "height_mm"}``,
+  con la esquina inferior izquierda en (x_mm, y_top_mm)
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Mapping, Tuple
+
+
+# Igual que reportlab.lib.units.mm y pagesizes.A4; se definen acá para que leer
+# un layout no cargue reportlab (los demás tamaños con nombre sí lo importan)
+mm = 72.0 / 2.54 * 0.1
+A4 = (210 * mm, 297 * mm)
+
+DEFAULT_FONT = "Helvetica"
+DEFAULT_FONT_SIZE = 10
+
+
+@dataclass(frozen=True)
+class DrawOp:
+    key: str
+    x: float
+    y: float
+
+
+@dataclass(frozen=True)
+class FontRun:
+    font: str
+    size: float
+    ops: Tuple[DrawOp, ...]
+
+
+@dataclass(frozen=True)
+class ImageBox:
+    x: float
+    y: float
+    width: float
+    height: float
+
+
+@dataclass(frozen=True)
+class CompiledLayout:
+    page_size: Tuple[float, float]
+    # Origen (arriba a la izquierda) de cada slot, en puntos desde abajo a la izquierda
+    slots: Tuple[Tuple[float, float], ...]
+    runs: Tuple[FontRun, ...]
+    images: Dict[str, ImageBox] = field(default_factory=dict)
+    digest: str = ""
+
+    def keys(self) -> List[str]:
+        return [op.key for run in self.runs for op in run.ops]
+
+    def draw(self, c, slots: Iterable[Tuple[Mapping[str, str], Tuple[float, float]]]) -> None:
+        """Dibuja los valores de cada slot en su origen, con un ``setFont`` por fuente.
+
+        Los valores vacíos o ausentes no se dibujan.
+        """
+        slots = list(slots)
+        for run in self.runs:
+            font_set = False
+            for values, (origin_x, origin_y) in slots:
+                for op in run.ops:
+                    value = values.get(op.key)
+                    if not value:
+                        continue
+                    if not font_set:
+                        c.setFont(run.font, run.size)
+                        font_set = True
+                    c.drawString(origin_x + op.x, origin_y + op.y, value)
+
+
+def _page_size(spec: Mapping) -> Tuple[float, float]:
+    size = spec.get("size", "A4")
+    if size == "A4":
+        return A4
+    if isinstance(size, str):
+        from reportlab.lib import pagesizes
+
+        try:
+            return getattr(pagesizes, size)
+        except AttributeError as exc:
+            raise ValueError(f"Tamaño de página desconocido en el layout: {size}") from exc
+    width_mm, height_mm = size
+    return width_mm * mm, height_mm * mm
+
+
+def _field_ops(name: str, spec: Mapping) -> List[DrawOp]:
+    columns = [(key[len("x_mm_"):], value) for key, value in spec.items() if key.startswith("x_mm_")]
+    if not columns:
+        columns = [("", spec["x_mm"])]
+
+    if "y_first_top_mm" in spec:
+        rows = [
+            (f".{index}", spec["y_first_top_mm"] + index * spec.get("spacing_mm", 0))
+            for index in range(int(spec.get("max", 1)))
+        ]
+    else:
+        rows = [("", spec["y_top_mm"])]
+
+    ops: List[DrawOp] = []
+    for row_suffix, y_top_mm in rows:
+        for column, x_mm in columns:
+            key = f"{name}.{column}" if column else name
+            ops.append(DrawOp(key=f"{key}{row_suffix}", x=x_mm * mm, y=-y_top_mm * mm))
+    return ops
+
+
+def compile_layout(data: Mapping, digest: str = "") -> CompiledLayout:
+    """Compila el dict del JSON de layout a un ``CompiledLayout``."""
+    page_size = _page_size(data.get("page", {}))
+    _, page_height = page_size
+    slot_specs = data.get("slots") or [{"x_mm": 0, "y_top_mm": 0}]
+    slots = tuple((spec["x_mm"] * mm, page_height - spec["y_top_mm"] * mm) for spec in slot_specs)
+
+    runs: Dict[Tuple[str, float], List[DrawOp]] = {}
+    images: Dict[str, ImageBox] = {}
+    for name, spec in data.get("fields", {}).items():
+        if spec.get("type") == "image":
+            images[name] = ImageBox(
+                x=spec["x_mm"] * mm,
+                y=-spec["y_top_mm"] * mm,
+                width=spec["width_mm"] * mm,
+                height=spec["height_mm"] * mm,
+            )
+            continue
+        font_key = (spec.get("font", DEFAULT_FONT), spec.get("size", DEFAULT_FONT_SIZE))
+        runs.setdefault(font_key, []).extend(_field_ops(name, spec))
+
+    return CompiledLayout(
+        page_size=page_size,
+        slots=slots,
+        runs=tuple(FontRun(font=font, size=size, ops=tuple(ops)) for (font, size), ops in runs.items()),
+        images=images,
+        digest=digest,
+    )
+
+
+_cache: Dict[str, Tuple[float, CompiledLayout]] = {}
+
+
+def load_layout(path: str) -> CompiledLayout:
+    """Lee y compila el layout; se recompila solo si el archivo cambió (mtime)."""
+    mtime = os.path.getmtime(path)
+    cached = _cache.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    with open(path, mode="rb") as handle:
+        raw = handle.read()
+    try:
+        data = json.loads(raw.decode("utf-8"))
+    except ValueError as exc:
+        raise ValueError(f"Layout inválido en {path}: {exc}") from exc
+    layout = compile_layout(data, digest=hashlib.sha256(raw).hexdigest())
+    _cache[path] = (mtime, layout)
+    return layout
@@ -0,0 +1,165 @@
+"""Manifiestos de contenido para regenerar solo los vouchers que cambiaron.
+
+Junto a cada salida se guarda ``<salida>.manifest.json`` con un hash por
+voucher y la composición de cada página. En la corrida siguiente, las páginas
+cuyos vouchers no cambiaron se copian del PDF anterior en lugar de volver a
+renderizarse. El manifiesto solo se usa si los parámetros de render (plantilla,
+ajustes, código del generador) y el hash del PDF anterior coinciden.
+
+Las salidas de un archivo por voucher llevan además un diario de la corrida
+(``RunJournal``): una línea por archivo ya escrito, así una corrida cortada a
+la mitad retoma desde el último archivo terminado.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from typing import IO, TYPE_CHECKING, Dict, Iterable, List, Tuple
+
+if TYPE_CHECKING:
+    from pypdf import PdfReader
+
+
+MANIFEST_VERSION = 1
+
+
+@dataclass
+class PreviousOutput:
+    reader: PdfReader
+    pages: Dict[Tuple[str, ...], int]
+
+
+@dataclass
+class OutputManifest:
+    pages: List[List[str]] = field(default_factory=list)
+    vouchers: Dict[str, str] = field(default_factory=dict)
+
+    def add_page(self, vouchers: List[str], keys: List[str]) -> None:
+        self.pages.append(keys)
+        self.vouchers.update(zip(vouchers, keys))
+
+    def reused_pages(self, previous: PreviousOutput) -> int:
+        return sum(1 for keys in self.pages if tuple(keys) in previous.pages)
+
+
+def content_hash(values: Iterable[object]) -> str:
+    digest = hashlib.sha1()
+    for value in values:
+        digest.update(str(value).encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def manifest_path_for(output_path: str) -> str:
+    return f"{output_path}.manifest.json"
+
+
+def read_manifest(manifest_path: str, params_hash: str) -> Dict | None:
+    """Devuelve el manifiesto si existe y fue generado con los mismos parámetros."""
+    try:
+        with open(manifest_path, mode="r", encoding="utf-8") as handle:
+            manifest = json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+    if manifest.get("version") != MANIFEST_VERSION or manifest.get("params") != params_hash:
+        return None
+    return manifest
+
+
+def write_manifest(manifest_path: str, params_hash: str, **data: object) -> None:
+    manifest = {"version": MANIFEST_VERSION, "params": params_hash, **data}
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, mode="w", encoding="utf-8") as handle:
+        json.dump(manifest, handle, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, manifest_path)
+
+
+def load_previous_output(output_path: str, params_hash: str) -> PreviousOutput | None:
+    """Abre el PDF de la corrida anterior si su manifiesto sigue siendo válido."""
+    manifest = read_manifest(manifest_path_for(output_path), params_hash)
+    if manifest is None or not os.path.exists(output_path):
+        return None
+    if manifest.get("output_sha256") != file_sha256(output_path):
+        return None
+
+    from pypdf import PdfReader
+
+    reader = PdfReader(output_path)
+    page_keys: List[List[str]] = manifest.get("pages", [])
+    if len(reader.pages) != len(page_keys):
+        return None
+    return PreviousOutput(reader=reader, pages={tuple(keys): index for index, keys in enumerate(page_keys)})
+
+
+def save_output_manifest(output_path: str, params_hash: str, manifest: OutputManifest) -> None:
+    write_manifest(
+        manifest_path_for(output_path),
+        params_hash,
+        output_sha256=file_sha256(output_path),
+        pages=manifest.pages,
+        vouchers=manifest.vouchers,
+    )
+
+
+def read_journal(journal_path: str, params_hash: str) -> Dict[str, object]:
+    """Entradas del diario de una corrida anterior con los mismos parámetros (clave -> valor).
+
+    Una última línea cortada (la corrida se interrumpió mientras escribía) se ignora.
+    """
+    entries: Dict[str, object] = {}
+    try:
+        with open(journal_path, mode="r", encoding="utf-8") as handle:
+            lines = iter(handle)
+            header = json.loads(next(lines, "{}"))
+            if header.get("version") != MANIFEST_VERSION or header.get("params") != params_hash:
+                return {}
+            for line in lines:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                entries[entry["key"]] = entry["value"]
+    except (OSError, ValueError, KeyError):
+        return {}
+    return entries
+
+
+class RunJournal:
+    """Diario de una corrida: cada ``record`` agrega una línea y la baja a disco.
+
+    El archivo arranca con los parámetros de render; ``read_journal`` descarta
+    el diario si cambiaron. ``finish`` lo borra cuando la corrida terminó bien.
+    """
+
+    def __init__(self, journal_path: str, params_hash: str, entries: Dict[str, object] | None = None) -> None:
+        self.path = journal_path
+        self.handle: IO[str] = open(journal_path, mode="w", encoding="utf-8")
+        self._write({"version": MANIFEST_VERSION, "params": params_hash})
+        # Lo ya registrado en la corrida anterior sigue valiendo si se vuelve a cortar
+        for key, value in (entries or {}).items():
+            self._write({"key": key, "value": value})
+
+    def _write(self, entry: Dict[str, object]) -> None:
+        self.handle.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self.handle.flush()
+
+    def record(self, key: str, value: object) -> None:
+        self._write({"key": key, "value": value})
+
+    def close(self) -> None:
+        self.handle.close()
+
+    def finish(self) -> None:
+        self.close()
+        os.remove(self.path)
@@ -0,0 +1,269 @@
+"""Conteo de comidas MAP/PC/Balneario calculado en Python, con las reglas de ``client/src/lib``.
+
+Las páginas ``vouchers.html`` y ``vouchers-pc.html`` hacen este cálculo en el
+navegador (``processData`` en ``business.js``, ``relevantDataToForm`` en
+``render.js``) fila por fila, con un ``console.log`` por fila: con el CSV del
+hotel completo la pestaña se congela. Este módulo aplica las mismas reglas en
+una sola pasada sobre el CSV y arma un reporte JSON que las páginas cargan ya
+calculado:
+
+* ``rows``: las filas incluidas, con las mismas claves que ``processData``
+* ``vouchers``: un registro por grupo familiar, como los imprime ``render.js``
+  (representante, habitaciones, pax, días y comidas)
+* ``by_day`` / ``by_hotel`` / ``by_service``: pax y comidas por día de
+  estadía, por unidad turística y por servicio contratado
+* ``warnings``: los mismos conteos que muestra ``app.js``
+
+Las columnas se buscan por encabezado (como el resto de los scripts Python),
+así que el resultado no depende del orden de columnas del export. Los rangos
+de días se calculan una sola vez por combinación de ingreso y duración.
+"""
+from __future__ import annotations
+
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Mapping, Tuple
+
+from common.regimen_csv import iter_export_rows
+
+
+MODES = ("MAP", "PC", "BALNEARIO")
+# APP_CONFIG.mealMultiplier de client/src/app.js
+MEAL_MULTIPLIER = {"MAP": 1, "PC": 2, "BALNEARIO": 1}
+REPORT_VERSION = 1
+
+_LEADING_INT = re.compile(r"\s*([+-]?\d+)")
+
+
+def fold(value: str | None) -> str:
+    """``normalize`` de ``shouldIncludeRow``: mayúsculas y sin tildes."""
+    decomposed = unicodedata.normalize("NFD", (value or "").upper())
+    return "".join(char for char in decomposed if not "\u0300" <= char <= "\u036f")
+
+
+def js_parse_int(value: str | None) -> int | None:
+    """``parseInt(value)`` de JavaScript: el entero del comienzo, o None (``NaN``)."""
+    match = _LEADING_INT.match(value or "")
+    return int(match.group(1)) if match else None
+
+
+def should_include_row(services: str | None, mode: str) -> bool:
+    normalized = fold(services)
+    if mode == "MAP":
+        # Media Pensión: no las que solo tienen desayuno
+        if "DESAYUNO" in normalized and "MEDIA PENSION" not in normalized:
+            return False
+        return "MEDIA PENSION" in normalized
+    if mode == "PC":
+        return "PENSION COMPLETA" in normalized
+    return mode == "BALNEARIO"
+
+
+def determine_cantp(room_type: str | None, places: str | None) -> int:
+    """Personas que cubre la fila según el tipo de habitación (``determineCantp``)."""
+    room_type = (room_type or "").upper()
+    if "DBL MAT" in room_type or "DOBLE A COMPARTIR" in room_type:
+        return 2
+    if "TRIPLE A COMPARTIR" in room_type:
+        return 3
+    if "DBL IND" in room_type:
+        return 1
+    return js_parse_int(places) or 1
+
+
+def format_date(value: str) -> str:
+    """dd/mm/aaaa -> aaaa/mm/dd, igual que ``formatDate`` (partes faltantes: ``undefined``)."""
+    parts = value.split("/")
+    part = lambda index: parts[index] if index < len(parts) else "undefined"  # noqa: E731
+    return f"{part(2)}/{part(1)}/{part(0)}"
+
+
+@lru_cache(maxsize=4096)
+def parse_date(value: str) -> date | None:
+    """Fecha dd/mm/aaaa como la interpreta el navegador (``new Date('aaaa/mm/dd')``).
+
+    Igual que V8, acepta cualquier día de 1 a 31 y lo corre al mes siguiente
+    si hace falta (31/02 es el 3 de marzo); lo demás es None (``NaN``).
+    """
+    parts = [part.strip() for part in value.split("/")]
+    if len(parts) != 3 or not all(part.isdigit() for part in parts):
+        return None
+    day, month, year = (int(part) for part in parts)
+    if not (1 <= month <= 12 and 1 <= day <= 31 and 1 <= year <= 9999):
+        return None
+    return date(year, month, 1) + timedelta(days=day - 1)
+
+
+@lru_cache(maxsize=4096)
+def stay_duration(from_raw: str, to_raw: str) -> int | None:
+    """Noches entre ingreso y egreso (``calculateStayDuration``); None si una fecha es inválida."""
+    start, end = parse_date(from_raw), parse_date(to_raw)
+    if start is None or end is None:
+        return None
+    return (end - start).days
+
+
+@lru_cache(maxsize=4096)
+def stay_days(from_raw: str, days: int) -> Tuple[str, ...]:
+    """Fechas ISO de cada día de servicio: ``days`` días desde el ingreso."""
+    start = parse_date(from_raw)
+    if start is None:
+        return ()
+    return tuple((start + timedelta(days=offset)).isoformat() for offset in range(max(days, 0)))
+
+
+def _digits(value: str | None) -> str:
+    return "".join(char for char in (value or "") if char.isdigit())
+
+
+def _is_array_index(key: str) -> bool:
+    return key.isdigit() and str(int(key)) == key and int(key) < 2**32 - 1
+
+
+def _js_key_order(keys: Iterable[str]) -> List[str]:
+    """Orden de ``Object.entries``: primero las claves que son índices de array, en orden numérico."""
+    keys = list(keys)
+    return sorted((key for key in keys if _is_array_index(key)), key=int) + [
+        key for key in keys if not _is_array_index(key)
+    ]
+
+
+@dataclass
+class Tally:
+    vouchers: int = 0
+    pax: int = 0
+    meals: int = 0
+
+    def add(self, pax: int, meals: int, vouchers: int = 1) -> None:
+        self.vouchers += vouchers
+        self.pax += pax
+        self.meals += meals
+
+
+@dataclass
+class MealReport:
+    mode: str
+    rows: List[Dict[str, object]] = field(default_factory=list)
+    vouchers: List[Dict[str, object]] = field(default_factory=list)
+    by_day: Dict[str, Tally] = field(default_factory=dict)
+    by_hotel: Dict[str, Tally] = field(default_factory=dict)
+    by_service: Dict[str, Tally] = field(default_factory=dict)
+    warnings: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def total(self) -> Tally:
+        total = Tally()
+        for tally in self.by_hotel.values():
+            total.add(tally.pax, tally.meals, tally.vouchers)
+        return total
+
+    def to_dict(self) -> Dict[str, object]:
+        tallies = lambda values: {key: vars(tally) for key, tally in sorted(values.items())}  # noqa: E731
+        return {
+            "version": REPORT_VERSION,
+            "mode": self.mode,
+            "mealMultiplier": MEAL_MULTIPLIER[self.mode],
+            "total": vars(self.total),
+            "by_day": tallies(self.by_day),
+            "by_hotel": tallies(self.by_hotel),
+            "by_service": tallies(self.by_service),
+            "warnings": self.warnings,
+            "vouchers": self.vouchers,
+            "rows": self.rows,
+        }
+
+
+def relevant_row(row: Mapping[str, str | None], multiplier: int) -> Dict[str, object]:
+    """Fila incluida con las claves y valores de ``processData``."""
+    from_raw, to_raw = row.get("Fecha de ingreso") or "", row.get("Fecha de egreso") or ""
+    duration = stay_duration(from_raw, to_raw)
+    cantp = determine_cantp(row.get("Tipo habitación"), row.get("Cantidad plazas"))
+    return {
+        "id": row.get("Cód. Alojamiento") or "",
+        "passengerName": (row.get("Apellido y nombre") or "").strip().upper(),
+        "dni": row.get("Nro. doc.") or "",
+        "hotel": row.get("Descripción") or "",
+        "din": format_date(from_raw),
+        "dout": format_date(to_raw),
+        "dinRaw": from_raw,
+        "doutRaw": to_raw,
+        "roomNumber": _digits(row.get("Nro. habitación")),
+        "cantp": cantp,
+        "stayDuration": duration,
+        "voucher": row.get("Voucher") or "",
+        "mealCount": None if duration is None else cantp * duration * multiplier,
+        "tipo": row.get("Tipo habitación") or "",
+        # No está en processData; se usa para el resumen por servicio
+        "servicios": row.get("Servicios") or "",
+    }
+
+
+def voucher_summary(group: List[Dict[str, object]], multiplier: int) -> Dict[str, object]:
+    """Un voucher por grupo familiar, con los valores que imprime ``relevantDataToForm``."""
+    group = sorted(group, key=lambda item: js_parse_int(item["dni"]) or 0)
+    representative = group[0]
+    days = max((item["stayDuration"] or 1) for item in group)
+    rooms = list(dict.fromkeys(item["roomNumber"] for item in group if item["roomNumber"]))
+    return {
+        **representative,
+        "roomNumber": ", ".join(rooms) or representative["roomNumber"],
+        "stayDuration": days,
+        "cantp": len(group),
+        "mealCount": len(group) * days * multiplier,
+    }
+
+
+def build_meal_report(rows: Iterable[Mapping[str, str | None]], mode: str) -> MealReport:
+    """Reporte de comidas de ``mode`` en una sola pasada sobre las filas del CSV."""
+    if mode not in MODES:
+        raise ValueError(f"Modo desconocido: {mode} (válidos: {', '.join(MODES)})")
+    multiplier = MEAL_MULTIPLIER[mode]
+    report = MealReport(mode)
+    warnings = {"pension_completa_rows": 0, "media_pension_rows": 0, "invalid_dates": 0, "vouchers_without_days": 0}
+    groups: Dict[str, List[Dict[str, object]]] = {}
+
+    for row in rows:
+        services = fold(row.get("Servicios"))
+        warnings["pension_completa_rows"] += "PENSION COMPLETA" in services
+        warnings["media_pension_rows"] += "MEDIA PENSION" in services
+        if not should_include_row(row.get("Servicios"), mode):
+            continue
+        item = relevant_row(row, multiplier)
+        if item["stayDuration"] is None or item["stayDuration"] <= 0:
+            warnings["invalid_dates"] += 1
+        report.rows.append(item)
+        key = item["voucher"] or f"RES-{item['id'] or '{}-{}-{}'.format(item['roomNumber'], item['dinRaw'], item['doutRaw'])}"
+        groups.setdefault(key, []).append(item)
+
+    # render.js: ordena los grupos por la menor habitación (sort estable sobre Object.entries)
+    ordered = sorted(
+        _js_key_order(groups),
+        key=lambda key: min((js_parse_int(item["roomNumber"]) or 999999) for item in groups[key]),
+    )
+    for key in ordered:
+        summary = voucher_summary(groups[key], multiplier)
+        # Clave del grupo: el voucher o, si falta, la reserva (como en render.js)
+        summary["key"] = key
+        report.vouchers.append(summary)
+        pax, meals = summary["cantp"], summary["mealCount"]
+        report.by_hotel.setdefault(summary["hotel"], Tally()).add(pax, meals)
+        report.by_service.setdefault(summary["servicios"], Tally()).add(pax, meals)
+        days = stay_days(summary["dinRaw"], summary["stayDuration"])
+        if not days:
+            warnings["vouchers_without_days"] += 1
+        for day in days:
+            report.by_day.setdefault(day, Tally()).add(pax, pax * multiplier)
+
+    report.warnings = warnings
+    return report
+
+
+def iter_csv_rows(csv_path: str) -> Iterator[Dict[str, str]]:
+    return iter_export_rows(csv_path)
+
+
+def meal_report_from_csv(csv_path: str, mode: str) -> MealReport:
+    return build_meal_report(iter_csv_rows(csv_path), mode)
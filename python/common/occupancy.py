@@ -0,0 +1,184 @@
+"""Ocupación y comidas por día con un arreglo de diferencias sobre las estadías.
+
+Cada pasajero ocupa las noches de ``[Fecha de ingreso, Fecha de egreso)``. En
+lugar de recorrer cada estadía día por día, cada una suma 1 en su día de
+ingreso y resta 1 en su día de egreso; la suma acumulada de ese arreglo es la
+ocupación de cada noche y una segunda suma acumulada permite sumar cualquier
+rango (pasajero-noches, comidas) en O(1).
+
+Se arma desde las columnas de la caché del CSV (``common.csv_cache``): como las
+fechas son pocas y se repiten, se cuentan los pares (ingreso, egreso) distintos
+y cada par se convierte en fecha una sola vez, así toda la temporada se arma y
+se consulta en milisegundos. Los días de comidas siguen la misma regla que
+``common.meals``: una comida por noche en MAP y dos en PC.
+"""
+from __future__ import annotations
+
+from array import array
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Dict, List, Mapping, Tuple
+
+from common.csv_cache import CsvCache
+from common.meals import MEAL_MULTIPLIER, MODES, parse_date, should_include_row
+
+
+@dataclass
+class DayOccupancy:
+    day: date
+    arrivals: int
+    departures: int
+    pax: int
+    meals: int
+
+
+@dataclass
+class OccupancyIndex:
+    # Primer día del arreglo; los días fuera de [first_day, first_day + len) tienen ocupación 0
+    first_day: date
+    arrivals: array = field(default_factory=lambda: array("i"))
+    departures: array = field(default_factory=lambda: array("i"))
+    # Ocupación de cada noche y su suma acumulada (cumulative[i] = noches de los días < i)
+    pax: array = field(default_factory=lambda: array("i"))
+    cumulative: array = field(default_factory=lambda: array("q", [0]))
+    meals_per_night: int = 1
+    stays: int = 0
+    invalid: int = 0
+
+    @classmethod
+    def build(cls, stays: Mapping[Tuple[date, date], int], meals_per_night: int = 1) -> "OccupancyIndex":
+        """Índice desde (ingreso, egreso) -> cantidad de pasajeros.
+
+        Las estadías sin al menos una noche (egreso igual o anterior al
+        ingreso) no se suman y se cuentan en ``invalid``.
+        """
+        valid = {stay: count for stay, count in stays.items() if stay[1] > stay[0]}
+        invalid = sum(stays.values()) - sum(valid.values())
+        if not valid:
+            return cls(first_day=date.min, meals_per_night=meals_per_night, invalid=invalid)
+
+        first_day = min(start for start, _ in valid)
+        size = (max(end for _, end in valid) - first_day).days + 1
+        arrivals, departures = array("i", bytes(4 * size)), array("i", bytes(4 * size))
+        for (start, end), count in valid.items():
+            arrivals[(start - first_day).days] += count
+            departures[(end - first_day).days] += count
+
+        pax, cumulative = array("i"), array("q", [0])
+        current = 0
+        for arrived, departed in zip(arrivals, departures):
+            current += arrived - departed
+            pax.append(current)
+            cumulative.append(cumulative[-1] + current)
+        return cls(
+            first_day=first_day,
+            arrivals=arrivals,
+            departures=departures,
+            pax=pax,
+            cumulative=cumulative,
+            meals_per_night=meals_per_night,
+            stays=sum(valid.values()),
+            invalid=invalid,
+        )
+
+    @property
+    def last_day(self) -> date:
+        """Último día con movimiento (el último egreso)."""
+        return self.first_day + timedelta(days=max(len(self.pax) - 1, 0))
+
+    def _offset(self, day: date) -> int:
+        return min(max((day - self.first_day).days, 0), len(self.pax))
+
+    def occupancy(self, day: date) -> int:
+        """Pasajeros que pasan la noche de ``day`` (ingresaron ese día o antes y egresan después)."""
+        offset = (day - self.first_day).days
+        return self.pax[offset] if 0 <= offset < len(self.pax) else 0
+
+    def nights(self, start: date, end: date) -> int:
+        """Pasajero-noches de los días ``[start, end)``."""
+        if end <= start:
+            return 0
+        return self.cumulative[self._offset(end)] - self.cumulative[self._offset(start)]
+
+    def meals(self, start: date, end: date) -> int:
+        return self.nights(start, end) * self.meals_per_night
+
+    def peak(self, start: date | None = None, end: date | None = None) -> Tuple[date, int]:
+        """Día de mayor ocupación en ``[start, end)`` (el primero si hay empate)."""
+        low = self._offset(start) if start else 0
+        high = self._offset(end) if end else len(self.pax)
+        if high <= low:
+            return start or self.first_day, 0
+        window = self.pax[low:high]
+        best = max(range(len(window)), key=window.__getitem__)
+        return self.first_day + timedelta(days=low + best), window[best]
+
+    def days(self, start: date | None = None, end: date | None = None) -> List[DayOccupancy]:
+        """Detalle por día de ``[start, end)``; por defecto, toda la temporada."""
+        if not self.pax and (start is None or end is None):
+            return []
+        start = start or self.first_day
+        end = end or self.last_day + timedelta(days=1)
+        result = []
+        for offset in range((end - start).days):
+            day = start + timedelta(days=offset)
+            index = (day - self.first_day).days
+            inside = 0 <= index < len(self.pax)
+            pax = self.pax[index] if inside else 0
+            result.append(
+                DayOccupancy(
+                    day=day,
+                    arrivals=self.arrivals[index] if inside else 0,
+                    departures=self.departures[index] if inside else 0,
+                    pax=pax,
+                    meals=pax * self.meals_per_night,
+                )
+            )
+        return result
+
+
+def cached_stays(
+    cache: CsvCache, mode: str | None = None, hotel: str | None = None
+) -> Dict[Tuple[date | None, date | None], int]:
+    """(ingreso, egreso) -> pasajeros, contado sobre las columnas de la caché.
+
+    ``mode`` (MAP/PC/BALNEARIO) filtra por servicio con las reglas de
+    ``common.meals``; ``hotel``, por la columna Descripción. Las fechas
+    inválidas quedan como ``None``.
+    """
+    if mode is not None and mode not in MODES:
+        raise ValueError(f"Modo desconocido: {mode} (válidos: {', '.join(MODES)})")
+    string = cache.string
+    columns = [cache.column("from_date"), cache.column("to_date")]
+    predicates = []
+    if mode is not None:
+        columns.append(cache.column("services"))
+        predicates.append(lambda value: should_include_row(value, mode))
+    if hotel is not None:
+        columns.append(cache.column("hotel"))
+        predicates.append(lambda value: value == hotel)
+
+    # Filtros y fechas se evalúan una vez por string distinto, no por fila
+    accepted: Dict[Tuple[int, int], bool] = {}
+    stays: Counter = Counter()
+    for (from_id, to_id, *filter_ids), count in Counter(zip(*columns)).items():
+        keep = True
+        for position, (predicate, value_id) in enumerate(zip(predicates, filter_ids)):
+            if (position, value_id) not in accepted:
+                accepted[(position, value_id)] = predicate(string(value_id))
+            keep = keep and accepted[(position, value_id)]
+        if keep:
+            stays[(parse_date(string(from_id)), parse_date(string(to_id)))] += count
+    return stays
+
+
+def occupancy_from_cache(cache: CsvCache, mode: str | None = None, hotel: str | None = None) -> OccupancyIndex:
+    """Índice de ocupación de todo el CSV (o de un servicio/unidad turística)."""
+    stays = cached_stays(cache, mode, hotel)
+    index = OccupancyIndex.build(
+        {stay: count for stay, count in stays.items() if None not in stay},
+        MEAL_MULTIPLIER[mode] if mode else 1,
+    )
+    index.invalid += sum(count for stay, count in stays.items() if None in stay)
+    return index
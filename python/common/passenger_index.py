@@ -0,0 +1,227 @@
+"""Índice persistente de pasajeros para buscar por voucher, DNI o apellido.
+
+Se arma una sola vez desde el CSV de regimen y se guarda junto a él como
+``<csv>.index.json``. Mientras el CSV no cambie (mismo tamaño y fecha de
+modificación) las corridas siguientes cargan el índice en lugar de releer y
+agrupar todo el CSV, y cada búsqueda es un acceso a diccionario o una
+búsqueda binaria:
+
+* voucher exacto -> filas del grupo
+* DNI (solo dígitos, ``20.123.456`` == ``20123456``) -> filas
+* prefijo del apellido y nombre, sin tildes ni mayúsculas (``munoz`` encuentra
+  ``MUÑOZ``), sobre una lista ordenada con ``bisect``
+
+El índice no copia los datos: guarda la posición en bytes de cada fila del
+CSV y solo se leen (y se convierten a ``Passenger``) las filas encontradas.
+Las filas pasan por ``common.regimen_csv`` (codificación, separador,
+observaciones con comas, formato viejo), igual que en el resto de los lectores.
+"""
+from __future__ import annotations
+
+import json
+import os
+import unicodedata
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Tuple
+
+from common.records import Passenger, VoucherGroup, normalize
+from common.regimen_csv import ExportFormat, detect_format, iter_text_fields
+
+
+INDEX_VERSION = 2
+DEFAULT_LIMIT = 20
+
+
+def fold(value: str | None) -> str:
+    """Texto comparable: sin tildes, en mayúsculas y con espacios simples."""
+    decomposed = unicodedata.normalize("NFKD", normalize(value))
+    return " ".join("".join(char for char in decomposed if not unicodedata.combining(char)).upper().split())
+
+
+def document_key(value: str | None) -> str:
+    digits = "".join(char for char in normalize(value) if char.isdigit())
+    return digits or normalize(value).upper()
+
+
+def index_path_for(csv_path: str) -> str:
+    return f"{csv_path}.index.json"
+
+
+@dataclass
+class PassengerIndex:
+    csv_path: str
+    header: List[str] = field(default_factory=list)
+    # Posición en bytes del comienzo de cada fila de datos del CSV
+    offsets: List[int] = field(default_factory=list)
+    vouchers: Dict[str, List[int]] = field(default_factory=dict)
+    documents: Dict[str, List[int]] = field(default_factory=dict)
+    # Nombres plegados ordenados y, en paralelo, la fila de cada uno (para bisect)
+    names: List[str] = field(default_factory=list)
+    name_rows: List[int] = field(default_factory=list)
+
+    @classmethod
+    def build(cls, csv_path: str) -> "PassengerIndex":
+        export_format = detect_format(csv_path)
+        index = cls(csv_path, header=list(export_format.columns))
+        names = []
+        for offset, row in _iter_records(csv_path, export_format):
+            values = dict(zip(index.header, row))
+            voucher = normalize(values.get("Voucher"))
+            if not voucher:
+                continue
+            position = len(index.offsets)
+            index.offsets.append(offset)
+            index.vouchers.setdefault(voucher, []).append(position)
+            document = values.get("Nro. doc.")
+            if normalize(document):
+                index.documents.setdefault(document_key(document), []).append(position)
+            names.append((fold(values.get("Apellido y nombre")), position))
+        names.sort()
+        index.names = [name for name, _ in names]
+        index.name_rows = [position for _, position in names]
+        return index
+
+    def passengers(self, positions: Iterable[int]) -> List[Passenger]:
+        """Lee del CSV solo las filas indicadas."""
+        positions = list(positions)
+        if not positions:
+            return []
+        export_format = detect_format(self.csv_path)
+        passengers = []
+        with open(self.csv_path, mode="rb") as handle:
+            for position in positions:
+                handle.seek(self.offsets[position])
+                record = _read_record(handle).decode(export_format.encoding)
+                for row in iter_text_fields([record], export_format):
+                    passengers.append(Passenger.from_row(dict(zip(self.header, row))))
+        return passengers
+
+    def group(self, voucher: str) -> VoucherGroup | None:
+        positions = self.vouchers.get(normalize(voucher))
+        if positions is None:
+            return None
+        return VoucherGroup(normalize(voucher), self.passengers(positions))
+
+    def by_document(self, document: str) -> List[Passenger]:
+        return self.passengers(self.documents.get(document_key(document), []))
+
+    def name_prefix_rows(self, prefix: str, limit: int = DEFAULT_LIMIT) -> List[int]:
+        """Filas cuyo apellido y nombre empieza con ``prefix``, en orden alfabético."""
+        folded = fold(prefix)
+        if not folded:
+            return []
+        start = bisect_left(self.names, folded)
+        end = start
+        while end < len(self.names) and end - start < limit and self.names[end].startswith(folded):
+            end += 1
+        return self.name_rows[start:end]
+
+    def by_name_prefix(self, prefix: str, limit: int = DEFAULT_LIMIT) -> List[Passenger]:
+        return self.passengers(self.name_prefix_rows(prefix, limit))
+
+    def find(self, query: str, limit: int = DEFAULT_LIMIT) -> List[str]:
+        """Vouchers que corresponden a ``query``: número de voucher, DNI o prefijo de apellido.
+
+        Un número se busca primero como voucher y después como DNI; cualquier
+        otro texto, como prefijo del apellido y nombre.
+        """
+        query = normalize(query)
+        if query in self.vouchers:
+            return [query]
+        if any(char.isdigit() for char in query) and not any(char.isalpha() for char in query):
+            passengers = self.by_document(query)
+        else:
+            passengers = self.by_name_prefix(query, limit)
+        return list(dict.fromkeys(passenger.voucher for passenger in passengers))[:limit]
+
+
+def _read_record(handle: BinaryIO) -> bytes:
+    """Lee una fila completa del CSV; un campo entre comillas puede ocupar varias líneas."""
+    record = handle.readline()
+    while record.count(b'"') % 2:
+        line = handle.readline()
+        if not line:
+            break
+        record += line
+    return record
+
+
+def _iter_records(csv_path: str, export_format: ExportFormat) -> Iterator[Tuple[int, List[str]]]:
+    """(posición en bytes, campos reparados) de cada fila de datos del CSV."""
+    offset = 0
+
+    def records(handle: BinaryIO) -> Iterator[str]:
+        # Cada fila entra entera al lector: iter_text_fields la lee antes de pedir la siguiente
+        nonlocal offset
+        while True:
+            position = handle.tell()
+            record = _read_record(handle)
+            if not record:
+                return
+            if record.strip():
+                offset = position
+                yield record.decode(export_format.encoding)
+
+    with open(csv_path, mode="rb") as handle:
+        # El encabezado (con BOM, si lo hay) ya lo leyó detect_format
+        _read_record(handle)
+        for row in iter_text_fields(records(handle), export_format):
+            yield offset, row
+
+
+def _source_stamp(csv_path: str) -> Dict[str, int]:
+    stat = os.stat(csv_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def read_index(csv_path: str) -> PassengerIndex | None:
+    """Índice guardado de ``csv_path``, o None si no existe o el CSV cambió."""
+    try:
+        with open(index_path_for(csv_path), mode="r", encoding="utf-8") as handle:
+            data = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    if data.get("version") != INDEX_VERSION or data.get("source") != _source_stamp(csv_path):
+        return None
+    return PassengerIndex(
+        csv_path=csv_path,
+        header=data["header"],
+        offsets=data["offsets"],
+        vouchers=data["vouchers"],
+        documents=data["documents"],
+        names=data["names"],
+        name_rows=data["name_rows"],
+    )
+
+
+def write_index(index: PassengerIndex) -> None:
+    index_path = index_path_for(index.csv_path)
+    tmp_path = f"{index_path}.tmp"
+    data = {
+        "version": INDEX_VERSION,
+        "source": _source_stamp(index.csv_path),
+        "header": index.header,
+        "offsets": index.offsets,
+        "vouchers": index.vouchers,
+        "documents": index.documents,
+        "names": index.names,
+        "name_rows": index.name_rows,
+    }
+    with open(tmp_path, mode="w", encoding="utf-8") as handle:
+        json.dump(data, handle, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, index_path)
+
+
+def load_index(csv_path: str) -> PassengerIndex:
+    """Carga el índice de ``csv_path`` o lo arma (y lo guarda) si falta o quedó viejo."""
+    index = read_index(csv_path)
+    if index is not None:
+        return index
+    index = PassengerIndex.build(csv_path)
+    try:
+        write_index(index)
+    except OSError:
+        # Sin permiso de escritura junto al CSV: el índice sirve igual para esta corrida
+        pass
+    return index
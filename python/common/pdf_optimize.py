@@ -0,0 +1,122 @@
+"""Pasada de optimización sobre un ``PdfWriter`` antes de escribirlo.
+
+Las salidas ya comparten la plantilla como Form XObject (``common.pdf_stamp``),
+pero quedan repeticiones que pesan en lotes grandes:
+
+* los PDFs parciales de ``--workers`` traen cada uno su copia de la plantilla,
+  las fuentes y el logo, que se repiten al unirlos
+* cada página lleva su propio diccionario ``/Resources``, idéntico en todas
+* las plantillas exportadas desde editores traen recursos que el contenido no
+  usa (p. ej. los ``/Para`` del editor de fichaPax.pdf, o ``/ProcSet``)
+* algunos streams chicos se escriben sin comprimir
+
+``optimize_writer`` poda los recursos de los Form XObjects a los nombres que
+su contenido usa, comprime los streams sin filtro, comparte los
+``/Resources`` iguales entre páginas y unifica los objetos idénticos. Nada de
+esto cambia cómo se ve o se imprime la página.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Set
+
+from pypdf.generic import DictionaryObject, IndirectObject, NameObject, StreamObject
+
+if TYPE_CHECKING:
+    from pypdf import PdfWriter
+
+
+# Categorías de recursos que puede usar un content stream (ISO 32000, 7.8.3);
+# /ProcSet es obsoleta y las demás (p. ej. /Para) no las lee ningún visor
+RESOURCE_CATEGORIES = ("/ExtGState", "/ColorSpace", "/Pattern", "/Shading", "/XObject", "/Font", "/Properties")
+# Por debajo de esto, comprimir un stream no ahorra nada (encabezado zlib + /Filter)
+MIN_COMPRESS_BYTES = 64
+
+_NAME = re.compile(rb"/([^\s/\[\]<>(){}%]*)")
+_ESCAPE = re.compile(rb"#([0-9A-Fa-f]{2})")
+
+
+@dataclass
+class OptimizeStats:
+    pruned_resources: int = 0
+    compressed_streams: int = 0
+    shared_resources: int = 0
+    removed_objects: int = 0
+
+
+def content_names(data: bytes) -> Set[str]:
+    """Nombres (``/F1``, ``/Im16``...) que aparecen en un content stream, con los ``#xx`` resueltos."""
+    return {
+        "/" + _ESCAPE.sub(lambda match: bytes([int(match.group(1), 16)]), name).decode("latin-1")
+        for name in _NAME.findall(data)
+    }
+
+
+def prune_form_resources(form: StreamObject) -> int:
+    """Deja en ``/Resources`` del form solo las categorías y los nombres que usa su contenido.
+
+    Arma un diccionario nuevo en lugar de modificar el existente, que puede
+    estar compartido con otros objetos. Devuelve cuántas entradas se quitaron.
+    """
+    resources = form.get("/Resources")
+    if resources is None:
+        return 0
+    resources = resources.get_object()
+    used = content_names(form.get_data())
+    pruned = DictionaryObject()
+    removed = 0
+    for category, entries in resources.items():
+        entries = entries.get_object()
+        if category not in RESOURCE_CATEGORIES or not isinstance(entries, DictionaryObject):
+            removed += len(entries) if isinstance(entries, DictionaryObject) else 1
+            continue
+        kept = DictionaryObject({NameObject(name): value for name, value in entries.items() if name in used})
+        removed += len(entries) - len(kept)
+        if kept:
+            pruned[NameObject(category)] = kept
+    if removed:
+        form[NameObject("/Resources")] = pruned
+    return removed
+
+
+def optimize_writer(writer: PdfWriter) -> OptimizeStats:
+    """Optimiza el contenido de ``writer`` en el lugar; llamar justo antes de ``write``."""
+    stats = OptimizeStats()
+    objects = writer._objects
+    for index, obj in enumerate(objects):
+        if not isinstance(obj, StreamObject):
+            continue
+        if obj.get("/Subtype") == "/Form":
+            stats.pruned_resources += prune_form_resources(obj)
+        if "/Filter" not in obj and len(obj.get_data()) >= MIN_COMPRESS_BYTES:
+            encoded = obj.flate_encode()
+            encoded.indirect_reference = obj.indirect_reference
+            objects[index] = encoded
+            stats.compressed_streams += 1
+
+    # Un solo /Resources por combinación distinta (en la práctica, uno para todo el PDF)
+    shared: Dict[int, IndirectObject] = {}
+    for page in writer.pages:
+        resources = page.get("/Resources")
+        if resources is None or isinstance(resources, IndirectObject):
+            continue
+        key = resources.hash_value()
+        if key not in shared:
+            shared[key] = writer._add_object(resources)
+        else:
+            stats.shared_resources += 1
+        page[NameObject("/Resources")] = shared[key]
+
+    # Unificar dos fuentes iguales vuelve iguales a los forms que las usan: se repite hasta que no cambie nada.
+    # Los huérfanos se quitan aparte: en la misma llamada, pypdf marca como usada la referencia
+    # reemplazada y no la que queda, y borraría la copia que sobrevive si solo se llega a ella
+    # por referencias reemplazadas (p. ej. páginas reutilizadas de una corrida anterior)
+    for duplicates in (True, False):
+        removed = -1
+        while removed:
+            before = objects.count(None)
+            writer.compress_identical_objects(remove_duplicates=duplicates, remove_unreferenced=not duplicates)
+            removed = objects.count(None) - before
+            stats.removed_objects += removed
+    return stats
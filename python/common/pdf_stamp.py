@@ -0,0 +1,291 @@
+"""Plantillas PDF reutilizables como Form XObject.
+
+La página de plantilla se parsea una sola vez y cada página de salida la dibuja
+con ``Do`` debajo del overlay de datos, en lugar de copiar (o volver a leer) el
+árbol completo de la plantilla por página.
+
+Para las salidas de una sola página (una ficha por archivo),
+``SinglePageFile`` serializa una vez el PDF completo y por archivo solo cambia
+el content stream del overlay.
+"""
+from __future__ import annotations
+
+import io
+import re
+import zlib
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Mapping, Tuple
+
+from pypdf import PageObject, PdfReader, PdfWriter
+from pypdf.generic import (
+    ArrayObject,
+    DecodedStreamObject,
+    DictionaryObject,
+    IndirectObject,
+    NameObject,
+    RectangleObject,
+    StreamObject,
+)
+
+from common.pdf_text import attach_standard_fonts
+
+
+TEMPLATE_FORM_NAME = "/Plantilla"
+
+
+@dataclass
+class TemplateForm:
+    form: StreamObject
+    mediabox: RectangleObject
+
+
+@dataclass
+class TemplateStamp:
+    form: IndirectObject
+    prefix: IndirectObject
+    mediabox: RectangleObject
+    # Fuentes estándar de los overlays ya registradas en el writer (ver _share_simple_fonts)
+    fonts: Dict[Tuple[Tuple[str, str], ...], IndirectObject] = field(default_factory=dict)
+
+
+def load_template_form(template_page: PageObject) -> TemplateForm:
+    """Convierte la página de plantilla en un Form XObject todavía sin writer."""
+    mediabox = template_page.mediabox
+    form = DecodedStreamObject()
+    form.set_data(template_page.get_contents().get_data())
+    form[NameObject("/Type")] = NameObject("/XObject")
+    form[NameObject("/Subtype")] = NameObject("/Form")
+    form[NameObject("/BBox")] = ArrayObject(mediabox)
+    form[NameObject("/Resources")] = template_page["/Resources"]
+    return TemplateForm(form=form.flate_encode(), mediabox=mediabox)
+
+
+def load_template_form_from_file(template_pdf_path: str) -> TemplateForm:
+    reader = PdfReader(template_pdf_path)
+    if not reader.pages:
+        raise ValueError(f"La plantilla PDF no tiene páginas: {template_pdf_path}")
+    return load_template_form(reader.pages[0])
+
+
+def attach_template_form(writer: PdfWriter, template: TemplateForm) -> TemplateStamp:
+    """Registra la plantilla una sola vez en el writer; sus recursos quedan compartidos."""
+    prefix = DecodedStreamObject()
+    prefix.set_data(f"q {TEMPLATE_FORM_NAME} Do Q\n".encode("ascii"))
+
+    return TemplateStamp(
+        form=writer._add_object(template.form.clone(writer)),
+        prefix=writer._add_object(prefix),
+        mediabox=template.mediabox,
+    )
+
+
+def attach_form(writer: PdfWriter, form: TemplateForm) -> IndirectObject:
+    """Registra un Form XObject (p. ej. el logo) una sola vez en el writer."""
+    return writer._add_object(form.form.clone(writer))
+
+
+def form_placements(name: str, origins: Iterable[Tuple[float, float]]) -> bytes:
+    """Operadores que dibujan el form ``name`` con su esquina inferior izquierda en cada origen."""
+    return b"".join(f"q 1 0 0 1 {x:.4f} {y:.4f} cm {name} Do Q\n".encode("ascii") for x, y in origins)
+
+
+def _share_simple_fonts(writer: PdfWriter, stamp: TemplateStamp, overlay_page: PageObject) -> None:
+    """Reemplaza las fuentes del overlay por una única copia por writer.
+
+    Cada canvas de reportlab declara de nuevo sus fuentes estándar (Helvetica,
+    Helvetica-Bold...), así que sin esto el PDF combinado lleva un juego de
+    diccionarios de fuente por página. Solo se comparten las fuentes sin
+    objetos anidados (las estándar); una fuente incrustada queda como está.
+    """
+    resources = overlay_page.get("/Resources")
+    fonts = resources.get_object().get("/Font") if resources is not None else None
+    if fonts is None:
+        return
+
+    shared = DictionaryObject()
+    for name, font_ref in fonts.get_object().items():
+        font = font_ref.get_object()
+        if not all(isinstance(value, NameObject) for value in font.values()):
+            shared[NameObject(name)] = font_ref
+            continue
+        key = tuple(sorted((str(entry), str(value)) for entry, value in font.items() if entry != "/Name"))
+        if key not in stamp.fonts:
+            stamp.fonts[key] = writer._add_object(font.clone(writer))
+        shared[NameObject(name)] = stamp.fonts[key]
+    resources.get_object()[NameObject("/Font")] = shared
+
+
+def stamp_overlay_page(
+    writer: PdfWriter,
+    stamp: TemplateStamp,
+    overlay_page: PageObject,
+    forms: Dict[str, IndirectObject] | None = None,
+    placements: bytes = b"",
+) -> PageObject:
+    """Agrega la página de overlay al writer con la plantilla dibujada debajo.
+
+    ``forms`` son XObjects compartidos ya registrados con ``attach_form`` y
+    ``placements`` el contenido que los dibuja (ver ``form_placements``); se
+    ubican entre la plantilla y el overlay.
+    """
+    _share_simple_fonts(writer, stamp, overlay_page)
+    page = writer.add_page(overlay_page)
+    page[NameObject("/MediaBox")] = stamp.mediabox
+
+    resources = page["/Resources"].get_object()
+    xobjects = resources.get("/XObject")
+    if xobjects is None:
+        xobjects = resources[NameObject("/XObject")] = DictionaryObject()
+    xobjects = xobjects.get_object()
+    xobjects[NameObject(TEMPLATE_FORM_NAME)] = stamp.form
+    for name, form in (forms or {}).items():
+        xobjects[NameObject(name)] = form
+
+    contents = page["/Contents"].get_object()
+    overlay_streams = list(contents) if isinstance(contents, ArrayObject) else [contents]
+    if placements:
+        placements_stream = DecodedStreamObject()
+        placements_stream.set_data(placements)
+        overlay_streams.insert(0, placements_stream)
+    page[NameObject("/Contents")] = ArrayObject(
+        [stamp.prefix]
+        + [
+            stream if isinstance(stream, IndirectObject) else writer._add_object(stream)
+            for stream in overlay_streams
+        ]
+    )
+    return page
+
+
+def stamp_content_page(
+    writer: PdfWriter,
+    stamp: TemplateStamp,
+    content: bytes,
+    fonts: Dict[str, IndirectObject],
+    forms: Dict[str, IndirectObject] | None = None,
+) -> PageObject:
+    """Agrega una página nueva con la plantilla debajo y ``content`` como overlay.
+
+    A diferencia de ``stamp_overlay_page`` no hay una página de overlay que
+    copiar: ``content`` ya son los operadores PDF (ver ``common.pdf_text``) y
+    ``fonts``/``forms`` los recursos compartidos que referencia.
+    """
+    page = writer.add_blank_page(stamp.mediabox.width, stamp.mediabox.height)
+    page[NameObject("/MediaBox")] = stamp.mediabox
+
+    xobjects = DictionaryObject({NameObject(TEMPLATE_FORM_NAME): stamp.form})
+    for name, form in (forms or {}).items():
+        xobjects[NameObject(name)] = form
+    page[NameObject("/Resources")] = DictionaryObject(
+        {
+            NameObject("/Font"): DictionaryObject({NameObject(name): font for name, font in fonts.items()}),
+            NameObject("/XObject"): xobjects,
+        }
+    )
+
+    stream = DecodedStreamObject()
+    stream.set_data(content)
+    page[NameObject("/Contents")] = ArrayObject([stamp.prefix, writer._add_object(stream.flate_encode())])
+    return page
+
+
+def copy_stamped_page(
+    writer: PdfWriter,
+    stamp: TemplateStamp,
+    page: PageObject,
+    forms: Dict[str, IndirectObject] | None = None,
+) -> PageObject:
+    """Copia una página ya estampada (p. ej. de una corrida anterior) al writer.
+
+    Solo se clonan el overlay y sus recursos: la plantilla y los ``forms``
+    compartidos se reemplazan por los que ya están registrados en el writer,
+    así no quedan duplicados en la salida.
+    """
+    new_page = writer.add_page(page, excluded_keys=("/Resources", "/Contents"))
+    shared = {TEMPLATE_FORM_NAME: stamp.form, **(forms or {})}
+
+    resources = DictionaryObject()
+    for key, value in page["/Resources"].get_object().items():
+        if key == "/XObject":
+            xobjects = DictionaryObject(
+                {name: obj.clone(writer) for name, obj in value.get_object().items() if name not in shared}
+            )
+            for name, form in shared.items():
+                xobjects[NameObject(name)] = form
+            resources[NameObject(key)] = xobjects
+        else:
+            resources[NameObject(key)] = value.clone(writer)
+    new_page[NameObject("/Resources")] = resources
+
+    # El primer stream es el prefijo que dibuja la plantilla (ver stamp_overlay_page)
+    overlay_streams = list(page["/Contents"].get_object())[1:]
+    new_page[NameObject("/Contents")] = ArrayObject([stamp.prefix] + [stream.clone(writer) for stream in overlay_streams])
+    return new_page
+
+
+_STARTXREF = re.compile(rb"startxref\s+(\d+)\s+%%EOF\s*$")
+
+
+@dataclass
+class SinglePageFile:
+    """PDF de una página ya serializado, salvo el content stream del overlay.
+
+    ``prefix`` son todos los objetos (plantilla, fuentes, página) y ``xref`` la
+    tabla y el trailer; el content stream es el último objeto, así su posición
+    es siempre ``len(prefix)`` y la tabla no cambia con el contenido. Depende
+    de cómo serializa pypdf (versión fijada en la documentación del overlay);
+    ``test/test_pdf_stamp.py`` valida la salida en modo estricto.
+    """
+
+    prefix: bytes
+    content_object: int
+    xref: bytes
+
+    def render(self, content: bytes) -> bytes:
+        data = zlib.compress(content)
+        stream = b"".join(
+            [
+                b"%d 0 obj\n<<\n/Filter /FlateDecode\n/Length %d\n>>\nstream\n" % (self.content_object, len(data)),
+                data,
+                b"\nendstream\nendobj\n",
+            ]
+        )
+        startxref = len(self.prefix) + len(stream)
+        return b"".join([self.prefix, stream, self.xref, b"startxref\n%d\n%%%%EOF\n" % startxref])
+
+
+def build_single_page_file(
+    template: TemplateForm, font_names: Mapping[str, str], optimize: bool = True
+) -> SinglePageFile:
+    """Arma con pypdf el PDF de una página (plantilla + fuentes estándar) y lo parte para ``SinglePageFile``.
+
+    Con ``optimize`` el PDF base pasa una vez por ``common.pdf_optimize`` y
+    todas las salidas salen optimizadas.
+    """
+    writer = PdfWriter()
+    stamp = attach_template_form(writer, template)
+    fonts = attach_standard_fonts(writer, font_names)
+    page = stamp_content_page(writer, stamp, b"", fonts)
+    if optimize:
+        from common.pdf_optimize import optimize_writer
+
+        optimize_writer(writer)
+        # La pasada puede agregar objetos: el content stream del overlay vuelve a quedar último
+        contents = page["/Contents"]
+        writer._objects[contents[-1].idnum - 1] = None
+        contents[-1] = writer._add_object(DecodedStreamObject())
+    content_object = len(writer._objects)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    data = buffer.getvalue()
+
+    match = _STARTXREF.search(data)
+    xref_offset = int(match.group(1)) if match else -1
+    header = b"%d 0 obj\n" % content_object
+    start = data.rfind(b"\n" + header, 0, max(xref_offset, 0)) + 1
+    # Se necesita una tabla xref clásica con el content stream justo antes
+    if not data.startswith(b"xref\n", xref_offset) or start <= 0 or not data[:xref_offset].endswith(b"endobj\n"):
+        raise ValueError("No se pudo armar el PDF base de una página (xref inesperada)")
+    if data[start:xref_offset].count(b" 0 obj\n") != 1:
+        raise ValueError("No se pudo armar el PDF base de una página (el overlay no es el último objeto)")
+    return SinglePageFile(prefix=data[:start], content_object=content_object, xref=data[xref_offset : match.start()])
@@ -0,0 +1,183 @@
+"""Overlay de texto escrito directo como content stream PDF, sin reportlab.
+
+El motor ``reportlab`` arma un ``Canvas`` por página, lo serializa y lo vuelve
+a parsear con pypdf solo para ubicar una decena de textos. El motor ``direct``
+recorre el mismo plan de ``CompiledLayout`` y escribe los operadores
+``BT``/``Tf``/``Td``/``Tj`` en un stream que se agrega a la página de salida.
+Usa las fuentes estándar (Helvetica, Times, Courier...) con
+``WinAnsiEncoding``, igual que reportlab, así los nombres con tildes y eñes
+se ven idénticos y en la misma posición.
+
+La diferencia está en los caracteres que no entran en cp1252 (``Ş``, ``Ğ``,
+cirílico...): reportlab cambia a una fuente de sustitución y dibuja un
+cuadrado negro por cada uno, el motor ``direct`` escribe ``?``. Ninguno de los
+dos imprime la letra original.
+"""
+from __future__ import annotations
+
+import io
+from typing import TYPE_CHECKING, Dict, Iterable, List, Mapping, Tuple
+
+from common.layout import CompiledLayout
+
+if TYPE_CHECKING:
+    from pypdf import PdfWriter
+    from pypdf.generic import IndirectObject
+
+
+ENGINES = ("reportlab", "direct")
+
+STANDARD_FONTS = frozenset(
+    {
+        "Courier",
+        "Courier-Bold",
+        "Courier-BoldOblique",
+        "Courier-Oblique",
+        "Helvetica",
+        "Helvetica-Bold",
+        "Helvetica-BoldOblique",
+        "Helvetica-Oblique",
+        "Symbol",
+        "Times-Bold",
+        "Times-BoldItalic",
+        "Times-Italic",
+        "Times-Roman",
+        "ZapfDingbats",
+    }
+)
+
+# Symbol y ZapfDingbats tienen su propia codificación interna
+_SYMBOLIC_FONTS = frozenset({"Symbol", "ZapfDingbats"})
+
+
+def font_resource_names(layout: CompiledLayout) -> Dict[str, str]:
+    """Nombre de recurso (``/F1``, ``/F2``...) para cada fuente que usa el layout."""
+    names: Dict[str, str] = {}
+    for run in layout.runs:
+        if run.font not in STANDARD_FONTS:
+            raise ValueError(f"El motor direct solo admite fuentes estándar; el layout usa {run.font}")
+        if run.font not in names:
+            names[run.font] = f"/F{len(names) + 1}"
+    return names
+
+
+def attach_standard_fonts(writer: PdfWriter, font_names: Mapping[str, str]) -> Dict[str, IndirectObject]:
+    """Registra una sola vez en el writer los diccionarios de fuente; devuelve recurso -> objeto."""
+    from pypdf.generic import DictionaryObject, NameObject
+
+    fonts: Dict[str, IndirectObject] = {}
+    for font, resource_name in font_names.items():
+        font_dict = DictionaryObject(
+            {
+                NameObject("/Type"): NameObject("/Font"),
+                NameObject("/Subtype"): NameObject("/Type1"),
+                NameObject("/BaseFont"): NameObject(f"/{font}"),
+            }
+        )
+        if font not in _SYMBOLIC_FONTS:
+            font_dict[NameObject("/Encoding")] = NameObject("/WinAnsiEncoding")
+        fonts[resource_name] = writer._add_object(font_dict)
+    return fonts
+
+
+def encode_text(value: str) -> bytes:
+    """Texto como string literal PDF en WinAnsi (cp1252); lo que no entra queda como '?'."""
+    raw = value.encode("cp1252", errors="replace")
+    return b"(" + raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def _num(value: float) -> str:
+    text = f"{value:.4f}".rstrip("0").rstrip(".")
+    return "0" if text in ("", "-0") else text
+
+
+def layout_content(
+    layout: CompiledLayout,
+    slots: Iterable[Tuple[Mapping[str, str], Tuple[float, float]]],
+    font_names: Mapping[str, str],
+) -> bytes:
+    """Content stream con los valores de cada slot; un bloque BT/ET por fuente.
+
+    Equivale a ``CompiledLayout.draw`` sobre un canvas de reportlab.
+    """
+    slots = list(slots)
+    parts: List[bytes] = []
+    for run in layout.runs:
+        line_x = line_y = 0.0
+        opened = False
+        for values, (origin_x, origin_y) in slots:
+            for op in run.ops:
+                value = values.get(op.key)
+                if not value:
+                    continue
+                if not opened:
+                    parts.append(f"BT {font_names[run.font]} {_num(run.size)} Tf\n".encode("ascii"))
+                    opened = True
+                x, y = round(origin_x + op.x, 4), round(origin_y + op.y, 4)
+                # Td es relativo al comienzo de la línea anterior dentro del mismo BT
+                parts.append(f"{_num(x - line_x)} {_num(y - line_y)} Td ".encode("ascii"))
+                parts.append(encode_text(value) + b" Tj\n")
+                line_x, line_y = x, y
+        if opened:
+            parts.append(b"ET\n")
+    return b"".join(parts)
+
+
+def engine_font_names(layout: CompiledLayout, engine: str) -> Dict[str, str]:
+    """Nombre de recurso de cada fuente del layout tal como la usa el content stream de ``engine``.
+
+    reportlab reserva ``/F1`` para Helvetica y numera las demás en orden de
+    uso; ``engine_content`` las registra en el orden del layout. Los caracteres
+    que no están en cp1252 (p. ej. ``Ş``, ``Ğ``) reportlab los dibuja con las
+    fuentes de sustitución (Symbol, ZapfDingbats), así que también se registran.
+    """
+    font_names = font_resource_names(layout)
+    if engine == "direct":
+        return font_names
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfgen import canvas
+
+    doc = canvas.Canvas(io.BytesIO())._doc
+    names = {font: doc.getInternalFontName(font) for font in font_names}
+    for font in font_names:
+        for substitute in pdfmetrics.getFont(font).substitutionFonts:
+            names.setdefault(substitute.fontName, doc.getInternalFontName(substitute.fontName))
+    return names
+
+
+def engine_content(
+    layout: CompiledLayout,
+    slots: Iterable[Tuple[Mapping[str, str], Tuple[float, float]]],
+    font_names: Mapping[str, str],
+    engine: str,
+) -> bytes:
+    """Content stream del layout con ``engine``, con las fuentes de ``engine_font_names``.
+
+    Con reportlab se dibuja en un ``Canvas`` y se toma solo el contenido de la
+    página, sin serializar ni volver a parsear un PDF.
+    """
+    if engine == "direct":
+        return layout_content(layout, slots, font_names)
+    from reportlab.pdfgen import canvas
+
+    c = canvas.Canvas(io.BytesIO(), pagesize=layout.page_size)
+    reserved = set(c._doc.fontMapping)
+    for font in font_names:
+        c._doc.getInternalFontName(font)
+    layout.draw(c, list(slots))
+    # Una fuente que no está en font_names no queda en /Resources de la página: el PDF saldría roto
+    unregistered = set(c._doc.fontMapping) - set(font_names) - reserved
+    if unregistered:
+        raise ValueError(f"El overlay usa fuentes no registradas: {', '.join(sorted(unregistered))}")
+    return c.getCurrentPageContent().encode("latin-1")
+
+
+def placed_content(fragments: Iterable[Tuple[bytes, Tuple[float, float]]]) -> bytes:
+    """Une fragmentos dibujados con origen en (0, 0), cada uno trasladado a su origen.
+
+    Cada fragmento va entre ``q``/``Q`` con su propio ``cm``, así el estado
+    gráfico de uno no afecta al siguiente.
+    """
+    return b"".join(
+        f"q 1 0 0 1 {_num(x)} {_num(y)} cm\n".encode("ascii") + fragment + b"\nQ\n" for fragment, (x, y) in fragments
+    )
@@ -0,0 +1,119 @@
+"""Cola de impresión: renderizar y escribir/imprimir en paralelo.
+
+El render (CPU) corre en el hilo principal o en procesos worker y deja cada
+trabajo terminado (un PDF completo de unas decenas de páginas, o una ficha)
+en una cola acotada; un hilo aparte los entrega al destino apenas llegan:
+
+* ``DirectorySink``: los escribe en una carpeta (p. ej. la que vigila el
+  spooler) con reemplazo atómico, así nunca se ve un PDF a medio escribir
+* ``CommandSink``: además ejecuta un comando por trabajo, p. ej. ``lp -d HP``
+
+Mientras se renderiza el resto, los primeros trabajos ya están en la
+impresora. Como la cola tiene tamaño fijo, si el destino es más lento que el
+render el productor espera: en memoria nunca hay más de ``queue_size``
+trabajos sin entregar.
+"""
+from __future__ import annotations
+
+import os
+import shlex
+import subprocess
+import time
+from dataclasses import dataclass
+from queue import Queue
+from threading import Thread
+from typing import Iterable, List
+
+from common.profiling import NULL_PROFILER, StageProfiler
+
+
+DEFAULT_QUEUE_SIZE = 2
+DEFAULT_JOB_PAGES = 50
+_DONE = object()
+
+
+@dataclass
+class PrintJob:
+    name: str
+    data: bytes
+    pages: int = 1
+
+
+class DirectorySink:
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def submit(self, job: PrintJob) -> str:
+        path = os.path.join(self.directory, job.name)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as target:
+            target.write(job.data)
+        os.replace(tmp_path, path)
+        return path
+
+
+class CommandSink(DirectorySink):
+    """Guarda el trabajo en ``directory`` y ejecuta ``command <ruta>`` (p. ej. ``lp``)."""
+
+    def __init__(self, command: str, directory: str) -> None:
+        super().__init__(directory)
+        self.command = shlex.split(command)
+
+    def submit(self, job: PrintJob) -> str:
+        path = super().submit(job)
+        subprocess.run([*self.command, path], check=True)
+        return path
+
+
+def run_print_queue(
+    jobs: Iterable[PrintJob],
+    sink: DirectorySink,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    profiler: StageProfiler | None = None,
+    verbose: bool = True,
+) -> List[str]:
+    """Entrega cada trabajo de ``jobs`` al ``sink`` desde un hilo aparte, en orden.
+
+    ``jobs`` se consume en el hilo que llama (ahí ocurre el render). Si el
+    destino falla, se deja de renderizar y la excepción se propaga acá.
+    Devuelve las rutas entregadas.
+    """
+    profiler = profiler or NULL_PROFILER
+    queue: Queue = Queue(maxsize=max(1, queue_size))
+    delivered: List[str] = []
+    errors: List[BaseException] = []
+    start = time.perf_counter()
+
+    def consume() -> None:
+        while True:
+            job = queue.get()
+            if job is _DONE:
+                return
+            if errors:
+                continue
+            try:
+                delivered.append(sink.submit(job))
+            except BaseException as exc:  # se re-lanza en el hilo principal
+                errors.append(exc)
+                continue
+            if verbose:
+                print(f"🖨️ {delivered[-1]} ({job.pages} págs., {time.perf_counter() - start:.1f} s)", flush=True)
+
+    consumer = Thread(target=consume, name="print-queue", daemon=True)
+    consumer.start()
+    try:
+        for job in jobs:
+            if errors:
+                break
+            profiler.count("print_jobs")
+            profiler.count("bytes_written", len(job.data))
+            # Si el destino va atrasado, el render espera acá (cola llena)
+            with profiler.stage("queue"):
+                queue.put(job)
+    finally:
+        queue.put(_DONE)
+        consumer.join()
+    if errors:
+        raise errors[0]
+    return delivered
@@ -0,0 +1,182 @@
+"""Medición por etapas de una corrida (``--profile``).
+
+``StageProfiler`` acumula tiempo de pared y de CPU por etapa (lectura del CSV,
+agrupación, overlay, merge con pypdf, escritura...) más contadores como
+páginas o bytes escritos. Los tiempos son exclusivos: si una etapa consume un
+iterador medido por otra (p. ej. la agrupación lee filas del CSV), el tiempo
+de la etapa interna no se cuenta dos veces.
+
+Sin ``--profile`` los generadores usan ``NULL_PROFILER``, que no mide nada.
+"""
+from __future__ import annotations
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict, dataclass
+from typing import ContextManager, Dict, Iterable, Iterator, List, TypeVar
+
+T = TypeVar("T")
+
+PROFILE_MODES = ("stages", "cprofile", "tracemalloc")
+TOP_ENTRIES = 15
+_DONE = object()
+
+
+@dataclass
+class StageTotals:
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    calls: int = 0
+
+
+class StageProfiler:
+    def __init__(self) -> None:
+        self.stages: Dict[str, StageTotals] = {}
+        self.counters: Dict[str, int] = {}
+        self._stack: List[str] = []
+        self._mark = (time.perf_counter(), time.process_time())
+
+    def _switch(self) -> None:
+        """Carga lo transcurrido desde la última transición a la etapa activa."""
+        now = (time.perf_counter(), time.process_time())
+        if self._stack:
+            totals = self.stages[self._stack[-1]]
+            totals.wall_s += now[0] - self._mark[0]
+            totals.cpu_s += now[1] - self._mark[1]
+        self._mark = now
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        self._switch()
+        self.stages.setdefault(name, StageTotals()).calls += 1
+        self._stack.append(name)
+        try:
+            yield
+        finally:
+            self._switch()
+            self._stack.pop()
+
+    def iterate(self, name: str, iterable: Iterable[T]) -> Iterator[T]:
+        """Recorre ``iterable`` cargando a ``name`` el tiempo de cada ``next``."""
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name):
+                item = next(iterator, _DONE)
+            if item is _DONE:
+                return
+            yield item  # type: ignore[misc]
+
+    def count(self, name: str, value: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + value
+
+
+class NullProfiler:
+    """Mismo contrato que ``StageProfiler`` sin costo de medición."""
+
+    def stage(self, name: str) -> ContextManager[None]:
+        return nullcontext()
+
+    def iterate(self, name: str, iterable: Iterable[T]) -> Iterable[T]:
+        return iterable
+
+    def count(self, name: str, value: int = 1) -> None:
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+def build_summary(profiler: StageProfiler, wall_s: float, cpu_s: float) -> Dict:
+    pages = profiler.counters.get("pages", 0)
+    return {
+        "wall_s": round(wall_s, 4),
+        "cpu_s": round(cpu_s, 4),
+        "pages_per_s": round(pages / wall_s, 1) if wall_s > 0 else 0.0,
+        "counters": dict(profiler.counters),
+        "stages": {
+            name: {**asdict(totals), "share": round(totals.wall_s / wall_s, 4) if wall_s > 0 else 0.0}
+            for name, totals in profiler.stages.items()
+        },
+    }
+
+
+def print_summary(summary: Dict) -> None:
+    print("\n📊 Perfil de la corrida")
+    print(f"   {'etapa':<16} {'pared s':>9} {'cpu s':>9} {'llamadas':>9} {'%':>6}")
+    for name, totals in summary["stages"].items():
+        print(
+            f"   {name:<16} {totals['wall_s']:>9.3f} {totals['cpu_s']:>9.3f} "
+            f"{totals['calls']:>9} {totals['share'] * 100:>5.1f}%"
+        )
+    print(f"   {'total':<16} {summary['wall_s']:>9.3f} {summary['cpu_s']:>9.3f}")
+    counters = ", ".join(f"{name}={value}" for name, value in summary["counters"].items())
+    print(f"   {summary['pages_per_s']} páginas/s · {counters}")
+
+
+def _cprofile_top(profile: cProfile.Profile) -> List[Dict]:
+    stats = pstats.Stats(profile, stream=io.StringIO())
+    entries = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:TOP_ENTRIES]
+    return [
+        {
+            "function": f"{os.path.basename(filename)}:{line}({name})",
+            "calls": calls,
+            "tottime_s": round(tottime, 4),
+            "cumtime_s": round(cumtime, 4),
+        }
+        for (filename, line, name), (_, calls, tottime, cumtime, _) in entries
+    ]
+
+
+def _tracemalloc_top(snapshot: tracemalloc.Snapshot) -> List[Dict]:
+    return [
+        {"location": str(stat.traceback[0]), "size_kb": round(stat.size / 1024, 1), "count": stat.count}
+        for stat in snapshot.statistics("lineno")[:TOP_ENTRIES]
+    ]
+
+
+@contextmanager
+def profile_run(profiler: StageProfiler | None, mode: str | None, report_path: str) -> Iterator[None]:
+    """Envuelve la corrida; al terminar guarda el JSON en ``report_path`` e imprime la tabla.
+
+    ``mode`` agrega cProfile (además se guarda ``<reporte>.prof`` para
+    ``python -m pstats``) o tracemalloc (pico y principales asignaciones).
+    """
+    if profiler is None:
+        yield
+        return
+
+    profile = cProfile.Profile() if mode == "cprofile" else None
+    if mode == "tracemalloc":
+        tracemalloc.start()
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    if profile is not None:
+        profile.enable()
+    try:
+        yield
+    finally:
+        if profile is not None:
+            profile.disable()
+        summary = build_summary(profiler, time.perf_counter() - wall_start, time.process_time() - cpu_start)
+        summary["mode"] = mode
+
+        if profile is not None:
+            stats_path = f"{os.path.splitext(report_path)[0]}.prof"
+            profile.dump_stats(stats_path)
+            summary["cprofile"] = {"stats_file": stats_path, "top_cumulative": _cprofile_top(profile)}
+        if mode == "tracemalloc":
+            _, peak = tracemalloc.get_traced_memory()
+            summary["tracemalloc"] = {"peak_mb": round(peak / (1024 * 1024), 2), "top": _tracemalloc_top(tracemalloc.take_snapshot())}
+            tracemalloc.stop()
+
+        with open(report_path, mode="w", encoding="utf-8") as handle:
+            json.dump(summary, handle, ensure_ascii=False, indent=1)
+        print_summary(summary)
+        if mode == "tracemalloc":
+            print(f"   pico de memoria (tracemalloc): {summary['tracemalloc']['peak_mb']} MB")
+        print(f"ℹ️ Perfil guardado: {report_path}")
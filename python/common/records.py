@@ -0,0 +1,144 @@
+"""Modelo compacto de pasajeros compartido por los generadores de vouchers y fichas.
+
+Cada fila del CSV de regimen se convierte en un ``Passenger`` con ``__slots__``
+(solo las columnas que usan los generadores) en lugar de arrastrar el dict de
+``csv.DictReader`` con todas las columnas. Los valores de baja cardinalidad
+(hotel, sede, servicios, fechas, etc.) se internan para que todas las filas
+compartan el mismo objeto string.
+"""
+from __future__ import annotations
+
+import sys
+from typing import Dict, Iterable, List, Mapping, Sequence, Tuple
+
+
+# Atributo de Passenger -> encabezado de la columna en consultaRegimenReport.csv
+CSV_COLUMNS: Dict[str, str] = {
+    "voucher": "Voucher",
+    "name": "Apellido y nombre",
+    "doc_type": "Tipo documento",
+    "doc_number": "Nro. doc.",
+    "birth_date": "Fecha de nacimiento",
+    "age": "Edad",
+    "email": "Email",
+    "phone": "Teléfono",
+    "mobile": "Celular",
+    "sede": "Sede",
+    "hotel": "Descripción",
+    "room": "Nro. habitación",
+    "room_type": "Tipo habitación",
+    "from_date": "Fecha de ingreso",
+    "to_date": "Fecha de egreso",
+    "services": "Servicios",
+    "entity": "Entidad",
+    "package": "Paquete",
+}
+
+INTERNED_FIELDS = frozenset(
+    {"doc_type", "sede", "hotel", "room_type", "from_date", "to_date", "services", "entity", "package"}
+)
+
+
+def normalize(value: str | None) -> str:
+    return (value or "").strip()
+
+
+def parse_age(value: str | None) -> int:
+    try:
+        return int((value or "").strip())
+    except Exception:
+        return -1
+
+
+class Passenger:
+    __slots__ = tuple(CSV_COLUMNS)
+
+    voucher: str
+    name: str
+    doc_type: str
+    doc_number: str
+    birth_date: str
+    age: int
+    email: str
+    phone: str
+    mobile: str
+    sede: str
+    hotel: str
+    room: str
+    room_type: str
+    from_date: str
+    to_date: str
+    services: str
+    entity: str
+    package: str
+
+    def __init__(self, **values: str | int) -> None:
+        for attr in self.__slots__:
+            value = values.get(attr, -1 if attr == "age" else "")
+            if attr in INTERNED_FIELDS:
+                value = sys.intern(value)
+            setattr(self, attr, value)
+
+    @classmethod
+    def from_row(cls, row: Mapping[str, str | None]) -> "Passenger":
+        """Construye el pasajero desde una fila de ``csv.DictReader``."""
+        values: Dict[str, str | int] = {attr: normalize(row.get(header)) for attr, header in CSV_COLUMNS.items()}
+        values["age"] = parse_age(row.get("Edad"))
+        return cls(**values)
+
+    @classmethod
+    def from_values(cls, values: Sequence[str]) -> "Passenger":
+        """Inversa de ``to_values``: reconstruye el pasajero desde strings."""
+        fields: Dict[str, str | int] = dict(zip(cls.__slots__, values))
+        fields["age"] = parse_age(fields.get("age"))  # type: ignore[arg-type]
+        return cls(**fields)
+
+    def to_values(self) -> List[str]:
+        return [str(getattr(self, attr)) for attr in self.__slots__]
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Passenger):
+            return NotImplemented
+        return all(getattr(self, attr) == getattr(other, attr) for attr in self.__slots__)
+
+    def __repr__(self) -> str:
+        return f"Passenger(voucher={self.voucher!r}, name={self.name!r}, age={self.age!r})"
+
+
+class VoucherGroup:
+    __slots__ = ("voucher", "passengers")
+
+    def __init__(self, voucher: str, passengers: List[Passenger] | None = None) -> None:
+        self.voucher = voucher
+        self.passengers = passengers if passengers is not None else []
+
+    @property
+    def pax(self) -> int:
+        return len(self.passengers)
+
+    def holder(self) -> Passenger:
+        """Titular del grupo: el de mayor edad (el primero en el CSV si hay empate)."""
+        return max(self.passengers, key=lambda passenger: passenger.age)
+
+    def holder_and_companions(self) -> Tuple[Passenger, List[Passenger]]:
+        """Titular y acompañantes, estos últimos ordenados por edad descendente."""
+        ordered = sorted(self.passengers, key=lambda passenger: passenger.age, reverse=True)
+        return ordered[0], ordered[1:]
+
+    def rooms(self) -> List[str]:
+        """Habitaciones distintas y no vacías del grupo, ordenadas."""
+        return sorted({passenger.room for passenger in self.passengers if passenger.room})
+
+    def __repr__(self) -> str:
+        return f"VoucherGroup(voucher={self.voucher!r}, pax={self.pax})"
+
+
+def group_passengers(passengers: Iterable[Passenger]) -> Dict[str, VoucherGroup]:
+    """Agrupa pasajeros por voucher respetando el orden de aparición en el CSV."""
+    groups: Dict[str, VoucherGroup] = {}
+    for passenger in passengers:
+        group = groups.get(passenger.voucher)
+        if group is None:
+            group = groups[passenger.voucher] = VoucherGroup(passenger.voucher)
+        group.passengers.append(passenger)
+    return groups
@@ -0,0 +1,297 @@
+"""Lectura robusta del export de regimen y escritura de una copia normalizada.
+
+Todos los lectores del CSV (generadores, caché, reportes, servidor de render)
+pasan por acá. El formato se detecta una sola vez por archivo, mirando el
+comienzo:
+
+* codificación: UTF-8 (con o sin BOM) o, si no decodifica, Windows-1252 (el
+  export reabierto y guardado en Excel)
+* separador: ``,``, ``;`` o tabulación, el que más aparece en el encabezado
+* formato ``regimen`` (``consultaRegimenReport.csv``, con encabezados en
+  castellano) o ``legacy`` (las pruebas viejas de 19 columnas con nombre y
+  apellido separados, el segundo formato de ``client/src/lib/parser.js``)
+
+Con eso se arma una tabla fija de columnas (encabezado -> posición) y cada
+fila se repara en la misma pasada: las comas sin comillas de ``Observación
+habitación`` parten la fila en más campos que el encabezado, y esos campos se
+vuelven a unir en la observación con ``;`` (la misma corrección que hace
+``parser.js``); a las filas cortas se les completan los campos que faltan.
+
+Las filas salen con las columnas de ``REGIMEN_COLUMNS`` en ese orden (las
+posiciones que leen ``parser.js`` y ``rooming.html``; las que faltan, vacías) y
+después el resto de las columnas del archivo. ``write_normalized`` deja ese
+resultado en un CSV limpio: UTF-8, separado por comas, una fila por línea,
+siempre la misma cantidad de campos y comillas donde hacen falta. Las páginas
+y los scripts lo leen sin heurísticas.
+"""
+from __future__ import annotations
+
+import codecs
+import csv
+import io
+import os
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from operator import itemgetter
+from typing import Dict, Iterable, Iterator, List, TextIO, Tuple
+
+
+# Columnas en el orden del export (las posiciones que usan parser.js y rooming.html)
+REGIMEN_COLUMNS: Tuple[str, ...] = (
+    "Cód. Alojamiento",
+    "Descripción",
+    "Nro. habitación",
+    "Tipo habitación",
+    "Observación habitación",
+    "Cantidad plazas",
+    "Voucher",
+    "Sede",
+    "Fecha de ingreso",
+    "Fecha de egreso",
+    "Plazas ocupadas",
+    "Tipo documento",
+    "Nro. doc.",
+    "Apellido y nombre",
+    "Edad",
+    "Entidad",
+    "Servicios",
+    "Paquete",
+    "Transporte",
+    "Fecha de nacimiento",
+    "Email",
+    "Teléfono",
+    "Celular",
+    "Estado",
+)
+OBSERVATION_COLUMN = "Observación habitación"
+
+# Formato viejo de 19 columnas: columna -> nombre en REGIMEN_COLUMNS (o propio)
+LEGACY_COLUMNS: Tuple[str, ...] = (
+    "Cód. Alojamiento",
+    "Descripción",
+    "Nro. habitación",
+    "Tipo habitación",
+    "Observación habitación",
+    "Cantidad plazas",
+    "Voucher",
+    "Estado",
+    "Fecha de ingreso",
+    "Fecha de egreso",
+    "Tarifa",
+    "Categoría",
+    "Nro. doc.",
+    "Nombre",
+    "Apellido",
+    "Email",
+    "Servicios",
+    "Origen",
+    "Destino",
+)
+# Se combinan en "Apellido y nombre" (ver legacy_name)
+LEGACY_NAME_COLUMNS = ("Nombre", "Apellido")
+
+DELIMITERS = (",", ";", "\t")
+_SAMPLE_BYTES = 64 * 1024
+_DATE = re.compile(r"\s*\d{1,2}/\d{1,2}/\d{4}\s*$")
+
+
+def _header_key(value: str) -> str:
+    """Encabezado comparable: sin tildes, mayúsculas ni espacios de más."""
+    decomposed = unicodedata.normalize("NFKD", value.strip().lstrip("\ufeff"))
+    return " ".join("".join(char for char in decomposed if not unicodedata.combining(char)).upper().split())
+
+
+_CANONICAL = {_header_key(name): name for name in REGIMEN_COLUMNS}
+
+
+@dataclass
+class ExportFormat:
+    kind: str
+    encoding: str
+    delimiter: str
+    # Encabezado del archivo, con los nombres conocidos llevados a los de REGIMEN_COLUMNS
+    header: Tuple[str, ...]
+    # Columnas de salida: REGIMEN_COLUMNS en su orden y después las demás del archivo
+    columns: Tuple[str, ...] = ()
+    # Posición en el archivo de cada columna de salida (``width`` = columna que falta, vacía)
+    positions: Tuple[int, ...] = ()
+
+    def __post_init__(self) -> None:
+        header, width = self.header, len(self.header)
+        skipped = LEGACY_NAME_COLUMNS if self.kind == "legacy" else ()
+        extras = [(index, name) for index, name in enumerate(header) if name not in REGIMEN_COLUMNS + skipped]
+        self.columns = REGIMEN_COLUMNS + tuple(name for _, name in extras)
+        self.positions = tuple(header.index(name) if name in header else width for name in REGIMEN_COLUMNS) + tuple(
+            index for index, _ in extras
+        )
+
+    @property
+    def width(self) -> int:
+        return len(self.header)
+
+    @property
+    def observation(self) -> int | None:
+        return self.header.index(OBSERVATION_COLUMN) if OBSERVATION_COLUMN in self.header else None
+
+    @property
+    def in_order(self) -> bool:
+        """True si el archivo ya tiene las columnas en el orden de salida (no hay que reordenar)."""
+        return self.kind == "regimen" and self.positions == tuple(range(self.width))
+
+
+@dataclass
+class IngestStats:
+    rows: int = 0
+    # Filas con más campos que el encabezado (observación con comas) y con menos
+    repaired: int = 0
+    padded: int = 0
+    invalid_dates: int = 0
+    without_voucher: int = 0
+    repaired_lines: List[int] = field(default_factory=list)
+
+
+def detect_encoding(sample: bytes) -> str:
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    try:
+        # final=False: la muestra puede cortar un carácter multibyte al final
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+    except UnicodeDecodeError:
+        return "cp1252"
+    return "utf-8-sig"
+
+
+def detect_format_text(first_line: str, encoding: str = "utf-8-sig") -> ExportFormat:
+    """Formato a partir de la línea de encabezado ya decodificada."""
+    delimiter = max(DELIMITERS, key=first_line.count)
+    header = next(csv.reader([first_line], delimiter=delimiter), [])
+    names = tuple(_CANONICAL.get(_header_key(name), name.strip().lstrip("\ufeff")) for name in header)
+    # El formato viejo se reconoce como en parser.js: por la cantidad de columnas
+    # (y porque no trae el nombre completo en una sola columna)
+    if len(names) == len(LEGACY_COLUMNS) and "Apellido y nombre" not in names:
+        return ExportFormat("legacy", encoding, delimiter, LEGACY_COLUMNS)
+    if "Voucher" in names:
+        return ExportFormat("regimen", encoding, delimiter, names)
+    raise ValueError(
+        f"Formato de CSV no reconocido: {len(names)} columnas y sin columna 'Voucher' "
+        f"(se esperaba el export de regimen o el formato de {len(LEGACY_COLUMNS)} columnas)"
+    )
+
+
+def detect_format(csv_path: str) -> ExportFormat:
+    with open(csv_path, "rb") as handle:
+        sample = handle.read(_SAMPLE_BYTES)
+    encoding = detect_encoding(sample)
+    first_line = sample.split(b"\n", 1)[0].decode(encoding, errors="replace")
+    return detect_format_text(first_line.rstrip("\r"), encoding)
+
+
+def legacy_name(first_name: str, surname: str) -> str:
+    """``normalizePassengerName`` de parser.js: el apellido solo si no es un email ni tiene dígitos."""
+    first_name, surname = first_name.strip(), surname.strip()
+    if surname and "@" not in surname and not any(char.isdigit() for char in surname):
+        return f"{first_name} {surname}".upper()
+    return first_name.upper()
+
+
+def iter_text_fields(
+    handle: TextIO, export_format: ExportFormat, stats: IngestStats | None = None
+) -> Iterator[List[str]]:
+    """Filas reparadas de ``handle`` (posicionado después del encabezado), en el orden de ``columns``."""
+    stats = stats if stats is not None else IngestStats()
+    width = export_format.width
+    observation = export_format.observation
+    legacy = export_format.kind == "legacy"
+    # Tabla fija de columnas: un itemgetter arma la fila de salida de una vez
+    reorder = None if export_format.in_order else itemgetter(*export_format.positions)
+    name_column = REGIMEN_COLUMNS.index("Apellido y nombre")
+    first_name, surname = (LEGACY_COLUMNS.index(name) for name in LEGACY_NAME_COLUMNS)
+    voucher = REGIMEN_COLUMNS.index("Voucher")
+    dates = [REGIMEN_COLUMNS.index(name) for name in ("Fecha de ingreso", "Fecha de egreso")]
+
+    reader = csv.reader(handle, delimiter=export_format.delimiter)
+    for fields in reader:
+        if not fields or (len(fields) == 1 and not fields[0].strip()):
+            continue
+        if len(fields) > width:
+            extra = len(fields) - width
+            if observation is not None:
+                joined = ";".join(fields[observation : observation + extra + 1])
+                fields[observation : observation + extra + 1] = [joined]
+            else:
+                del fields[width:]
+            stats.repaired += 1
+            # El encabezado ya se leyó: la línea del archivo es una más que la del lector
+            stats.repaired_lines.append(reader.line_num + 1)
+        elif len(fields) < width:
+            fields.extend([""] * (width - len(fields)))
+            stats.padded += 1
+        if reorder is not None:
+            fields.append("")
+            row = list(reorder(fields))
+            if legacy:
+                row[name_column] = legacy_name(fields[first_name], fields[surname])
+            fields = row
+
+        stats.rows += 1
+        if not fields[voucher].strip():
+            stats.without_voucher += 1
+        if not all(_DATE.match(fields[index]) for index in dates):
+            stats.invalid_dates += 1
+        yield fields
+
+
+def iter_export_fields(
+    csv_path: str, stats: IngestStats | None = None, export_format: ExportFormat | None = None
+) -> Iterator[List[str]]:
+    export_format = export_format or detect_format(csv_path)
+    with open(csv_path, mode="r", encoding=export_format.encoding, newline="") as handle:
+        handle.readline()
+        yield from iter_text_fields(handle, export_format, stats)
+
+
+def iter_export_rows(csv_path: str, stats: IngestStats | None = None) -> Iterator[Dict[str, str]]:
+    """Filas del CSV como ``csv.DictReader``, con el formato detectado y las filas reparadas."""
+    export_format = detect_format(csv_path)
+    columns = export_format.columns
+    for fields in iter_export_fields(csv_path, stats, export_format):
+        yield dict(zip(columns, fields))
+
+
+def decode_export(data: bytes) -> str:
+    return data.decode(detect_encoding(data[:_SAMPLE_BYTES]))
+
+
+def iter_text_rows(text: str, stats: IngestStats | None = None) -> Iterator[Dict[str, str]]:
+    """Igual que ``iter_export_rows`` sobre el contenido ya decodificado (p. ej. un upload)."""
+    handle = io.StringIO(text, newline="")
+    first_line = handle.readline().rstrip("\r\n")
+    export_format = detect_format_text(first_line)
+    columns = export_format.columns
+    for fields in iter_text_fields(handle, export_format, stats):
+        yield dict(zip(columns, fields))
+
+
+def normalized_path_for(csv_path: str) -> str:
+    return f"{os.path.splitext(csv_path)[0]}_normalizado.csv"
+
+
+def _single_line(fields: Iterable[str]) -> List[str]:
+    # Una fila por línea: las páginas parten el archivo por '\n' antes de leer los campos
+    return [value.replace("\r\n", " ").replace("\n", " ").replace("\r", " ") for value in fields]
+
+
+def write_normalized(csv_path: str, output_path: str | None = None) -> Tuple[str, IngestStats]:
+    """Escribe la copia normalizada de ``csv_path``; devuelve la ruta y lo que se reparó."""
+    output_path = output_path or normalized_path_for(csv_path)
+    export_format = detect_format(csv_path)
+    stats = IngestStats()
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, mode="w", encoding="utf-8", newline="") as target:
+        writer = csv.writer(target, lineterminator="\n")
+        writer.writerow(export_format.columns)
+        for fields in iter_export_fields(csv_path, stats, export_format):
+            writer.writerow(_single_line(fields))
+    os.replace(tmp_path, output_path)
+    return output_path, stats
@@ -2,168 +2,523 @@
 """
 Script para completar el PDF original (fichaPax.pdf) con los datos de los pasajeros
 sin modificar el diseño existente, solo sobrepone texto en las posiciones correctas.
+
+reportlab y pypdf se importan recién en las funciones que renderizan, así
+importar este módulo (p. ej. desde llenar_fichas.py para --help o --dry-run)
+no carga el stack PDF.
+
+Con un archivo por voucher, el PDF base (plantilla y fuentes) se serializa una
+sola vez y cada ficha solo agrega su content stream; el texto de las fichas se
+puede renderizar en varios procesos (``workers``). Cada archivo se escribe con
+reemplazo atómico y se anota en ``.journal.jsonl``: si la corrida se corta, la
+siguiente retoma desde la última ficha terminada.
 """
 
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.units import mm
-from pypdf import PdfReader, PdfWriter
+import hashlib
 import io
 import re
 import os
+import sys
+from collections import deque
+from itertools import islice
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from common.layout import load_layout  # noqa: E402
+from common.manifest import (  # noqa: E402
+    OutputManifest,
+    content_hash,
+    file_sha256,
+    load_previous_output,
+    RunJournal,
+    read_journal,
+    read_manifest,
+    save_output_manifest,
+    write_manifest,
+)
+from common.pdf_text import (  # noqa: E402
+    ENGINES,
+    attach_standard_fonts,
+    engine_content,
+    engine_font_names,
+    font_resource_names,
+    layout_content,
+)
+from common.print_queue import DEFAULT_JOB_PAGES, DirectorySink, PrintJob, run_print_queue  # noqa: E402
+from common.profiling import NULL_PROFILER  # noqa: E402
+from common.records import Passenger  # noqa: E402
+
 
+PLANTILLA_PDF = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fichaPax.pdf")
+POSICIONES_JSON = os.path.join(os.path.dirname(os.path.abspath(__file__)), "positions.json")
+DIARIO_CORRIDA = ".journal.jsonl"
+# Fichas por tarea de un proceso worker (el texto de una ficha tarda menos de un milisegundo)
+FICHAS_POR_LOTE = 16
 
-def crear_overlay_datos(datos_titular, num_pasajeros, acompanantes=[], todas_habitaciones=[]):
+
+def limpiar_campo(valor):
+    """Retorna el valor solo si es válido, sino retorna cadena vacía para dejarlo en blanco"""
+    if not valor or valor.strip() == '' or valor == '0' or 'No informado' in str(valor):
+        return ''
+    return str(valor).strip()
+
+
+def valores_ficha(datos_titular, acompanantes=[], todas_habitaciones=[]):
     """
-    Crea un PDF transparente con solo los datos para sobreponer en la plantilla.
-    
+    Arma los textos de la ficha indexados por las claves de positions.json.
+
     Args:
-        datos_titular: dict con los datos del titular
-        num_pasajeros: int con el total de personas
-        acompanantes: list de dicts con los datos de los acompañantes
+        datos_titular: Passenger con los datos del titular
+        acompanantes: list de Passenger con los datos de los acompañantes
         todas_habitaciones: list con todos los números de habitación del grupo
+
+    Returns:
+        dict clave de layout -> texto (las claves vacías no se dibujan)
     """
-    packet = io.BytesIO()
-    c = canvas.Canvas(packet, pagesize=A4)
-    width, height = A4
-    
-    # Configurar fuente
-    c.setFont("Helvetica", 10)
-    
-    # Función auxiliar para validar y limpiar campos
-    def limpiar_campo(valor):
-        """Retorna el valor solo si es válido, sino retorna cadena vacía para dejarlo en blanco"""
-        if not valor or valor.strip() == '' or valor == '0' or 'No informado' in str(valor):
-            return ''
-        return str(valor).strip()
-    
     # ===== DATOS PERSONALES =====
-    # Apellido y nombre
-    y_nombre = height - 57 * mm
-    c.drawString(70 * mm, y_nombre, datos_titular['Apellido y nombre'].upper())
-    
-    # Documento tipo y número
-    y_doc = height - 65 * mm
-    c.drawString(80 * mm, y_doc, f"{datos_titular['Tipo documento']}: {datos_titular['Nro. doc.']}")
-    
-    # Número de contacto
-    y_contacto = height - 72 * mm
-    telefono = limpiar_campo(datos_titular.get('Celular')) or limpiar_campo(datos_titular.get('Teléfono'))
-    if telefono:
-        c.drawString(80 * mm, y_contacto, telefono)
-    
-    # Email (solo si es válido)
-    email = limpiar_campo(datos_titular.get('Email'))
-    if email:
-        c.drawString(130 * mm, y_contacto, email)
-    
-    # Seccional (quitar prefijo numérico "NN - ")
-    y_seccional = height - 95 * mm
-    sede_raw = datos_titular.get('Sede', '')
-    sede_limpia = limpiar_campo(sede_raw)
+    valores = {
+        "Apellido y nombre": datos_titular.name.upper(),
+        "TipoDocumento_Nro": f"{datos_titular.doc_type}: {datos_titular.doc_number}",
+        # Número de contacto y email (solo si son válidos)
+        "Telefono": limpiar_campo(datos_titular.mobile) or limpiar_campo(datos_titular.phone),
+        "Email": limpiar_campo(datos_titular.email),
+        "Fecha de nacimiento": datos_titular.birth_date,
+        "Voucher": datos_titular.voucher,
+    }
+
+    # Seccional (quitar prefijo numérico "NN - ", por ejemplo "39 - CHIVILCOY" -> "CHIVILCOY")
+    sede_limpia = limpiar_campo(datos_titular.sede)
     if sede_limpia:
-        # Eliminar prefijo numérico con guión (por ejemplo "39 - CHIVILCOY" -> "CHIVILCOY")
-        sede_limpia = re.sub(r'^\s*\d+\s*[-–—]\s*', '', sede_limpia)
-        c.drawString(45 * mm, y_seccional, sede_limpia)
-    
-    # Fecha de nacimiento
-    y_fechanac = height - 65 * mm
-    c.drawString(162 * mm, y_fechanac, datos_titular['Fecha de nacimiento'])
-    
-    # ===== DATOS ACOMPAÑANTES =====
-    # Llenar los datos de los acompañantes (máximo 3 líneas)
-    y_acomp_inicial = height - 115 * mm  # Posición aproximada de la primera línea de acompañantes
-    espaciado = 7 * mm  # Espacio entre líneas
-    
-    c.setFont("Helvetica", 9)
-    for idx, acomp in enumerate(acompanantes[:3]):  # Máximo 3 acompañantes
-        y_linea = y_acomp_inicial - (idx * espaciado)
-        
-        # Nombre del acompañante
-        c.drawString(45 * mm, y_linea, acomp['Apellido y nombre'].upper())
-        
-        # Documento del acompañante
-        doc_acomp = f"{acomp['Tipo documento']}: {acomp['Nro. doc.']}"
-        c.drawString(105 * mm, y_linea, doc_acomp)
-    
+        valores["Sede"] = re.sub(r'^\s*\d+\s*[-–—]\s*', '', sede_limpia)
+
+    # ===== DATOS ACOMPAÑANTES ===== (el layout define cuántas líneas hay)
+    for idx, acomp in enumerate(acompanantes):
+        valores[f"Acomp.name.{idx}"] = acomp.name.upper()
+        valores[f"Acomp.doc.{idx}"] = f"{acomp.doc_type}: {acomp.doc_number}"
+
     # ===== ALOJAMIENTO =====
-    c.setFont("Helvetica", 10)
-    
     # Número de habitación (mostrar todas las habitaciones del grupo si hay más de una)
-    y_habitacion = height - 187 * mm
     if todas_habitaciones and len(todas_habitaciones) > 1:
-        # Ordenar habitaciones y formatear
-        habitaciones_texto = ", ".join(sorted(set(todas_habitaciones)))
-        c.drawString(110 * mm, y_habitacion, habitaciones_texto)
+        valores["NroHabitacion"] = ", ".join(sorted(set(todas_habitaciones)))
     else:
-        # Solo una habitación
-        c.drawString(110 * mm, y_habitacion, datos_titular['Nro. habitación'])
-    
-    # Fecha de ingreso
-    y_ingreso = height - 173 * mm
-    c.drawString(75 * mm, y_ingreso, datos_titular['Fecha de ingreso'])
-    
-    # Fecha de egreso
-    c.drawString(142 * mm, y_ingreso, datos_titular['Fecha de egreso'])
-    
+        valores["NroHabitacion"] = datos_titular.room
+    valores["FechaIngreso"] = datos_titular.from_date
+    valores["FechaEgreso"] = datos_titular.to_date
+
     # ===== SERVICIOS =====
     # Marcar checkbox según el servicio
-    servicios = datos_titular.get('Servicios', '').upper()
-    y_servicios = height - 198 * mm
-    
+    servicios = datos_titular.services.upper()
     if 'DESAYUNO' in servicios and 'MEDIA' not in servicios:
-        c.drawString(75 * mm, y_servicios, "X")  # Desayuno
+        valores["Servicios.desayuno"] = "X"
     elif 'MEDIA' in servicios:
-        c.drawString(113 * mm, y_servicios, "X")  # Media pensión
+        valores["Servicios.media"] = "X"
     elif 'COMPLETA' in servicios or 'PENSION' in servicios:
-        c.drawString(140 * mm, y_servicios, "X")  # Pensión completa
-    
-    # Número de voucher
-    y_voucher = height - 40 * mm
-    c.setFont("Helvetica-Bold", 11)
-    c.drawString(80 * mm, y_voucher, datos_titular['Voucher'])
+        valores["Servicios.completa"] = "X"
+
+    return valores
+
+
+def crear_overlay_datos(datos_titular, num_pasajeros, acompanantes=[], todas_habitaciones=[], layout=POSICIONES_JSON):
+    """
+    Crea un PDF transparente con solo los datos para sobreponer en la plantilla.
     
+    Args:
+        datos_titular: Passenger con los datos del titular
+        num_pasajeros: int con el total de personas
+        acompanantes: list de Passenger con los datos de los acompañantes
+        todas_habitaciones: list con todos los números de habitación del grupo
+        layout: ruta del JSON de posiciones (default: positions.json)
+    """
+    from reportlab.pdfgen import canvas
+
+    plan = load_layout(layout)
+    packet = io.BytesIO()
+    c = canvas.Canvas(packet, pagesize=plan.page_size)
+    plan.draw(c, [(valores_ficha(datos_titular, acompanantes, todas_habitaciones), plan.slots[0])])
     c.save()
     packet.seek(0)
     return packet
 
 
-def generar_ficha_sobre_original(datos_titular, num_pasajeros, nombre_salida, acompanantes=[], todas_habitaciones=[]):
+def cargar_plantilla(pdf_path=PLANTILLA_PDF):
+    """
+    Lee fichaPax.pdf una sola vez y la deja lista para estampar en cualquier writer.
+    """
+    from common.pdf_stamp import load_template_form_from_file
+
+    return load_template_form_from_file(pdf_path)
+
+
+def agregar_ficha(writer, stamp, datos_titular, num_pasajeros, acompanantes=[], todas_habitaciones=[], layout=POSICIONES_JSON, fuentes=None, perfil=None):
+    """
+    Renderiza el overlay de una ficha y lo agrega como página sobre la plantilla ya registrada.
+
+    Si se pasan ``fuentes`` (ver registrar_fuentes) se usa el motor direct: el texto se
+    escribe como content stream sin armar un canvas de reportlab. ``perfil`` es el
+    StageProfiler de ``--profile`` (opcional).
+    """
+    from pypdf import PdfReader
+
+    from common.pdf_stamp import stamp_content_page, stamp_overlay_page
+
+    perfil = perfil or NULL_PROFILER
+    perfil.count("pages")
+    if fuentes is not None:
+        with perfil.stage("overlay"):
+            plan = load_layout(layout)
+            nombres, objetos = fuentes
+            valores = valores_ficha(datos_titular, acompanantes, todas_habitaciones)
+            contenido = layout_content(plan, [(valores, plan.slots[0])], nombres)
+        with perfil.stage("merge"):
+            return stamp_content_page(writer, stamp, contenido, objetos)
+
+    with perfil.stage("overlay"):
+        overlay_packet = crear_overlay_datos(datos_titular, num_pasajeros, acompanantes, todas_habitaciones, layout)
+    with perfil.stage("merge"):
+        overlay_pdf = PdfReader(overlay_packet)
+        return stamp_overlay_page(writer, stamp, overlay_pdf.pages[0])
+
+
+def registrar_fuentes(writer, layout=POSICIONES_JSON):
+    """
+    Registra una sola vez en el writer las fuentes estándar del layout (motor direct).
+
+    Returns:
+        tuple (fuente -> nombre de recurso, nombre de recurso -> objeto) para agregar_ficha
+    """
+    nombres = font_resource_names(load_layout(layout))
+    return nombres, attach_standard_fonts(writer, nombres)
+
+
+def hash_ficha(datos_titular, num_pasajeros, acompanantes=[], todas_habitaciones=[]):
+    """
+    Hash de todos los datos que se imprimen en una ficha (manifiesto incremental).
+    """
+    valores = datos_titular.to_values() + [num_pasajeros]
+    for acomp in acompanantes[:3]:
+        valores += [acomp.name, acomp.doc_type, acomp.doc_number]
+    valores += sorted(set(todas_habitaciones))
+    return content_hash(valores)
+
+
+def hash_parametros(plantilla, layout=POSICIONES_JSON):
+    """
+    Hash de la plantilla, del layout y de este script: si cambian, no se reutiliza nada.
+    """
+    return content_hash(
+        [hashlib.sha256(plantilla.form.get_data()).hexdigest(), file_sha256(__file__), load_layout(layout).digest]
+    )
+
+
+def contenidos_fichas(lote, layout=POSICIONES_JSON, motor="reportlab"):
+    """
+    Content stream del overlay de cada ficha del lote (en un proceso worker o no).
+
+    Args:
+        lote: list con los valores de cada ficha (ver valores_ficha), o None para saltearla
+
+    Returns:
+        list de tuplas (contenido, error): el error es el mensaje si la ficha falló
+    """
+    plan = load_layout(layout)
+    nombres = engine_font_names(plan, motor)
+    resultado = []
+    for valores in lote:
+        if valores is None:
+            resultado.append((None, None))
+            continue
+        try:
+            resultado.append((engine_content(plan, [(valores, plan.slots[0])], nombres, motor), None))
+        except Exception as e:
+            resultado.append((None, str(e)))
+    return resultado
+
+
+def iterar_contenidos(lotes, layout=POSICIONES_JSON, motor="reportlab", workers=1):
+    """
+    (lote, contenidos) de cada lote, en orden y a medida que se terminan.
+
+    Con ``workers > 1`` los lotes se renderizan en procesos, con a lo sumo
+    ``2 * workers`` en vuelo (igual que iter_rendered_runs de los vouchers).
+    """
+    if workers <= 1:
+        for lote in lotes:
+            yield lote, contenidos_fichas([valores for valores, _ in lote], layout, motor)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pendientes = deque()
+        for lote in lotes:
+            pendientes.append((lote, executor.submit(contenidos_fichas, [valores for valores, _ in lote], layout, motor)))
+            if len(pendientes) >= 2 * workers:
+                lote_listo, futuro = pendientes.popleft()
+                yield lote_listo, futuro.result()
+        while pendientes:
+            lote_listo, futuro = pendientes.popleft()
+            yield lote_listo, futuro.result()
+
+
+class SinkConDiario(DirectorySink):
+    """
+    DirectorySink que anota en el diario de la corrida cada ficha recién escrita.
+
+    El productor deja en ``entradas`` (nombre de archivo -> (voucher, entrada)) lo
+    que se anota cuando el archivo ya quedó en su lugar.
+    """
+
+    def __init__(self, carpeta, diario):
+        super().__init__(carpeta)
+        self.diario = diario
+        self.entradas = {}
+
+    def submit(self, job):
+        ruta = super().submit(job)
+        voucher, entrada = self.entradas.pop(job.name)
+        self.diario.record(voucher, entrada)
+        return ruta
+
+
+def generar_fichas_en_lote(fichas, salida, combinado=True, plantilla=None, incremental=False, layout=POSICIONES_JSON, motor="reportlab", perfil=None, workers=1, reanudar=True, optimizar=True):
+    """
+    Genera varias fichas reutilizando la misma plantilla en memoria.
+
+    Args:
+        fichas: iterable de tuplas (datos_titular, num_pasajeros, acompanantes, todas_habitaciones)
+        salida: ruta del PDF único si combinado, o carpeta donde se escribe
+            ficha_voucher_<voucher>.pdf por cada ficha
+        combinado: True para un solo PDF multipágina, False para un archivo por voucher
+        plantilla: plantilla ya cargada con cargar_plantilla() (se lee fichaPax.pdf si no se indica)
+        incremental: si es True, solo se renderizan las fichas cuyos datos cambiaron
+            desde la corrida anterior (según el manifiesto guardado junto a la salida)
+        layout: ruta del JSON de posiciones de los campos (default: positions.json)
+        motor: "reportlab" (default) o "direct" para escribir el texto sin reportlab
+        perfil: StageProfiler para medir etapas con --profile (opcional)
+        workers: procesos que renderizan el texto de las fichas (solo un archivo por voucher)
+        reanudar: si es True, se saltean las fichas que una corrida cortada ya dejó
+            escritas (según el diario .journal.jsonl de la carpeta de salida); con
+            False no se lee ni se escribe el diario
+        optimizar: si es True (default), la salida pasa por common.pdf_optimize
+
+    Returns:
+        list con las rutas de los archivos generados
+    """
+    if motor not in ENGINES:
+        raise ValueError(f"Motor de render desconocido: {motor}")
+    if workers < 1:
+        raise ValueError(f"Los workers deben ser 1 o más: {workers}")
+    from pypdf import PdfWriter
+
+    from common.pdf_optimize import optimize_writer
+    from common.pdf_stamp import attach_template_form, build_single_page_file, copy_stamped_page
+
+    perfil = perfil or NULL_PROFILER
+    with perfil.stage("template"):
+        if plantilla is None:
+            plantilla = cargar_plantilla()
+    with perfil.stage("manifest"):
+        parametros = hash_parametros(plantilla, layout) if incremental else ""
+
+    if combinado:
+        with perfil.stage("manifest"):
+            anterior = load_previous_output(salida, parametros) if incremental else None
+        manifiesto = OutputManifest()
+        output = PdfWriter()
+        stamp = attach_template_form(output, plantilla)
+        fuentes = registrar_fuentes(output, layout) if motor == "direct" else None
+        for datos_titular, num_pasajeros, acompanantes, todas_habitaciones in fichas:
+            clave = hash_ficha(datos_titular, num_pasajeros, acompanantes, todas_habitaciones)
+            indice_anterior = anterior.pages.get((clave,)) if anterior is not None else None
+            if indice_anterior is not None:
+                with perfil.stage("reuse"):
+                    copy_stamped_page(output, stamp, anterior.reader.pages[indice_anterior])
+                perfil.count("pages")
+            else:
+                agregar_ficha(output, stamp, datos_titular, num_pasajeros, acompanantes, todas_habitaciones, layout, fuentes, perfil)
+            manifiesto.add_page([datos_titular.voucher], [clave])
+        if anterior is not None:
+            print(f"♻️ Fichas reutilizadas de la corrida anterior: {manifiesto.reused_pages(anterior)}/{len(manifiesto.pages)}")
+        if optimizar:
+            with perfil.stage("optimize"):
+                optimize_writer(output)
+        with perfil.stage("write"):
+            with open(salida, "wb") as output_file:
+                output.write(output_file)
+        perfil.count("bytes_written", os.path.getsize(salida))
+        if incremental:
+            with perfil.stage("manifest"):
+                save_output_manifest(salida, parametros, manifiesto)
+        return [salida]
+
+    ruta_manifiesto = os.path.join(salida, ".manifest.json")
+    ruta_diario = os.path.join(salida, DIARIO_CORRIDA)
+    os.makedirs(salida, exist_ok=True)
+    with perfil.stage("manifest"):
+        # El diario se valida con los mismos parámetros que el manifiesto; los archivos
+        # optimizados y los que no, no se mezclan
+        parametros = content_hash([parametros or hash_parametros(plantilla, layout), f"optimizar={optimizar}"])
+        anteriores = (read_manifest(ruta_manifiesto, parametros) or {}).get("files", {}) if incremental else {}
+        diario_anterior = read_journal(ruta_diario, parametros) if reanudar else {}
+    if diario_anterior:
+        print(f"♻️ Reanudando la corrida anterior: {len(diario_anterior)} ficha(s) ya escritas")
+        anteriores.update(diario_anterior)
+    with perfil.stage("template"):
+        base = build_single_page_file(plantilla, engine_font_names(load_layout(layout), motor), optimizar)
+
+    archivos = {}
+    generadas = []
+    reutilizadas = 0
+    # Sin reanudar (--find) el diario no se toca: el de una corrida cortada tiene que seguir sirviendo
+    diario = RunJournal(ruta_diario, parametros, diario_anterior) if reanudar else None
+    sink = SinkConDiario(salida, diario) if diario is not None else DirectorySink(salida)
+
+    def lotes():
+        # (valores o None si el archivo se reutiliza, datos de la ficha) en lotes para los workers
+        nonlocal reutilizadas
+        lote = []
+        for datos_titular, num_pasajeros, acompanantes, todas_habitaciones in fichas:
+            nombre_archivo = f"ficha_voucher_{datos_titular.voucher}.pdf"
+            nombre_salida = os.path.join(salida, nombre_archivo)
+            try:
+                clave = hash_ficha(datos_titular, num_pasajeros, acompanantes, todas_habitaciones)
+                anterior = anteriores.get(datos_titular.voucher)
+                if anterior and anterior[0] == clave and os.path.exists(nombre_salida) and file_sha256(nombre_salida) == anterior[1]:
+                    reutilizadas += 1
+                    valores = None
+                else:
+                    valores = valores_ficha(datos_titular, acompanantes, todas_habitaciones)
+            except Exception as e:
+                print(f"Error al generar {nombre_salida}: {e}")
+                continue
+            lote.append((valores, (datos_titular.voucher, nombre_archivo, nombre_salida, clave, anterior)))
+            if len(lote) == FICHAS_POR_LOTE:
+                yield lote
+                lote = []
+        if lote:
+            yield lote
+
+    def trabajos():
+        # Los workers (o este proceso) renderizan el texto; acá se arma cada archivo
+        # y un hilo aparte lo escribe (ver common.print_queue)
+        for lote, contenidos in perfil.iterate("overlay", iterar_contenidos(lotes(), layout, motor, workers)):
+            for (valores, (voucher, nombre_archivo, nombre_salida, clave, anterior)), (contenido, error) in zip(lote, contenidos):
+                if valores is None:
+                    archivos[voucher] = anterior
+                    generadas.append(nombre_salida)
+                    continue
+                if error is not None:
+                    print(f"Error al generar {nombre_salida}: {error}")
+                    continue
+                perfil.count("pages")
+                with perfil.stage("write"):
+                    datos = base.render(contenido)
+                    archivos[voucher] = [clave, hashlib.sha256(datos).hexdigest()]
+                generadas.append(nombre_salida)
+                if diario is not None:
+                    sink.entradas[nombre_archivo] = (voucher, archivos[voucher])
+                yield PrintJob(name=nombre_archivo, data=datos)
+
+    try:
+        run_print_queue(trabajos(), sink, profiler=perfil, verbose=False)
+    except BaseException:
+        # El diario queda para que la próxima corrida retome desde acá
+        if diario is not None:
+            diario.close()
+        raise
+
+    if anteriores:
+        print(f"♻️ Fichas sin cambios (no se regeneran): {reutilizadas}/{len(generadas)}")
+    if incremental:
+        with perfil.stage("manifest"):
+            write_manifest(ruta_manifiesto, parametros, files=archivos)
+    if diario is not None:
+        diario.finish()
+    return generadas
+
+
+def generar_trabajos_impresion(fichas, sink, plantilla=None, paginas_por_trabajo=DEFAULT_JOB_PAGES, layout=POSICIONES_JSON, motor="reportlab", perfil=None, prefijo="fichas", optimizar=True):
+    """
+    Genera las fichas en trabajos de impresión de ``paginas_por_trabajo`` páginas.
+
+    Cada trabajo es un PDF completo (<prefijo>_0001.pdf...) que se entrega a ``sink``
+    (carpeta de spool o comando tipo ``lp``, ver common.print_queue) mientras se
+    renderizan los siguientes, así las primeras fichas se imprimen antes de que
+    termine el lote y en memoria hay a lo sumo un par de trabajos.
+
+    Args:
+        fichas: iterable de tuplas (datos_titular, num_pasajeros, acompanantes, todas_habitaciones)
+        sink: DirectorySink o CommandSink que recibe cada trabajo
+        plantilla: plantilla ya cargada con cargar_plantilla() (se lee fichaPax.pdf si no se indica)
+        paginas_por_trabajo: fichas por trabajo de impresión
+        layout: ruta del JSON de posiciones de los campos (default: positions.json)
+        motor: "reportlab" (default) o "direct"
+        perfil: StageProfiler para medir etapas con --profile (opcional)
+        prefijo: comienzo del nombre de cada trabajo
+        optimizar: si es True (default), cada trabajo pasa por common.pdf_optimize
+
+    Returns:
+        list con las rutas de los trabajos entregados
+    """
+    if motor not in ENGINES:
+        raise ValueError(f"Motor de render desconocido: {motor}")
+    if paginas_por_trabajo < 1:
+        raise ValueError(f"Las páginas por trabajo deben ser 1 o más: {paginas_por_trabajo}")
+    from pypdf import PdfWriter
+
+    from common.pdf_optimize import optimize_writer
+    from common.pdf_stamp import attach_template_form
+
+    perfil = perfil or NULL_PROFILER
+    with perfil.stage("template"):
+        if plantilla is None:
+            plantilla = cargar_plantilla()
+
+    def trabajos():
+        pendientes = iter(fichas)
+        numero = 0
+        while True:
+            lote = list(islice(pendientes, paginas_por_trabajo))
+            if not lote:
+                return
+            numero += 1
+            output = PdfWriter()
+            stamp = attach_template_form(output, plantilla)
+            fuentes = registrar_fuentes(output, layout) if motor == "direct" else None
+            for datos_titular, num_pasajeros, acompanantes, todas_habitaciones in lote:
+                agregar_ficha(output, stamp, datos_titular, num_pasajeros, acompanantes, todas_habitaciones, layout, fuentes, perfil)
+            if optimizar:
+                with perfil.stage("optimize"):
+                    optimize_writer(output)
+            buffer = io.BytesIO()
+            with perfil.stage("write"):
+                output.write(buffer)
+            yield PrintJob(name=f"{prefijo}_{numero:04d}.pdf", data=buffer.getvalue(), pages=len(lote))
+
+    return run_print_queue(trabajos(), sink, profiler=perfil)
+
+
+def generar_ficha_sobre_original(datos_titular, num_pasajeros, nombre_salida, acompanantes=[], todas_habitaciones=[], plantilla=None, layout=POSICIONES_JSON):
     """
     Genera una ficha sobreponiéndole los datos al PDF original.
     
     Args:
-        datos_titular: dict con los datos del titular
+        datos_titular: Passenger con los datos del titular
         num_pasajeros: int con el total de personas
         nombre_salida: str con la ruta del archivo de salida
-        acompanantes: list de dicts con los datos de los acompañantes
+        acompanantes: list de Passenger con los datos de los acompañantes
         todas_habitaciones: list con todos los números de habitación del grupo
+        plantilla: plantilla ya cargada con cargar_plantilla() (opcional)
+        layout: ruta del JSON de posiciones de los campos (opcional)
     """
     try:
-        # Leer el PDF original (ruta relativa al script)
-        pdf_path = os.path.join(os.path.dirname(__file__), "fichaPax.pdf")
-        pdf_original = PdfReader(pdf_path)
-        
-        # Crear overlay con los datos
-        overlay_packet = crear_overlay_datos(datos_titular, num_pasajeros, acompanantes, todas_habitaciones)
-        overlay_pdf = PdfReader(overlay_packet)
-        
-        # Crear writer
-        output = PdfWriter()
-        
-        # Obtener la página original
-        page = pdf_original.pages[0]
-        
-        # Superponer los datos
-        page.merge_page(overlay_pdf.pages[0])
-        
-        # Agregar la página al output
-        output.add_page(page)
-        
-        # Guardar
-        with open(nombre_salida, "wb") as output_file:
-            output.write(output_file)
-        
+        generar_fichas_en_lote(
+            [(datos_titular, num_pasajeros, acompanantes, todas_habitaciones)],
+            nombre_salida,
+            combinado=True,
+            plantilla=plantilla,
+            layout=layout,
+        )
         return True
         
     except Exception as e:
@@ -213,7 +568,13 @@ if __name__ == "__main__":
     # Habitaciones (familia Brovia tiene 114 y 116)
     habitaciones_ejemplo = ['114', '116']
     
-    ok = generar_ficha_sobre_original(datos_ejemplo, 5, "test_overlay.pdf", acompanantes_ejemplo, habitaciones_ejemplo)
+    ok = generar_ficha_sobre_original(
+        Passenger.from_row(datos_ejemplo),
+        5,
+        "test_overlay.pdf",
+        [Passenger.from_row(acomp) for acomp in acompanantes_ejemplo],
+        habitaciones_ejemplo,
+    )
     if ok:
         print("✅ Ficha de prueba generada: test_overlay.pdf")
     else:
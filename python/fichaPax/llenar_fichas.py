@@ -1,120 +1,293 @@
-﻿import csv
-import os
-from collections import defaultdict
-from datetime import datetime
-
-
-# Configuración
-CSV_DATOS = 'consultaRegimenReport.csv'  # Usuario debe proporcionar su propio archivo CSV
-
-
-def agrupar_por_voucher(csv_path):
-    """
-    Agrupa los registros por número de voucher y retorna un diccionario
-    donde cada voucher contiene una lista de todos los pasajeros asociados.
-    """
-    vouchers = defaultdict(list)
-    
-    with open(csv_path, mode='r', encoding='utf-8') as csvfile:
-        reader = csv.DictReader(csvfile)
-        for fila in reader:
-            voucher_num = fila['Voucher']
-            vouchers[voucher_num].append(fila)
-    
-    return vouchers
-
-
-def obtener_titular_y_acompanantes(pasajeros):
-    """
-    Selecciona el titular del grupo (persona de mayor edad) y retorna
-    también la lista de acompañantes.
-    
-    Returns:
-        tuple: (titular, lista_acompanantes)
-    """
-    # Ordenar por edad de forma descendente
-    pasajeros_ordenados = sorted(pasajeros, key=lambda x: int(x['Edad']), reverse=True)
-    titular = pasajeros_ordenados[0]
-    
-    # Los acompañantes son todos excepto el titular
-    acompanantes = [p for p in pasajeros_ordenados[1:]]
-    
-    return titular, acompanantes
-
-
-def llenar_pdf(datos_titular, num_pasajeros, acompanantes=[], todas_habitaciones=[]):
-    """
-    Genera un PDF con los datos del titular del voucher usando el PDF original.
-    """
-    from generar_con_overlay import generar_ficha_sobre_original
-    
-    voucher = datos_titular['Voucher']
-    # Nombre del archivo de salida basado en voucher
-    nombre_salida = f"fichas/ficha_voucher_{voucher}.pdf"
-    
-    try:
-        # Generar la ficha sobreponiéndole datos al PDF original
-        ok = generar_ficha_sobre_original(datos_titular, num_pasajeros, nombre_salida, acompanantes, todas_habitaciones)
-        if ok:
-            return True
-        else:
-            print(f"Error: generar_ficha_sobre_original devolvió False para {nombre_salida}")
-            return False
-    except Exception as e:
-        print(f"Error al generar PDF: {e}")
-        return False
-
-
-def main():
-    # Crear carpeta de salida si no existe
-    if not os.path.exists('fichas'):
-        os.makedirs('fichas')
-    
-    print("=" * 60)
-    print("Generador de Fichas de Pasajeros")
-    print("=" * 60)
-    
-    # Agrupar pasajeros por voucher
-    vouchers = agrupar_por_voucher(CSV_DATOS)
-    
-    print(f"\nTotal de vouchers encontrados: {len(vouchers)}")
-    print("-" * 60)
-    
-    fichas_generadas = 0
-    
-    # Procesar cada voucher
-    for voucher_num, pasajeros in vouchers.items():
-        num_pasajeros = len(pasajeros)
-        titular, acompanantes = obtener_titular_y_acompanantes(pasajeros)
-        
-        # Extraer todas las habitaciones únicas del grupo
-        todas_habitaciones = list(set([p['Nro. habitación'] for p in pasajeros]))
-        
-        print(f"\nVoucher: {voucher_num}")
-        print(f"  - Cantidad de pasajeros: {num_pasajeros}")
-        print(f"  - Titular: {titular['Apellido y nombre']} (Edad: {titular['Edad']})")
-        
-        if len(todas_habitaciones) > 1:
-            print(f"  - Habitaciones: {', '.join(sorted(todas_habitaciones))}")
-        else:
-            print(f"  - Habitación: {todas_habitaciones[0]}")
-        
-        if acompanantes:
-            print(f"  - Acompañantes: {len(acompanantes)}")
-            for acomp in acompanantes[:3]:  # Mostrar máximo 3
-                print(f"    • {acomp['Apellido y nombre']} - DNI {acomp['Nro. doc.']}")
-        
-        # Generar la ficha para el titular con sus acompañantes y habitaciones
-        if llenar_pdf(titular, num_pasajeros, acompanantes, todas_habitaciones):
-            fichas_generadas += 1
-            print(f"  ✓ Ficha generada: ficha_voucher_{voucher_num}.pdf")
-        else:
-            print(f"  ✗ Error al generar ficha")
-    
-    print("\n" + "=" * 60)
-    print(f"Proceso completado: {fichas_generadas} fichas generadas")
-    print("=" * 60)
-
-
-if __name__ == "__main__":
-    main()
+﻿import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from common.csv_cache import load_groups  # noqa: E402
+from common.passenger_index import load_index  # noqa: E402
+from common.pdf_text import ENGINES  # noqa: E402
+from common.profiling import NULL_PROFILER, PROFILE_MODES, StageProfiler, profile_run  # noqa: E402
+from common.records import Passenger, group_passengers  # noqa: E402
+from common.regimen_csv import iter_export_rows  # noqa: E402
+from common.print_queue import DEFAULT_JOB_PAGES, CommandSink, DirectorySink  # noqa: E402
+from generar_con_overlay import (  # noqa: E402
+    POSICIONES_JSON,
+    generar_fichas_en_lote,
+    generar_trabajos_impresion,
+)
+
+
+# Configuración
+CSV_DATOS = 'consultaRegimenReport.csv'  # Usuario debe proporcionar su propio archivo CSV
+CARPETA_FICHAS = 'fichas'
+
+
+def agrupar_por_voucher(csv_path, perfil=None, usar_cache=True):
+    """
+    Agrupa los registros por número de voucher y retorna un diccionario
+    donde cada voucher contiene un VoucherGroup con todos los pasajeros asociados.
+
+    Por defecto los grupos se leen de la caché binaria del CSV (ver
+    common.csv_cache); con ``usar_cache=False`` se vuelve a leer el texto.
+    """
+    perfil = perfil or NULL_PROFILER
+    if usar_cache:
+        with perfil.stage("csv"):
+            return load_groups(csv_path)
+    filas = perfil.iterate("csv", (Passenger.from_row(fila) for fila in iter_export_rows(csv_path)))
+    with perfil.stage("group"):
+        return group_passengers(filas)
+
+
+def buscar_vouchers(csv_path, consulta, perfil=None):
+    """
+    Busca en el índice del CSV (ver common.passenger_index) los vouchers que
+    corresponden a ``consulta``: número de voucher, DNI o prefijo del apellido.
+
+    Returns:
+        dict voucher -> VoucherGroup, igual que agrupar_por_voucher pero solo con los encontrados
+    """
+    perfil = perfil or NULL_PROFILER
+    with perfil.stage("index"):
+        indice = load_index(csv_path)
+    inicio = time.perf_counter()
+    encontrados = indice.find(consulta)
+    demora_ms = (time.perf_counter() - inicio) * 1000
+    print(f"ℹ️ Búsqueda '{consulta}': {len(encontrados)} voucher(s) en {demora_ms:.3f} ms")
+    return {voucher: indice.group(voucher) for voucher in encontrados}
+
+
+def obtener_titular_y_acompanantes(pasajeros):
+    """
+    Selecciona el titular del grupo (persona de mayor edad) y retorna
+    también la lista de acompañantes.
+    
+    Returns:
+        tuple: (titular, lista_acompanantes)
+    """
+    # Ordenar por edad de forma descendente
+    pasajeros_ordenados = sorted(pasajeros, key=lambda x: x.age, reverse=True)
+    titular = pasajeros_ordenados[0]
+    
+    # Los acompañantes son todos excepto el titular
+    acompanantes = [p for p in pasajeros_ordenados[1:]]
+    
+    return titular, acompanantes
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Genera las fichas de pasajeros sobre fichaPax.pdf")
+    parser.add_argument("--csv", default=CSV_DATOS, help=f"CSV de reservas (default: {CSV_DATOS})")
+    parser.add_argument(
+        "--combinado",
+        nargs="?",
+        const=f"{CARPETA_FICHAS}/fichas.pdf",
+        default=None,
+        metavar="RUTA",
+        help=f"Genera un único PDF multipágina (default: {CARPETA_FICHAS}/fichas.pdf) en lugar de un archivo por voucher",
+    )
+    parser.add_argument(
+        "--spool-dir",
+        default=None,
+        help="Deja las fichas en trabajos de --job-pages páginas en esta carpeta a medida que se renderizan",
+    )
+    parser.add_argument(
+        "--print-command",
+        default=None,
+        help=f"Comando que recibe cada trabajo apenas está listo, p. ej. \"lp -d HP\" (default de carpeta: {CARPETA_FICHAS}/spool)",
+    )
+    parser.add_argument(
+        "--job-pages",
+        type=int,
+        default=DEFAULT_JOB_PAGES,
+        help=f"Fichas por trabajo con --spool-dir/--print-command (default: {DEFAULT_JOB_PAGES})",
+    )
+    parser.add_argument(
+        "--no-incremental",
+        dest="incremental",
+        action="store_false",
+        help="Regenera todas las fichas aunque no hayan cambiado desde la corrida anterior",
+    )
+    parser.add_argument(
+        "--no-optimize",
+        dest="optimizar",
+        action="store_false",
+        help="Escribe los PDFs sin la pasada de optimización (recursos compartidos, objetos repetidos unificados)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Procesos que renderizan las fichas en paralelo, con un archivo por voucher (default: 1)",
+    )
+    parser.add_argument(
+        "--layout",
+        default=POSICIONES_JSON,
+        help="JSON con las posiciones de los campos (default: positions.json junto a fichaPax.pdf)",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default="reportlab",
+        help=(
+            "Motor del overlay de texto: reportlab (default) o direct (content stream sin reportlab, más rápido; "
+            "los caracteres fuera de cp1252 salen como '?' en lugar del cuadrado negro de reportlab)"
+        ),
+    )
+    parser.add_argument(
+        "--find",
+        default=None,
+        metavar="TEXTO",
+        help="Genera solo las fichas que coinciden: número de voucher, DNI o comienzo del apellido (sin tildes)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        dest="usar_cache",
+        action="store_false",
+        help="Lee el CSV como texto en lugar de usar su caché binaria (<csv>.cache)",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Solo muestra las fichas que se generarían, sin cargar reportlab/pypdf ni escribir PDFs",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="stages",
+        choices=PROFILE_MODES,
+        default=None,
+        help="Mide tiempo por etapa, páginas/s y bytes escritos; 'cprofile' o 'tracemalloc' agregan ese detalle",
+    )
+    parser.add_argument(
+        "--profile-output",
+        default=None,
+        help=f"JSON del perfil (default: {CARPETA_FICHAS}/profile.json)",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.workers < 1:
+        raise ValueError(f"--workers debe ser 1 o mayor: {args.workers}")
+
+    # Crear carpeta de salida si no existe
+    if (not args.dry_run or args.profile) and not os.path.exists(CARPETA_FICHAS):
+        os.makedirs(CARPETA_FICHAS)
+
+    perfil = StageProfiler() if args.profile else None
+    with profile_run(perfil, args.profile, args.profile_output or os.path.join(CARPETA_FICHAS, "profile.json")):
+        generar(args, perfil)
+
+
+def generar(args, perfil=None):
+    """
+    Lee el CSV, arma las fichas de cada voucher y las genera en un solo lote.
+    """
+    print("=" * 60)
+    print("Generador de Fichas de Pasajeros")
+    print("=" * 60)
+    
+    # Agrupar pasajeros por voucher (con --find, solo los que coinciden según el índice)
+    if args.find:
+        vouchers = buscar_vouchers(args.csv, args.find, perfil)
+        if not vouchers:
+            print(f"⚠️ Ningún voucher coincide con '{args.find}'")
+            return
+    else:
+        vouchers = agrupar_por_voucher(args.csv, perfil, args.usar_cache)
+    
+    print(f"\nTotal de vouchers encontrados: {len(vouchers)}")
+    print("-" * 60)
+    
+    fichas = []
+    
+    # Procesar cada voucher
+    for voucher_num, grupo in vouchers.items():
+        pasajeros = grupo.passengers
+        num_pasajeros = len(pasajeros)
+        titular, acompanantes = obtener_titular_y_acompanantes(pasajeros)
+        
+        # Extraer todas las habitaciones únicas del grupo
+        todas_habitaciones = list(set([p.room for p in pasajeros]))
+        
+        print(f"\nVoucher: {voucher_num}")
+        print(f"  - Cantidad de pasajeros: {num_pasajeros}")
+        print(f"  - Titular: {titular.name} (Edad: {titular.age})")
+        
+        if len(todas_habitaciones) > 1:
+            print(f"  - Habitaciones: {', '.join(sorted(todas_habitaciones))}")
+        else:
+            print(f"  - Habitación: {todas_habitaciones[0]}")
+        
+        if acompanantes:
+            print(f"  - Acompañantes: {len(acompanantes)}")
+            for acomp in acompanantes[:3]:  # Mostrar máximo 3
+                print(f"    • {acomp.name} - DNI {acomp.doc_number}")
+        
+        # La ficha del titular con sus acompañantes y habitaciones se genera en el lote
+        fichas.append((titular, num_pasajeros, acompanantes, todas_habitaciones))
+    
+    if args.dry_run:
+        print("\n" + "=" * 60)
+        print(f"Vista previa: se generarían {len(fichas)} fichas (no se escribió ningún PDF)")
+        print("=" * 60)
+        return
+
+    # Generar todas las fichas con una única carga de la plantilla (la hace cada generador)
+    if args.spool_dir or args.print_command:
+        carpeta_spool = args.spool_dir or os.path.join(CARPETA_FICHAS, "spool")
+        sink = CommandSink(args.print_command, carpeta_spool) if args.print_command else DirectorySink(carpeta_spool)
+        trabajos = generar_trabajos_impresion(
+            fichas,
+            sink,
+            paginas_por_trabajo=args.job_pages,
+            layout=args.layout,
+            motor=args.engine,
+            perfil=perfil,
+            optimizar=args.optimizar,
+        )
+        fichas_generadas = len(fichas)
+        print(f"\n  ✓ {len(trabajos)} trabajo(s) de impresión en {carpeta_spool}")
+    elif args.combinado:
+        generadas = generar_fichas_en_lote(
+            fichas,
+            args.combinado,
+            combinado=True,
+            incremental=args.incremental and not args.find,
+            layout=args.layout,
+            motor=args.engine,
+            perfil=perfil,
+            optimizar=args.optimizar,
+        )
+        fichas_generadas = len(fichas)
+        print(f"\n  ✓ PDF combinado generado: {generadas[0]}")
+    else:
+        generadas = generar_fichas_en_lote(
+            fichas,
+            CARPETA_FICHAS,
+            combinado=False,
+            incremental=args.incremental and not args.find,
+            layout=args.layout,
+            motor=args.engine,
+            perfil=perfil,
+            workers=args.workers,
+            # Con --find se regeneran las fichas pedidas aunque una corrida cortada las haya dejado
+            reanudar=not args.find,
+            optimizar=args.optimizar,
+        )
+        fichas_generadas = len(generadas)
+        if fichas_generadas > 1:
+            print(f"\nℹ️ Para imprimir el día en un solo trabajo (y ~{fichas_generadas} veces menos espacio) usá --combinado")
+    
+    print("\n" + "=" * 60)
+    print(f"Proceso completado: {fichas_generadas} fichas generadas")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
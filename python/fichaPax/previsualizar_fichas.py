@@ -1,6 +1,9 @@
-import csv
-from collections import defaultdict
-import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from common.csv_cache import load_groups  # noqa: E402
 
 # Configuración
 CSV_DATOS = 'ingresos26_12.csv'
@@ -8,17 +11,10 @@ CSV_DATOS = 'ingresos26_12.csv'
 
 def agrupar_por_voucher(csv_path):
     """
-    Agrupa los registros por número de voucher.
+    Agrupa los registros por número de voucher (desde la caché binaria del CSV,
+    ver common.csv_cache). Retorna voucher -> lista de Passenger.
     """
-    vouchers = defaultdict(list)
-    
-    with open(csv_path, mode='r', encoding='utf-8') as csvfile:
-        reader = csv.DictReader(csvfile)
-        for fila in reader:
-            voucher_num = fila['Voucher']
-            vouchers[voucher_num].append(fila)
-    
-    return vouchers
+    return {voucher: grupo.passengers for voucher, grupo in load_groups(csv_path).items()}
 
 
 def obtener_titular_y_acompanantes(pasajeros):
@@ -26,7 +22,7 @@ def obtener_titular_y_acompanantes(pasajeros):
     Selecciona el titular del grupo (persona de mayor edad) y retorna
     también la lista de acompañantes.
     """
-    pasajeros_ordenados = sorted(pasajeros, key=lambda x: int(x['Edad']), reverse=True)
+    pasajeros_ordenados = sorted(pasajeros, key=lambda x: x.age, reverse=True)
     titular = pasajeros_ordenados[0]
     acompanantes = [p for p in pasajeros_ordenados[1:]]
     return titular, acompanantes
@@ -59,22 +55,22 @@ def main():
         
         # Datos que se rellenarán en el PDF
         datos_ficha = {
-            'Nombre': titular['Apellido y nombre'],
-            'DNI': titular['Nro. doc.'],
-            'Tipo_doc': titular['Tipo documento'],
-            'Edad': titular['Edad'],
-            'Fecha_nac': titular['Fecha de nacimiento'],
-            'Habitación': titular['Nro. habitación'],
-            'Tipo_hab': titular['Tipo habitación'],
-            'Voucher': titular['Voucher'],
-            'Check-in': titular['Fecha de ingreso'],
-            'Check-out': titular['Fecha de egreso'],
-            'Sede': titular['Sede'],
-            'Email': mostrar_campo(titular['Email']),
-            'Teléfono': mostrar_campo(titular['Teléfono']),
-            'Celular': mostrar_campo(titular['Celular']),
-            'Entidad': titular['Entidad'],
-            'Paquete': titular['Paquete'],
+            'Nombre': titular.name,
+            'DNI': titular.doc_number,
+            'Tipo_doc': titular.doc_type,
+            'Edad': titular.age,
+            'Fecha_nac': titular.birth_date,
+            'Habitación': titular.room,
+            'Tipo_hab': titular.room_type,
+            'Voucher': titular.voucher,
+            'Check-in': titular.from_date,
+            'Check-out': titular.to_date,
+            'Sede': titular.sede,
+            'Email': mostrar_campo(titular.email),
+            'Teléfono': mostrar_campo(titular.phone),
+            'Celular': mostrar_campo(titular.mobile),
+            'Entidad': titular.entity,
+            'Paquete': titular.package,
             'Nº Pasajeros': str(num_pasajeros)
         }
         
@@ -87,7 +83,7 @@ def main():
         if acompanantes:
             print(f"\n👥 ACOMPAÑANTES (se incluirán en la ficha):")
             for i, acomp in enumerate(acompanantes[:3], 1):  # Máximo 3
-                print(f"  {i}. {acomp['Apellido y nombre']} - DNI {acomp['Nro. doc.']}")
+                print(f"  {i}. {acomp.name} - DNI {acomp.doc_number}")
             if len(acompanantes) > 3:
                 print(f"  ⚠️  Nota: Hay {len(acompanantes) - 3} acompañante(s) más que no caben en la ficha")
         
@@ -95,7 +91,7 @@ def main():
         if num_pasajeros > 1:
             print(f"\n📝 GRUPO COMPLETO ({num_pasajeros} personas):")
             for i, pasajero in enumerate(pasajeros, 1):
-                print(f"  {i}. {pasajero['Apellido y nombre']} - {pasajero['Edad']} años - DNI {pasajero['Nro. doc.']}")
+                print(f"  {i}. {pasajero.name} - {pasajero.age} años - DNI {pasajero.doc_number}")
     
     print(f"\n{'═' * 80}")
     print(f"✅ Se generarán {len(vouchers)} fichas PDF (una por voucher)")
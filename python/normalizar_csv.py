@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Deja una copia normalizada del export de regimen (ver ``common.regimen_csv``).
+
+Detecta una sola vez codificación, separador y formato, vuelve a unir las
+observaciones partidas por comas y escribe ``<csv>_normalizado.csv``: UTF-8,
+separado por comas, una fila por línea y todas con la misma cantidad de
+campos. Las páginas del cliente y los scripts Python lo leen tal cual.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from common.regimen_csv import detect_format, normalized_path_for, write_normalized  # noqa: E402
+
+
+SHOWN_LINES = 10
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Normaliza el CSV exportado del sistema de reservas")
+    parser.add_argument("--csv", required=True, help="CSV exportado (consultaRegimenReport.csv o formato viejo)")
+    parser.add_argument("--output", default=None, help="Archivo de salida (default: <csv>_normalizado.csv)")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if not os.path.exists(args.csv):
+        raise FileNotFoundError(f"No se encontró el CSV: {args.csv}")
+    output_path = args.output or normalized_path_for(args.csv)
+    if os.path.abspath(output_path) == os.path.abspath(args.csv):
+        raise ValueError("La salida no puede ser el mismo CSV de entrada")
+
+    start = time.perf_counter()
+    export_format = detect_format(args.csv)
+    output_path, stats = write_normalized(args.csv, output_path)
+    elapsed = time.perf_counter() - start
+
+    delimiter = {"\t": "tab"}.get(export_format.delimiter, export_format.delimiter)
+    print(f"ℹ️ Formato {export_format.kind} · {export_format.encoding} · separador '{delimiter}'")
+    print(f"✅ {output_path}: {stats.rows} filas ({elapsed:.2f} s)")
+    if stats.repaired:
+        lines = ", ".join(str(line) for line in stats.repaired_lines[:SHOWN_LINES])
+        more = "…" if stats.repaired > SHOWN_LINES else ""
+        print(f"♻️ {stats.repaired} fila(s) con la observación partida por comas, reparadas (líneas {lines}{more})")
+    if stats.padded:
+        print(f"⚠️ {stats.padded} fila(s) con menos columnas que el encabezado (se completaron vacías)")
+    if stats.without_voucher:
+        print(f"⚠️ {stats.without_voucher} fila(s) sin voucher")
+    if stats.invalid_dates:
+        print(f"⚠️ {stats.invalid_dates} fila(s) con fechas de ingreso/egreso inválidas")
+
+
+if __name__ == "__main__":
+    main()
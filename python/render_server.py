@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""Servicio HTTP local de render de vouchers Alicante y fichas de pasajeros.
+
+Mantiene en memoria las plantillas (``VOUCHER ALICANTE.pdf`` y ``fichaPax.pdf``),
+las fuentes de reportlab y los módulos de render, así cada pedido evita el
+arranque en frío del CLI (imports + parseo de plantillas).
+
+Endpoints:
+    GET  /health                 estado del servicio
+    POST /vouchers               cuerpo: CSV de regimen -> PDF de vouchers Alicante
+                                 (query: x_adjust_mm, y_adjust_mm, slot_1_y_adjust_mm,
+                                 slot_2_y_adjust_mm, slot_3_y_adjust_mm, logo=1)
+    POST /fichas                 cuerpo: CSV de regimen -> PDF combinado de fichas
+                                 (query opcional: voucher=<n> para una sola ficha)
+    POST /ficha                  cuerpo JSON {titular, acompanantes, habitaciones,
+                                 num_pasajeros} con claves de columnas del CSV -> PDF
+
+Todos los POST aceptan ``engine=direct`` para escribir el texto sin reportlab.
+Solo la interfaz web (``ALLOWED_ORIGIN``) puede llamarlo desde el navegador.
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from typing import Dict, List
+from urllib.parse import parse_qs, urlparse
+
+from pypdf import PdfWriter
+
+PYTHON_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(PYTHON_DIR))
+sys.path.insert(0, str(PYTHON_DIR / "vouchersAlicante"))
+sys.path.insert(0, str(PYTHON_DIR / "fichaPax"))
+
+import generar_con_overlay as fichas  # noqa: E402
+import generar_vouchers_overlay as vouchers  # noqa: E402
+from common.layout import load_layout  # noqa: E402
+from common.pdf_optimize import optimize_writer  # noqa: E402
+from common.pdf_stamp import TemplateForm, attach_template_form, load_template_form_from_file  # noqa: E402
+from common.pdf_text import ENGINES  # noqa: E402
+from common.records import Passenger, group_passengers  # noqa: E402
+from common.regimen_csv import decode_export, iter_text_rows  # noqa: E402
+
+
+DEFAULT_PORT = 8001
+# Donde launcher.sh sirve client/ (CORS: otras páginas no pueden leer las respuestas)
+ALLOWED_ORIGIN = "http://localhost:8000"
+MAX_BODY_BYTES = 64 * 1024 * 1024
+
+
+class RenderError(ValueError):
+    """Error de datos del pedido (se responde con 400)."""
+
+
+class RenderEngine:
+    """Plantillas y recursos cargados una sola vez para todo el servicio."""
+
+    def __init__(self, voucher_template_path: str, logo_path: str, optimize: bool = True) -> None:
+        self.voucher_template: TemplateForm = load_template_form_from_file(voucher_template_path)
+        self.ficha_template: TemplateForm = fichas.cargar_plantilla()
+        self.logo_path = logo_path
+        self.optimize = optimize
+
+    def warm_up(self) -> None:
+        """Renderiza una página de cada tipo para cargar fuentes y módulos perezosos."""
+        sample = Passenger(voucher="0", name="CALENTAMIENTO", age=30, room="1")
+        self.render_vouchers([sample], {})
+        self.render_fichas([sample], None)
+
+    def render_vouchers(self, passengers: List[Passenger], options: Dict[str, str]) -> bytes:
+        records = vouchers.group_by_voucher(passengers)
+        if not records:
+            raise RenderError("No se encontraron vouchers en el CSV")
+
+        y_adjust_mm = _float_option(options, "y_adjust_mm", 0.0)
+        slot_count = len(load_layout(vouchers.DEFAULT_LAYOUT_PATH).slots)
+        slot_y_adjusts = vouchers.resolve_slot_y_adjusts(
+            y_adjust_mm,
+            _float_option(options, "slot_1_y_adjust_mm", None),
+            _float_option(options, "slot_2_y_adjust_mm", None),
+            _float_option(options, "slot_3_y_adjust_mm", None),
+            slot_count,
+        )
+
+        writer = PdfWriter()
+        stamp = attach_template_form(writer, self.voucher_template)
+        vouchers.render_chunks(
+            writer,
+            stamp,
+            vouchers.chunk_records(records, slot_count),
+            _float_option(options, "x_adjust_mm", 0.0),
+            y_adjust_mm,
+            self.logo_path,
+            options.get("logo") != "1",
+            slot_y_adjusts,
+            vouchers.DEFAULT_LAYOUT_PATH,
+            _engine_option(options),
+        )
+        return _write(writer, self.optimize)
+
+    def render_fichas(self, passengers: List[Passenger], voucher: str | None, engine: str = "reportlab") -> bytes:
+        groups = group_passengers(passengers)
+        if voucher is not None:
+            groups = {voucher: groups[voucher]} if voucher in groups else {}
+        if not groups:
+            raise RenderError(f"No se encontró el voucher {voucher}" if voucher else "No se encontraron vouchers en el CSV")
+
+        writer = PdfWriter()
+        stamp = attach_template_form(writer, self.ficha_template)
+        fuentes = fichas.registrar_fuentes(writer) if engine == "direct" else None
+        for group in groups.values():
+            titular, acompanantes = group.holder_and_companions()
+            habitaciones = list({p.room for p in group.passengers})
+            fichas.agregar_ficha(writer, stamp, titular, group.pax, acompanantes, habitaciones, fuentes=fuentes)
+        return _write(writer, self.optimize)
+
+    def render_ficha(self, payload: Dict, engine: str = "reportlab") -> bytes:
+        if not isinstance(payload.get("titular"), dict):
+            raise RenderError("Falta 'titular' en el pedido")
+
+        titular = Passenger.from_row(payload["titular"])
+        acompanantes = [Passenger.from_row(row) for row in payload.get("acompanantes") or []]
+        habitaciones = [str(room) for room in payload.get("habitaciones") or [] if str(room).strip()]
+        num_pasajeros = int(payload.get("num_pasajeros") or 1 + len(acompanantes))
+
+        writer = PdfWriter()
+        stamp = attach_template_form(writer, self.ficha_template)
+        fuentes = fichas.registrar_fuentes(writer) if engine == "direct" else None
+        fichas.agregar_ficha(writer, stamp, titular, num_pasajeros, acompanantes, habitaciones, fuentes=fuentes)
+        return _write(writer, self.optimize)
+
+
+def _float_option(options: Dict[str, str], name: str, default: float | None) -> float | None:
+    value = options.get(name)
+    if value in (None, ""):
+        return default
+    try:
+        return float(value)
+    except ValueError as exc:
+        raise RenderError(f"Parámetro inválido {name}={value!r}") from exc
+
+
+def _engine_option(options: Dict[str, str]) -> str:
+    engine = options.get("engine") or "reportlab"
+    if engine not in ENGINES:
+        raise RenderError(f"Motor de render desconocido: {engine}")
+    return engine
+
+
+def _write(writer: PdfWriter, optimize: bool = True) -> bytes:
+    if optimize:
+        optimize_writer(writer)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+def parse_csv_body(body: bytes) -> List[Passenger]:
+    try:
+        rows = list(iter_text_rows(decode_export(body)))
+    except UnicodeDecodeError as exc:
+        raise RenderError("El CSV debe estar codificado en UTF-8 o Windows-1252") from exc
+    except ValueError as exc:
+        raise RenderError(str(exc)) from exc
+    return [Passenger.from_row(row) for row in rows if (row.get("Voucher") or "").strip()]
+
+
+def make_handler(engine: RenderEngine) -> type[BaseHTTPRequestHandler]:
+    class RenderHandler(BaseHTTPRequestHandler):
+        server_version = "SutebaRender/1.0"
+
+        def _send(self, status: int, body: bytes, content_type: str) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Access-Control-Allow-Origin", ALLOWED_ORIGIN)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_json(self, status: int, data: Dict) -> None:
+            self._send(status, json.dumps(data, ensure_ascii=False).encode("utf-8"), "application/json; charset=utf-8")
+
+        def do_OPTIONS(self) -> None:  # noqa: N802 (nombre fijo de BaseHTTPRequestHandler)
+            self.send_response(204)
+            self.send_header("Access-Control-Allow-Origin", ALLOWED_ORIGIN)
+            self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
+            self.send_header("Access-Control-Allow-Headers", "Content-Type")
+            self.end_headers()
+
+        def do_GET(self) -> None:  # noqa: N802
+            if urlparse(self.path).path == "/health":
+                self._send_json(200, {"status": "ok"})
+            else:
+                self._send_json(404, {"error": "Ruta desconocida"})
+
+        def do_POST(self) -> None:  # noqa: N802
+            url = urlparse(self.path)
+            options = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            started = time.perf_counter()
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                if length > MAX_BODY_BYTES:
+                    raise RenderError("El cuerpo del pedido es demasiado grande")
+                body = self.rfile.read(length)
+
+                if url.path == "/vouchers":
+                    pdf = engine.render_vouchers(parse_csv_body(body), options)
+                elif url.path == "/fichas":
+                    pdf = engine.render_fichas(parse_csv_body(body), options.get("voucher"), _engine_option(options))
+                elif url.path == "/ficha":
+                    pdf = engine.render_ficha(json.loads(body.decode("utf-8") or "{}"), _engine_option(options))
+                else:
+                    self._send_json(404, {"error": "Ruta desconocida"})
+                    return
+            except (RenderError, ValueError) as exc:
+                self._send_json(400, {"error": str(exc)})
+                return
+            except Exception as exc:  # pragma: no cover - se informa al cliente
+                self._send_json(500, {"error": f"Error interno: {exc}"})
+                return
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.log_message("%s -> %d bytes en %.1f ms", url.path, len(pdf), elapsed_ms)
+            self._send(200, pdf, "application/pdf")
+
+    return RenderHandler
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Servicio local de render de vouchers Alicante y fichas")
+    parser.add_argument("--host", default="127.0.0.1", help="Interfaz donde escuchar (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Puerto (default: {DEFAULT_PORT})")
+    parser.add_argument(
+        "--template-pdf",
+        default=str(vouchers.SCRIPT_DIR / "VOUCHER ALICANTE.pdf"),
+        help="Plantilla de vouchers Alicante",
+    )
+    parser.add_argument("--logo", default=vouchers.resolve_default_logo_path(), help="Logo para vouchers con logo=1")
+    parser.add_argument(
+        "--no-optimize",
+        dest="optimize",
+        action="store_false",
+        help="Responde los PDFs sin la pasada de optimización (recursos compartidos, objetos repetidos unificados)",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+
+    started = time.perf_counter()
+    engine = RenderEngine(args.template_pdf, args.logo, args.optimize)
+    engine.warm_up()
+    print(f"ℹ️ Plantillas cargadas en {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    server = HTTPServer((args.host, args.port), make_handler(engine))
+    print(f"✅ Servicio de render en http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,79 @@
 #!/usr/bin/env python3
+"""Vouchers Alicante por overlay sobre la plantilla PDF.
+
+reportlab y pypdf se importan recién en las funciones que renderizan: ``--help``,
+los errores de argumentos y ``--dry-run`` no cargan el stack PDF.
+"""
 from __future__ import annotations
 
 import argparse
 import csv
+import heapq
 import io
+import json
 import os
-from collections import defaultdict
-from copy import deepcopy
+import sys
+import tempfile
+import time
+from collections import deque
 from dataclasses import dataclass
+from functools import lru_cache
+from itertools import groupby, islice, repeat
 from pathlib import Path
-from typing import Dict, Iterable, List
-
-from pypdf import PdfReader, PdfWriter
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.units import mm
-from reportlab.pdfgen import canvas
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Tuple
 
 
 SCRIPT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPT_DIR.parent))
+EXTERNAL_SORT_RUN_SIZE = 50_000
+LOGO_FORM_NAME = "/Logo"
+# Cambiar si cambia cómo se dibuja un fragmento, así no se reutilizan los viejos
+FRAGMENT_FORMAT = 2
+CALIBRATION_KEYS = ("x_adjust_mm", "y_adjust_mm", "slot_1_y_adjust_mm", "slot_2_y_adjust_mm", "slot_3_y_adjust_mm")
+DEFAULT_CALIBRATION_PATH = "calibracion.json"
+CALIBRATION_POLL_SECONDS = 0.1
+DEFAULT_LAYOUT_PATH = str(SCRIPT_DIR / "layout.json")
+
+from common.csv_cache import CsvCache, open_cache  # noqa: E402
+from common.fragment_cache import DEFAULT_MAX_BYTES, FragmentCache  # noqa: E402
+from common.layout import CompiledLayout, ImageBox, load_layout, mm  # noqa: E402
+from common.manifest import (  # noqa: E402
+    OutputManifest,
+    PreviousOutput,
+    content_hash,
+    file_sha256,
+    load_previous_output,
+    save_output_manifest,
+)
+from common.pdf_text import (  # noqa: E402
+    ENGINES,
+    attach_standard_fonts,
+    engine_content,
+    engine_font_names,
+    layout_content,
+    placed_content,
+)
+from common.print_queue import (  # noqa: E402
+    DEFAULT_JOB_PAGES,
+    CommandSink,
+    DirectorySink,
+    PrintJob,
+    run_print_queue,
+)
+from common.profiling import NULL_PROFILER, PROFILE_MODES, StageProfiler, profile_run  # noqa: E402
+from common.records import Passenger, VoucherGroup, group_passengers, normalize  # noqa: E402
+from common.regimen_csv import detect_format, iter_export_fields, iter_export_rows  # noqa: E402
+
+if TYPE_CHECKING:
+    from pypdf import PdfWriter
+
+    from common.pdf_stamp import TemplateForm, TemplateStamp
 
 
 @dataclass
 class VoucherRecord:
+    __slots__ = ("voucher", "passenger", "document", "hotel", "room", "from_date", "to_date", "pax")
+
     voucher: str
     passenger: str
     document: str
@@ -32,10 +84,6 @@ class VoucherRecord:
     pax: int
 
 
-def normalize(value: str | None) -> str:
-    return (value or "").strip()
-
-
 def parse_int(value: str | None, default: int = 0) -> int:
     try:
         return int((value or "").strip())
@@ -53,50 +101,171 @@ def format_passenger_name(value: str | None) -> str:
     return normalize(value).upper()
 
 
-def load_csv_rows(csv_path: str) -> List[Dict[str, str]]:
-    with open(csv_path, mode="r", encoding="utf-8") as handle:
-        reader = csv.DictReader(handle)
-        rows = [row for row in reader if normalize(row.get("Voucher"))]
-    return rows
-
+def load_csv_rows(csv_path: str) -> List[Passenger]:
+    return [Passenger.from_row(row) for row in iter_export_rows(csv_path) if normalize(row.get("Voucher"))]
+
+
+def iter_csv_rows(csv_path: str) -> Iterator[Passenger]:
+    """Versión en streaming de ``load_csv_rows``: lee el CSV fila por fila."""
+    for row in iter_export_rows(csv_path):
+        if normalize(row.get("Voucher")):
+            yield Passenger.from_row(row)
+
+
+def is_sorted_by_voucher(csv_path: str) -> bool:
+    """Recorre solo la columna Voucher para saber si el export viene ordenado."""
+    export_format = detect_format(csv_path)
+    column = export_format.columns.index("Voucher")
+
+    previous = ""
+    for fields in iter_export_fields(csv_path, export_format=export_format):
+        voucher = normalize(fields[column])
+        if not voucher:
+            continue
+        if voucher < previous:
+            return False
+        previous = voucher
+    return True
+
+
+def iter_rows_sorted_by_voucher(csv_path: str, run_size: int = EXTERNAL_SORT_RUN_SIZE) -> Iterator[Passenger]:
+    """Ordena el CSV por voucher con un merge externo de tramos en disco.
+
+    Cada tramo de ``run_size`` filas se ordena en memoria y se vuelca a un CSV
+    temporal; después se mezclan todos los tramos con ``heapq.merge``. El número
+    de fila original desempata, así el orden dentro de cada voucher se conserva.
+    """
+
+    def sort_key(item: Tuple[str, int, List[str]]) -> Tuple[str, int]:
+        return item[0], item[1]
+
+    with tempfile.TemporaryDirectory(prefix="vouchers_sort_") as tmp_dir:
+        run_paths: List[str] = []
+        run: List[Tuple[str, int, List[str]]] = []
+
+        def flush_run() -> None:
+            run.sort(key=sort_key)
+            run_path = os.path.join(tmp_dir, f"run_{len(run_paths)}.csv")
+            with open(run_path, mode="w", encoding="utf-8", newline="") as target:
+                writer = csv.writer(target)
+                for voucher, index, values in run:
+                    writer.writerow([voucher, index, *values])
+            run_paths.append(run_path)
+            run.clear()
+
+        for index, passenger in enumerate(iter_csv_rows(csv_path)):
+            run.append((passenger.voucher, index, passenger.to_values()))
+            if len(run) >= run_size:
+                flush_run()
+        if run:
+            flush_run()
+
+        def read_run(run_path: str) -> Iterator[Tuple[str, int, List[str]]]:
+            with open(run_path, mode="r", encoding="utf-8", newline="") as source:
+                for voucher, index, *values in csv.reader(source):
+                    yield voucher, int(index), values
+
+        for _, _, values in heapq.merge(*(read_run(path) for path in run_paths), key=sort_key):
+            yield Passenger.from_values(values)
+
+
+def build_voucher_record(group: VoucherGroup) -> VoucherRecord:
+    holder = group.holder()
+
+    return VoucherRecord(
+        voucher=group.voucher,
+        passenger=format_passenger_name(holder.name),
+        document=extract_document_number(holder.doc_number),
+        hotel=holder.hotel,
+        room=", ".join(group.rooms()),
+        from_date=holder.from_date,
+        to_date=holder.to_date,
+        pax=group.pax,
+    )
 
-def select_holder(rows: List[Dict[str, str]]) -> Dict[str, str]:
-    with_age = sorted(rows, key=lambda row: parse_int(row.get("Edad"), -1), reverse=True)
-    return with_age[0] if with_age else rows[0]
 
+def group_by_voucher(rows: Iterable[Passenger]) -> List[VoucherRecord]:
+    records = [build_voucher_record(group) for group in group_passengers(rows).values()]
+    records.sort(key=lambda item: item.voucher)
+    return records
 
-def group_by_voucher(rows: Iterable[Dict[str, str]]) -> List[VoucherRecord]:
-    groups: Dict[str, List[Dict[str, str]]] = defaultdict(list)
-    for row in rows:
-        groups[normalize(row.get("Voucher"))].append(row)
 
-    records: List[VoucherRecord] = []
-    for voucher, group_rows in groups.items():
-        holder = select_holder(group_rows)
-        rooms = sorted({normalize(r.get("Nro. habitación")) for r in group_rows if normalize(r.get("Nro. habitación"))})
+def iter_cached_voucher_records(cache: CsvCache) -> Iterator[VoucherRecord]:
+    """``group_by_voucher`` calculado sobre las columnas de la caché del CSV.
 
-        nro_doc = extract_document_number(holder.get("Nro. doc."))
+    No arma un ``Passenger`` por fila: cada grupo ya es un tramo contiguo de
+    filas, el titular sale del máximo de la columna de edades (el primero si
+    hay empate, como ``VoucherGroup.holder``) y solo se decodifican los
+    strings que van impresos en el voucher.
+    """
+    string = cache.string
+    ages = cache.column("age").tolist()
+    rooms = cache.column("room").tolist()
+    names, documents, hotels, from_dates, to_dates = (
+        cache.column(attr) for attr in ("name", "doc_number", "hotel", "from_date", "to_date")
+    )
 
-        records.append(
-            VoucherRecord(
-                voucher=voucher,
-                passenger=format_passenger_name(holder.get("Apellido y nombre")),
-                document=nro_doc,
-                hotel=normalize(holder.get("Descripción")),
-                room=", ".join(rooms),
-                from_date=normalize(holder.get("Fecha de ingreso")),
-                to_date=normalize(holder.get("Fecha de egreso")),
-                pax=len(group_rows),
-            )
+    for voucher, start, count in sorted((string(voucher_id), start, count) for voucher_id, start, count in cache.group_spans()):
+        if not voucher:
+            continue
+        group_ages = ages[start : start + count]
+        holder = start + group_ages.index(max(group_ages))
+        group_rooms = sorted(room for room in map(string, set(rooms[start : start + count])) if room)
+        yield VoucherRecord(
+            voucher=voucher,
+            passenger=format_passenger_name(string(names[holder])),
+            document=extract_document_number(string(documents[holder])),
+            hotel=string(hotels[holder]),
+            room=", ".join(group_rooms),
+            from_date=string(from_dates[holder]),
+            to_date=string(to_dates[holder]),
+            pax=count,
         )
 
-    records.sort(key=lambda item: item.voucher)
-    return records
 
+def iter_voucher_records(
+    csv_path: str, profiler: StageProfiler | None = None, use_cache: bool = True
+) -> Iterator[VoucherRecord]:
+    """Produce los VoucherRecord en orden de voucher sin materializar el CSV.
+
+    Por defecto los registros se calculan sobre las columnas de la caché
+    binaria del CSV (ver ``iter_cached_voucher_records``). Con ``use_cache=False``
+    se lee el texto: si el export ya viene ordenado por voucher, cada grupo se
+    emite apenas aparece la fila del voucher siguiente; si no, se ordena con un
+    merge externo en disco. En todos los casos el resultado es el de
+    ``group_by_voucher``.
+    """
+    profiler = profiler or NULL_PROFILER
+    if use_cache:
+        with profiler.stage("csv"):
+            cache = open_cache(csv_path)
+        for record in profiler.iterate("group", iter_cached_voucher_records(cache)):
+            profiler.count("vouchers")
+            yield record
+        return
+
+    with profiler.stage("csv"):
+        sorted_input = is_sorted_by_voucher(csv_path)
+    if sorted_input:
+        rows = iter_csv_rows(csv_path)
+    else:
+        rows = iter_rows_sorted_by_voucher(csv_path)
+    rows = profiler.iterate("csv", rows)
+
+    for voucher, group_rows in groupby(rows, key=lambda passenger: passenger.voucher):
+        with profiler.stage("group"):
+            record = build_voucher_record(VoucherGroup(voucher, list(group_rows)))
+        profiler.count("vouchers")
+        yield record
 
-def chunk_records(records: List[VoucherRecord], chunk_size: int = 3) -> Iterable[List[VoucherRecord]]:
-    for index in range(0, len(records), chunk_size):
-        yield records[index : index + chunk_size]
+
+def chunk_records(records: Iterable[VoucherRecord], chunk_size: int = 3) -> Iterator[List[VoucherRecord]]:
+    iterator = iter(records)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
 
 
 def resolve_default_logo_path() -> str:
@@ -147,6 +316,71 @@ def resolve_output_path(path_value: str) -> str:
     return str(SCRIPT_DIR / path_obj)
 
 
+def slot_origins(
+    layout: CompiledLayout,
+    slot_count: int,
+    x_adjust_mm: float,
+    y_adjust_mm: float,
+    slot_y_adjusts: list[float] | None = None,
+) -> List[Tuple[float, float]]:
+    """Devuelve el origen (x, y) en puntos de cada slot de la página, con los ajustes aplicados."""
+    x_adjust = x_adjust_mm * mm
+    y_adjust = y_adjust_mm * mm
+
+    # Si hay ajustes por slot, usarlos; sino usar el ajuste global
+    if slot_y_adjusts is None:
+        slot_y_adjusts = [y_adjust] * len(layout.slots)
+    else:
+        # Convertir a mm; los slots del layout sin ajuste en la lista quedan en 0
+        slot_y_adjusts = [adj * mm for adj in slot_y_adjusts[: len(layout.slots)]]
+        slot_y_adjusts += [0.0] * (len(layout.slots) - len(slot_y_adjusts))
+
+    return [(x + x_adjust, y + slot_y_adjusts[index]) for index, (x, y) in enumerate(layout.slots[:slot_count])]
+
+
+def record_values(record: VoucherRecord) -> dict:
+    """Valores de un voucher indexados por las claves de ``layout.json``."""
+    return {
+        "passenger": record.passenger,
+        "document": record.document,
+        "room": record.room,
+        "from_date": record.from_date,
+        "to_date": record.to_date,
+        "pax": str(record.pax),
+    }
+
+
+def logo_enabled(logo_path: str | None, disable_logo: bool) -> bool:
+    return not disable_logo and bool(logo_path) and os.path.exists(logo_path)
+
+
+@lru_cache(maxsize=4)
+def load_logo_form(logo_path: str, width: float, height: float) -> TemplateForm:
+    """Decodifica el logo una sola vez y lo deja como Form XObject del tamaño de su caja.
+
+    Se dibuja con los mismos parámetros que usa ``drawImage`` por slot, así
+    que cada voucher solo referencia el form con ``Do`` en lugar de volver a
+    incrustar la imagen.
+    """
+    from pypdf import PdfReader
+    from reportlab.pdfgen import canvas
+
+    from common.pdf_stamp import load_template_form
+
+    packet = io.BytesIO()
+    c = canvas.Canvas(packet, pagesize=(width, height))
+    c.drawImage(logo_path, 0, 0, width=width, height=height, preserveAspectRatio=True, mask="auto")
+    c.save()
+    packet.seek(0)
+    return load_template_form(PdfReader(packet).pages[0])
+
+
+def logo_box(layout: CompiledLayout) -> ImageBox:
+    if "logo" not in layout.images:
+        raise ValueError("El layout no define la imagen 'logo'")
+    return layout.images["logo"]
+
+
 def overlay_page_for_chunk(
     chunk: List[VoucherRecord],
     x_adjust_mm: float,
@@ -154,58 +388,268 @@ def overlay_page_for_chunk(
     logo_path: str | None,
     disable_logo: bool,
     slot_y_adjusts: list[float] | None = None,
+    layout_path: str = DEFAULT_LAYOUT_PATH,
 ) -> io.BytesIO:
-    packet = io.BytesIO()
-    c = canvas.Canvas(packet, pagesize=A4)
-    _, page_height = A4
+    """Overlay de texto de la página. El logo, si se pide, se incrusta acá mismo;
+    ``render_chunks`` lo desactiva y usa el form compartido de ``load_logo_form``."""
+    from reportlab.pdfgen import canvas
 
-    slot_top_ys = [255 * mm, 165 * mm, 75 * mm]
-    x_base = 24 * mm + (x_adjust_mm * mm)
-    y_adjust = y_adjust_mm * mm
-    
-    # Si hay ajustes por slot, usarlos; sino usar el ajuste global
-    if slot_y_adjusts is None:
-        slot_y_adjusts = [y_adjust, y_adjust, y_adjust]
-    else:
-        # Convertir a mm
-        slot_y_adjusts = [adj * mm for adj in slot_y_adjusts]
-
-    for slot_index, record in enumerate(chunk):
-        # Aplicar ajuste específico del slot si está disponible
-        y_top = slot_top_ys[slot_index] + slot_y_adjusts[slot_index]
+    layout = load_layout(layout_path)
+    packet = io.BytesIO()
+    c = canvas.Canvas(packet, pagesize=layout.page_size)
+    origins = slot_origins(layout, len(chunk), x_adjust_mm, y_adjust_mm, slot_y_adjusts)
 
-        if not disable_logo and logo_path and os.path.exists(logo_path):
+    if logo_enabled(logo_path, disable_logo):
+        logo = logo_box(layout)
+        for x, y in origins:
             c.drawImage(
                 logo_path,
-                x_base + 140 * mm,
-                y_top + 12 * mm,
-                width=26 * mm,
-                height=11 * mm,
+                x + logo.x,
+                y + logo.y,
+                width=logo.width,
+                height=logo.height,
                 preserveAspectRatio=True,
                 mask="auto",
             )
 
-        c.setFont("Helvetica-Bold", 10)
-        c.drawString(x_base + 0 * mm, y_top + -1 * mm, f"{record.passenger}")
-
-        c.setFont("Helvetica", 9)
-        c.drawString(x_base -5 * mm, y_top - 12 * mm, f"{record.document}")
-
-        c.drawString(x_base, y_top - 25 * mm, f"{record.room}")
-        c.drawString(x_base + 70 * mm, y_top - 25 * mm, f"{record.from_date}")
-        c.drawString(x_base + 120 * mm, y_top - 25 * mm, f"{record.to_date}")
-
-        c.drawString(x_base + 28 * mm, y_top - 32 * mm, f"{record.pax}")
+    layout.draw(c, zip(map(record_values, chunk), origins))
 
     c.save()
     packet.seek(0)
     return packet
 
 
+@lru_cache(maxsize=None)
+def engine_version(engine: str) -> str:
+    """Motor y versión con que se dibujó un fragmento.
+
+    Los fragmentos de reportlab salen de APIs internas del canvas (ver
+    ``engine_content``): con otra versión de reportlab no se reutilizan.
+    """
+    if engine != "reportlab":
+        return engine
+    from reportlab import Version
+
+    return f"reportlab {Version}"
+
+
+def fragment_key(record: VoucherRecord, layout: CompiledLayout, engine: str) -> str:
+    return content_hash([FRAGMENT_FORMAT, engine_version(engine), layout.digest, record_hash(record)])
+
+
+def render_fragment(record: VoucherRecord, layout: CompiledLayout, font_names: Dict[str, str], engine: str) -> bytes:
+    """Texto de un voucher con el origen del slot en (0, 0), sin logo."""
+    return engine_content(layout, [(record_values(record), (0.0, 0.0))], font_names, engine)
+
+
+def cached_fragment(
+    fragments: FragmentCache,
+    record: VoucherRecord,
+    layout: CompiledLayout,
+    font_names: Dict[str, str],
+    engine: str,
+    profiler: StageProfiler,
+) -> bytes:
+    key = fragment_key(record, layout, engine)
+    data = fragments.get(key)
+    if data is None:
+        data = render_fragment(record, layout, font_names, engine)
+        fragments.put(key, data)
+        profiler.count("fragments_rendered")
+    else:
+        profiler.count("fragments_cached")
+    return data
+
+
+def render_chunks(
+    writer: PdfWriter,
+    stamp: TemplateStamp,
+    chunks: Iterable[List[VoucherRecord]],
+    x_adjust_mm: float,
+    y_adjust_mm: float,
+    logo_path: str | None,
+    disable_logo: bool,
+    slot_y_adjusts: list[float] | None = None,
+    layout_path: str = DEFAULT_LAYOUT_PATH,
+    engine: str = "reportlab",
+    previous: PreviousOutput | None = None,
+    manifest: OutputManifest | None = None,
+    profiler: StageProfiler | None = None,
+    fragments: FragmentCache | None = None,
+) -> int:
+    """Agrega una página por chunk; si ``previous`` tiene una página con los
+    mismos vouchers sin cambios, la copia en lugar de volver a renderizarla.
+
+    El logo se registra una sola vez en el writer y cada slot lo referencia.
+    Con ``engine="direct"`` el texto se escribe como content stream sin pasar
+    por reportlab (ver ``common.pdf_text``). Con ``fragments`` el texto de
+    cada voucher sale de esa caché (o se dibuja y se guarda ahí) y la página
+    se arma trasladando cada fragmento a su slot.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Motor de render desconocido: {engine}")
+    from pypdf import PdfReader
+
+    from common.pdf_stamp import attach_form, copy_stamped_page, form_placements, stamp_content_page, stamp_overlay_page
+
+    layout = load_layout(layout_path)
+    forms = {}
+    if logo_enabled(logo_path, disable_logo):
+        logo = logo_box(layout)
+        forms[LOGO_FORM_NAME] = attach_form(writer, load_logo_form(logo_path, logo.width, logo.height))
+    if engine == "direct" or fragments is not None:
+        font_names = engine_font_names(layout, engine)
+        fonts = attach_standard_fonts(writer, font_names)
+
+    profiler = profiler or NULL_PROFILER
+    total = 0
+    for chunk in chunks:
+        keys = [record_hash(record) for record in chunk]
+        reused_index = previous.pages.get(tuple(keys)) if previous is not None else None
+        if reused_index is not None:
+            with profiler.stage("reuse"):
+                copy_stamped_page(writer, stamp, previous.reader.pages[reused_index], forms)
+        else:
+            with profiler.stage("overlay"):
+                origins = slot_origins(layout, len(chunk), x_adjust_mm, y_adjust_mm, slot_y_adjusts)
+                placements = b""
+                if forms:
+                    placements = form_placements(LOGO_FORM_NAME, [(x + logo.x, y + logo.y) for x, y in origins])
+                if fragments is not None:
+                    content = placed_content(
+                        zip(
+                            (cached_fragment(fragments, record, layout, font_names, engine, profiler) for record in chunk),
+                            origins,
+                        )
+                    )
+                elif engine == "direct":
+                    content = layout_content(layout, zip(map(record_values, chunk), origins), font_names)
+                else:
+                    overlay_packet = overlay_page_for_chunk(
+                        chunk, x_adjust_mm, y_adjust_mm, None, True, slot_y_adjusts, layout_path
+                    )
+            with profiler.stage("merge"):
+                if engine == "direct" or fragments is not None:
+                    stamp_content_page(writer, stamp, placements + content, fonts, forms)
+                else:
+                    overlay_reader = PdfReader(overlay_packet)
+                    stamp_overlay_page(writer, stamp, overlay_reader.pages[0], forms, placements)
+        if manifest is not None:
+            manifest.add_page([record.voucher for record in chunk], keys)
+        profiler.count("pages")
+        total += len(chunk)
+    return total
+
+
+def record_hash(record: VoucherRecord) -> str:
+    return content_hash(getattr(record, field) for field in record.__slots__)
+
+
+def render_params_hash(
+    template_pdf_path: str,
+    x_adjust_mm: float,
+    y_adjust_mm: float,
+    logo_path: str | None,
+    disable_logo: bool,
+    slot_y_adjusts: list[float] | None,
+    layout_path: str = DEFAULT_LAYOUT_PATH,
+    engine: str = "reportlab",
+) -> str:
+    """Hash de todo lo que, además de los datos, cambia el aspecto de una página."""
+    logo_hash = file_sha256(logo_path) if not disable_logo and logo_path and os.path.exists(logo_path) else ""
+    return content_hash(
+        [
+            file_sha256(template_pdf_path),
+            file_sha256(__file__),
+            x_adjust_mm,
+            y_adjust_mm,
+            disable_logo,
+            logo_hash,
+            slot_y_adjusts,
+            load_layout(layout_path).digest,
+            engine,
+        ]
+    )
+
+
+def split_runs(chunks: List[List[VoucherRecord]], parts: int) -> List[List[List[VoucherRecord]]]:
+    """Divide las páginas en ``parts`` tramos contiguos de tamaño parejo."""
+    size, extra = divmod(len(chunks), parts)
+    runs: List[List[List[VoucherRecord]]] = []
+    start = 0
+    for index in range(parts):
+        end = start + size + (1 if index < extra else 0)
+        if end > start:
+            runs.append(chunks[start:end])
+        start = end
+    return runs
+
+
+@lru_cache(maxsize=2)
+def load_template(template_pdf_path: str) -> TemplateForm:
+    """Plantilla parseada una sola vez por proceso (los workers la reutilizan entre tramos)."""
+    from common.pdf_stamp import load_template_form_from_file
+
+    return load_template_form_from_file(template_pdf_path)
+
+
+def render_partial_pdf(
+    template_pdf_path: str,
+    chunks: List[List[VoucherRecord]],
+    render_options: tuple,
+    fragments: FragmentCache | None = None,
+    optimize: bool = True,
+    previous_pages: Tuple[str, Dict[Tuple[str, ...], int]] | None = None,
+) -> bytes:
+    """Renderiza un tramo de páginas (en un proceso worker o no) y devuelve el PDF parcial.
+
+    ``previous_pages`` es (PDF anterior, páginas de su manifiesto), ya validado
+    por el proceso principal: las páginas sin cambios se copian de ahí.
+    """
+    from pypdf import PdfReader, PdfWriter
+
+    from common.pdf_optimize import optimize_writer
+    from common.pdf_stamp import attach_template_form
+
+    previous = None
+    if previous_pages is not None:
+        previous_path, pages = previous_pages
+        previous = PreviousOutput(reader=PdfReader(previous_path), pages=pages)
+    writer = PdfWriter()
+    stamp = attach_template_form(writer, load_template(template_pdf_path))
+    render_chunks(writer, stamp, chunks, *render_options, previous=previous, fragments=fragments)
+    if optimize:
+        optimize_writer(writer)
+
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+def resolve_slot_y_adjusts(
+    y_adjust_mm: float,
+    slot_1_y_adjust_mm: float | None = None,
+    slot_2_y_adjust_mm: float | None = None,
+    slot_3_y_adjust_mm: float | None = None,
+    slot_count: int = 3,
+) -> list[float] | None:
+    """Ajuste vertical de cada uno de los ``slot_count`` slots del layout.
+
+    Solo los tres primeros slots tienen opción propia; los demás (y los que no
+    la traen) usan ``y_adjust_mm``.
+    """
+    # Construir lista de ajustes por slot si se proporcionan
+    per_slot = [slot_1_y_adjust_mm, slot_2_y_adjust_mm, slot_3_y_adjust_mm]
+    if all(adj is None for adj in per_slot):
+        return None
+    per_slot += [None] * (slot_count - len(per_slot))
+    return [adj if adj is not None else y_adjust_mm for adj in per_slot[:slot_count]]
+
+
 def generate_pdf(
     template_pdf_path: str,
     output_pdf_path: str,
-    records: List[VoucherRecord],
+    records: Iterable[VoucherRecord],
     x_adjust_mm: float,
     y_adjust_mm: float,
     logo_path: str | None,
@@ -213,7 +657,20 @@ def generate_pdf(
     slot_1_y_adjust_mm: float | None = None,
     slot_2_y_adjust_mm: float | None = None,
     slot_3_y_adjust_mm: float | None = None,
-) -> None:
+    workers: int = 1,
+    incremental: bool = False,
+    layout_path: str = DEFAULT_LAYOUT_PATH,
+    engine: str = "reportlab",
+    profiler: StageProfiler | None = None,
+    fragments: FragmentCache | None = None,
+    optimize: bool = True,
+) -> int:
+    from pypdf import PdfReader, PdfWriter
+
+    from common.pdf_optimize import optimize_writer
+    from common.pdf_stamp import attach_template_form, load_template_form
+
+    profiler = profiler or NULL_PROFILER
     if not os.path.exists(template_pdf_path):
         raise FileNotFoundError(
             f"No se encontró la plantilla PDF '{template_pdf_path}'. Exportá primero 'VOUCHER ALICANTE.odt' a PDF."
@@ -223,29 +680,365 @@ def generate_pdf(
     if not template_reader.pages:
         raise ValueError("La plantilla PDF no tiene páginas")
 
-    writer = PdfWriter()
+    slot_count = len(load_layout(layout_path).slots)
+    slot_y_adjusts = resolve_slot_y_adjusts(
+        y_adjust_mm, slot_1_y_adjust_mm, slot_2_y_adjust_mm, slot_3_y_adjust_mm, slot_count
+    )
+    chunks = chunk_records(records, slot_count)
+    render_options = (x_adjust_mm, y_adjust_mm, logo_path, disable_logo, slot_y_adjusts, layout_path, engine)
 
-    # Construir lista de ajustes por slot si se proporcionan
-    slot_y_adjusts = None
-    if any(adj is not None for adj in [slot_1_y_adjust_mm, slot_2_y_adjust_mm, slot_3_y_adjust_mm]):
-        slot_y_adjusts = [
-            slot_1_y_adjust_mm if slot_1_y_adjust_mm is not None else y_adjust_mm,
-            slot_2_y_adjust_mm if slot_2_y_adjust_mm is not None else y_adjust_mm,
-            slot_3_y_adjust_mm if slot_3_y_adjust_mm is not None else y_adjust_mm,
-        ]
+    with profiler.stage("manifest"):
+        params_hash = render_params_hash(template_pdf_path, *render_options) if incremental else ""
+        previous = load_previous_output(output_pdf_path, params_hash) if incremental else None
+    manifest = OutputManifest()
 
-    for chunk in chunk_records(records, 3):
-        overlay_packet = overlay_page_for_chunk(
-            chunk, x_adjust_mm, y_adjust_mm, logo_path, disable_logo, slot_y_adjusts
+    writer = PdfWriter()
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        chunks = list(chunks)
+        total = sum(len(chunk) for chunk in chunks)
+        for chunk in chunks:
+            manifest.add_page([record.voucher for record in chunk], [record_hash(record) for record in chunk])
+        # Cada proceso arma un PDF parcial con un tramo contiguo de páginas;
+        # executor.map devuelve los parciales en el mismo orden de los tramos.
+        # Con optimize, el PDF unido vuelve a pasar por optimize_writer para
+        # unificar la plantilla, las fuentes y el logo que trae cada parcial.
+        # El PDF anterior se reemplaza recién al final, cuando ya no hay workers
+        # copiando páginas de él.
+        runs = split_runs(chunks, workers)
+        previous_pages = (output_pdf_path, previous.pages) if previous is not None else None
+        profiler.count("pages", len(chunks))
+        if runs:
+            with ProcessPoolExecutor(max_workers=min(workers, len(runs))) as executor:
+                partials = executor.map(
+                    render_partial_pdf,
+                    repeat(template_pdf_path),
+                    runs,
+                    repeat(render_options),
+                    repeat(fragments),
+                    repeat(optimize),
+                    repeat(previous_pages),
+                )
+                for partial in profiler.iterate("workers", partials):
+                    with profiler.stage("merge"):
+                        writer.append(PdfReader(io.BytesIO(partial)))
+    else:
+        # Las páginas se renderizan a medida que llegan los vouchers, sin
+        # materializar antes la lista completa de registros.
+        stamp = attach_template_form(writer, load_template_form(template_reader.pages[0]))
+        total = render_chunks(
+            writer,
+            stamp,
+            chunks,
+            *render_options,
+            previous=previous,
+            manifest=manifest,
+            profiler=profiler,
+            fragments=fragments,
         )
-        overlay_reader = PdfReader(overlay_packet)
+    if previous is not None:
+        reused = manifest.reused_pages(previous)
+        print(f"♻️ Páginas reutilizadas de la corrida anterior: {reused}/{len(manifest.pages)}")
+
+    if total:
+        if optimize:
+            with profiler.stage("optimize"):
+                optimize_writer(writer)
+        with profiler.stage("write"):
+            with open(output_pdf_path, "wb") as target:
+                writer.write(target)
+        profiler.count("bytes_written", os.path.getsize(output_pdf_path))
+        if incremental:
+            with profiler.stage("manifest"):
+                save_output_manifest(output_pdf_path, params_hash, manifest)
+    return total
+
+
+def iter_rendered_runs(
+    template_pdf_path: str,
+    runs: Iterable[List[List[VoucherRecord]]],
+    render_options: tuple,
+    workers: int = 1,
+    fragments: FragmentCache | None = None,
+    optimize: bool = True,
+) -> Iterator[Tuple[List[List[VoucherRecord]], bytes]]:
+    """(tramo, PDF parcial) de cada tramo de páginas, en orden y a medida que se terminan.
+
+    Con ``workers > 1`` los tramos se renderizan en procesos, con a lo sumo
+    ``2 * workers`` en vuelo: los tramos se leen de ``runs`` solo a medida que
+    hay lugar, así la memoria no crece con el tamaño del CSV.
+    """
+    if workers <= 1:
+        for run in runs:
+            yield run, render_partial_pdf(template_pdf_path, run, render_options, fragments, optimize)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for run in runs:
+            future = executor.submit(render_partial_pdf, template_pdf_path, run, render_options, fragments, optimize)
+            pending.append((run, future))
+            if len(pending) >= 2 * workers:
+                done_run, future = pending.popleft()
+                yield done_run, future.result()
+        while pending:
+            done_run, future = pending.popleft()
+            yield done_run, future.result()
+
+
+def spool_print_jobs(
+    template_pdf_path: str,
+    records: Iterable[VoucherRecord],
+    sink: DirectorySink,
+    x_adjust_mm: float,
+    y_adjust_mm: float,
+    logo_path: str | None,
+    disable_logo: bool,
+    slot_1_y_adjust_mm: float | None = None,
+    slot_2_y_adjust_mm: float | None = None,
+    slot_3_y_adjust_mm: float | None = None,
+    workers: int = 1,
+    job_pages: int = DEFAULT_JOB_PAGES,
+    job_prefix: str = "vouchers",
+    layout_path: str = DEFAULT_LAYOUT_PATH,
+    engine: str = "reportlab",
+    profiler: StageProfiler | None = None,
+    fragments: FragmentCache | None = None,
+    optimize: bool = True,
+) -> Tuple[int, List[str]]:
+    """Como ``generate_pdf``, pero en trabajos de ``job_pages`` páginas entregados a ``sink``.
+
+    Cada trabajo es un PDF completo (``<job_prefix>_0001.pdf``...) que se
+    escribe o se manda a imprimir (ver ``common.print_queue``) mientras se
+    renderizan los siguientes. Devuelve (vouchers, rutas entregadas).
+    """
+    profiler = profiler or NULL_PROFILER
+    if not os.path.exists(template_pdf_path):
+        raise FileNotFoundError(
+            f"No se encontró la plantilla PDF '{template_pdf_path}'. Exportá primero 'VOUCHER ALICANTE.odt' a PDF."
+        )
+    if job_pages < 1:
+        raise ValueError(f"Las páginas por trabajo deben ser 1 o más: {job_pages}")
+
+    slot_count = len(load_layout(layout_path).slots)
+    slot_y_adjusts = resolve_slot_y_adjusts(
+        y_adjust_mm, slot_1_y_adjust_mm, slot_2_y_adjust_mm, slot_3_y_adjust_mm, slot_count
+    )
+    render_options = (x_adjust_mm, y_adjust_mm, logo_path, disable_logo, slot_y_adjusts, layout_path, engine)
+    runs = chunk_records(chunk_records(records, slot_count), job_pages)
+    total = 0
+
+    def jobs() -> Iterator[PrintJob]:
+        nonlocal total
+        rendered = iter_rendered_runs(template_pdf_path, runs, render_options, workers, fragments, optimize)
+        for number, (run, data) in enumerate(profiler.iterate("render", rendered), start=1):
+            total += sum(len(chunk) for chunk in run)
+            profiler.count("pages", len(run))
+            yield PrintJob(name=f"{job_prefix}_{number:04d}.pdf", data=data, pages=len(run))
+
+    delivered = run_print_queue(jobs(), sink, profiler=profiler)
+    return total, delivered
+
+
+def preview_pages(records: Iterable[VoucherRecord], layout_path: str = DEFAULT_LAYOUT_PATH) -> int:
+    """Lista qué vouchers irían en cada página sin renderizar nada (``--dry-run``)."""
+    total = 0
+    for page, chunk in enumerate(chunk_records(records, len(load_layout(layout_path).slots)), start=1):
+        for record in chunk:
+            print(
+                f"   pág. {page:>4} · {record.voucher} · {record.passenger} · hab. {record.room} · "
+                f"{record.from_date} → {record.to_date} · {record.pax} pax"
+            )
+            total += 1
+    return total
+
+
+def read_offsets(path: str) -> dict:
+    """Ajustes de calibración del JSON (``x_adjust_mm``, ``slot_1_y_adjust_mm``...).
+
+    Las claves que faltan quedan en su default: 0 para los ajustes globales y
+    None (usa ``y_adjust_mm``) para los de cada slot.
+    """
+    with open(path, mode="r", encoding="utf-8") as handle:
+        data = json.load(handle)
+    unknown = sorted(set(data) - set(CALIBRATION_KEYS))
+    if unknown:
+        raise ValueError(f"Claves desconocidas en {path}: {', '.join(unknown)}")
+    offsets = {key: data.get(key) for key in CALIBRATION_KEYS}
+    for key, value in offsets.items():
+        if value is None and key in ("x_adjust_mm", "y_adjust_mm"):
+            value = 0.0
+        if value is not None and not isinstance(value, (int, float)):
+            raise ValueError(f"'{key}' debe ser un número en {path}: {value!r}")
+        offsets[key] = None if value is None else float(value)
+    return offsets
+
+
+def offsets_as_args(offsets: dict) -> str:
+    """Las opciones de línea de comandos equivalentes, para la corrida completa."""
+    return " ".join(
+        f"--{key.replace('_', '-')} {value:g}" for key, value in offsets.items() if value is not None
+    )
+
+
+def calibration_chunk(
+    records: Iterable[VoucherRecord], slot_count: int, voucher: str | None = None
+) -> List[VoucherRecord]:
+    """La primera página, o la página en la que sale ``voucher`` en la corrida completa."""
+    for chunk in chunk_records(records, slot_count):
+        if voucher is None or any(record.voucher == voucher for record in chunk):
+            return chunk
+    if voucher is None:
+        raise ValueError("No se encontraron vouchers en el CSV")
+    raise ValueError(f"No se encontró el voucher {voucher} en el CSV")
+
+
+def render_calibration_page(
+    template_pdf_path: str,
+    output_pdf_path: str,
+    chunk: List[VoucherRecord],
+    offsets: dict,
+    logo_path: str | None,
+    disable_logo: bool,
+    layout_path: str = DEFAULT_LAYOUT_PATH,
+    engine: str = "reportlab",
+    fragments: FragmentCache | None = None,
+) -> None:
+    """Escribe una sola página con ``offsets`` aplicados, con reemplazo atómico.
 
-        page = deepcopy(PdfReader(template_pdf_path).pages[0])
-        page.merge_page(overlay_reader.pages[0])
-        writer.add_page(page)
+    La plantilla y el logo quedan parseados entre llamadas (``load_template``,
+    ``load_logo_form``), así cada cambio solo redibuja el overlay.
+    """
+    from pypdf import PdfWriter
 
-    with open(output_pdf_path, "wb") as target:
+    from common.pdf_stamp import attach_template_form
+
+    slot_y_adjusts = resolve_slot_y_adjusts(
+        offsets["y_adjust_mm"],
+        offsets["slot_1_y_adjust_mm"],
+        offsets["slot_2_y_adjust_mm"],
+        offsets["slot_3_y_adjust_mm"],
+        len(load_layout(layout_path).slots),
+    )
+    writer = PdfWriter()
+    stamp = attach_template_form(writer, load_template(template_pdf_path))
+    render_chunks(
+        writer,
+        stamp,
+        [chunk],
+        offsets["x_adjust_mm"],
+        offsets["y_adjust_mm"],
+        logo_path,
+        disable_logo,
+        slot_y_adjusts,
+        layout_path,
+        engine,
+        fragments=fragments,
+    )
+    tmp_path = f"{output_pdf_path}.tmp"
+    with open(tmp_path, "wb") as target:
         writer.write(target)
+    os.replace(tmp_path, output_pdf_path)
+
+
+def watch_calibration(
+    template_pdf_path: str,
+    output_pdf_path: str,
+    chunk: List[VoucherRecord],
+    offsets_path: str,
+    logo_path: str | None,
+    disable_logo: bool,
+    layout_path: str = DEFAULT_LAYOUT_PATH,
+    engine: str = "reportlab",
+    fragments: FragmentCache | None = None,
+    poll_seconds: float = CALIBRATION_POLL_SECONDS,
+) -> None:
+    """Vuelve a renderizar la página de calibración cada vez que cambia ``offsets_path``
+    (o el layout), hasta Ctrl+C. Un JSON inválido se informa y se espera el próximo cambio."""
+    if not os.path.exists(template_pdf_path):
+        raise FileNotFoundError(
+            f"No se encontró la plantilla PDF '{template_pdf_path}'. Exportá primero 'VOUCHER ALICANTE.odt' a PDF."
+        )
+    watched = (offsets_path, layout_path)
+    last_seen = None
+    offsets = None
+    try:
+        while True:
+            stamp = tuple(os.stat(path).st_mtime_ns for path in watched)
+            if stamp != last_seen:
+                last_seen = stamp
+                start = time.perf_counter()
+                try:
+                    offsets = read_offsets(offsets_path)
+                    render_calibration_page(
+                        template_pdf_path,
+                        output_pdf_path,
+                        chunk,
+                        offsets,
+                        logo_path,
+                        disable_logo,
+                        layout_path,
+                        engine,
+                        fragments,
+                    )
+                except ValueError as exc:
+                    print(f"⚠️ {exc}", flush=True)
+                else:
+                    elapsed_ms = (time.perf_counter() - start) * 1000
+                    print(f"🎯 {output_pdf_path} ({elapsed_ms:.0f} ms) · {offsets_as_args(offsets)}", flush=True)
+            time.sleep(poll_seconds)
+    except KeyboardInterrupt:
+        if offsets is not None:
+            print(f"\n✅ Ajustes para la corrida completa: {offsets_as_args(offsets)}")
+
+
+def run_calibration(
+    args: argparse.Namespace,
+    csv_path: str,
+    template_pdf_path: str,
+    output_pdf_path: str,
+    logo_path: str,
+    layout_path: str,
+    fragments: FragmentCache | None,
+) -> None:
+    offsets_path = resolve_output_path(args.calibrate)
+    if not os.path.exists(offsets_path):
+        with open(offsets_path, mode="w", encoding="utf-8") as target:
+            json.dump({key: getattr(args, key) for key in CALIBRATION_KEYS}, target, indent=2)
+            target.write("\n")
+        print(f"ℹ️ Ajustes iniciales guardados en: {offsets_path}")
+
+    chunk = calibration_chunk(
+        iter_voucher_records(csv_path, use_cache=args.use_cache),
+        len(load_layout(layout_path).slots),
+        normalize(args.calibrate_voucher) or None,
+    )
+    calibration_pdf_path = f"{os.path.splitext(output_pdf_path)[0]}_calibracion.pdf"
+    print(f"ℹ️ Página de calibración: vouchers {', '.join(record.voucher for record in chunk)}")
+    print(f"ℹ️ Editá {offsets_path} (o el layout) y se regenera {calibration_pdf_path}; Ctrl+C para terminar")
+    watch_calibration(
+        template_pdf_path,
+        calibration_pdf_path,
+        chunk,
+        offsets_path,
+        logo_path,
+        args.no_logo,
+        layout_path,
+        args.engine,
+        fragments,
+    )
+
+
+def print_fragment_stats(fragments: FragmentCache | None) -> None:
+    # Con --workers los aciertos se cuentan en cada proceso y acá no se ven
+    if fragments is not None and fragments.hits + fragments.misses:
+        print(
+            f"♻️ Fragmentos reutilizados de la caché: {fragments.hits}/{fragments.hits + fragments.misses} "
+            f"({fragments.size / (1024 * 1024):.1f} MB en disco)"
+        )
 
 
 def parse_args() -> argparse.Namespace:
@@ -295,6 +1088,20 @@ def parse_args() -> argparse.Namespace:
         default=None,
         help="Ajuste vertical en mm solo para el voucher #3 (anula --y-adjust-mm para este slot)",
     )
+    parser.add_argument(
+        "--layout",
+        default=DEFAULT_LAYOUT_PATH,
+        help="JSON con las posiciones de los campos por slot (default: python/vouchersAlicante/layout.json)",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default="reportlab",
+        help=(
+            "Motor del overlay de texto: reportlab (default) o direct (content stream sin reportlab, más rápido; "
+            "los caracteres fuera de cp1252 salen como '?' en lugar del cuadrado negro de reportlab)"
+        ),
+    )
     parser.add_argument(
         "--logo",
         default=resolve_default_logo_path(),
@@ -313,6 +1120,95 @@ def parse_args() -> argparse.Namespace:
         help="Desactiva la inserción del logo en el overlay (default)",
     )
     parser.set_defaults(no_logo=True)
+    parser.add_argument(
+        "--no-incremental",
+        dest="incremental",
+        action="store_false",
+        help="Renderiza todas las páginas aunque haya una salida anterior con su manifiesto",
+    )
+    parser.add_argument(
+        "--no-optimize",
+        dest="optimize",
+        action="store_false",
+        help="Escribe el PDF sin la pasada de optimización (recursos compartidos, objetos repetidos unificados)",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="stages",
+        choices=PROFILE_MODES,
+        default=None,
+        help="Mide tiempo por etapa, páginas/s y bytes escritos; 'cprofile' o 'tracemalloc' agregan ese detalle",
+    )
+    parser.add_argument(
+        "--profile-output",
+        default=None,
+        help="JSON del perfil (default: <salida>.profile.json)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Cantidad de procesos para renderizar páginas en paralelo (default: 1, sin paralelismo)",
+    )
+    parser.add_argument(
+        "--spool-dir",
+        default=None,
+        help="En lugar de un único PDF, deja trabajos de --job-pages páginas en esta carpeta a medida que se renderizan",
+    )
+    parser.add_argument(
+        "--print-command",
+        default=None,
+        help="Comando que recibe cada trabajo apenas está listo, p. ej. \"lp -d HP\" (default de carpeta: <salida>_spool)",
+    )
+    parser.add_argument(
+        "--job-pages",
+        type=int,
+        default=DEFAULT_JOB_PAGES,
+        help=f"Páginas por trabajo con --spool-dir/--print-command (default: {DEFAULT_JOB_PAGES})",
+    )
+    parser.add_argument(
+        "--no-cache",
+        dest="use_cache",
+        action="store_false",
+        help="Lee el CSV como texto en lugar de usar su caché binaria (<csv>.cache)",
+    )
+    parser.add_argument(
+        "--fragment-cache",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="CARPETA",
+        help="Guarda el texto de cada voucher en una caché de fragmentos para reimpresiones y recalibraciones "
+        "(motor reportlab; default de carpeta: .fragmentos junto a la salida)",
+    )
+    parser.add_argument(
+        "--fragment-cache-mb",
+        type=float,
+        default=DEFAULT_MAX_BYTES / (1024 * 1024),
+        help=f"Tamaño máximo de la caché de fragmentos en MB; se borran los menos usados (default: {DEFAULT_MAX_BYTES // (1024 * 1024)})",
+    )
+    parser.add_argument(
+        "--calibrate",
+        nargs="?",
+        const=DEFAULT_CALIBRATION_PATH,
+        default=None,
+        metavar="AJUSTES_JSON",
+        help=(
+            "Modo calibración: renderiza una sola página en <salida>_calibracion.pdf y la vuelve a generar cada vez "
+            f"que cambia este JSON de ajustes (default: {DEFAULT_CALIBRATION_PATH}; si no existe se crea con los --*-adjust-mm)"
+        ),
+    )
+    parser.add_argument(
+        "--calibrate-voucher",
+        default=None,
+        help="Con --calibrate, usa la página de este voucher en lugar de la primera",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Solo lista los vouchers de cada página, sin cargar reportlab/pypdf ni escribir el PDF",
+    )
     return parser.parse_args()
 
 
@@ -322,37 +1218,102 @@ def main() -> None:
     if not str(args.csv).lower().endswith(".csv"):
         raise ValueError(f"El archivo indicado en --csv debe tener extensión .csv: {args.csv}")
 
+    if args.workers < 1:
+        raise ValueError(f"--workers debe ser 1 o mayor: {args.workers}")
+
     csv_path = resolve_input_path(args.csv)
     template_pdf_path = resolve_input_path(args.template_pdf)
     output_pdf_path = resolve_output_path(args.output)
     logo_path = resolve_input_path(args.logo)
+    layout_path = resolve_input_path(args.layout)
 
     print(f"ℹ️ CSV usado: {csv_path}")
     print(f"ℹ️ Plantilla usada: {template_pdf_path}")
     print(f"ℹ️ Salida PDF: {output_pdf_path}")
+    print(f"ℹ️ Layout usado: {layout_path}")
     print(f"ℹ️ Logo overlay: {'desactivado' if args.no_logo else logo_path}")
 
-    rows = load_csv_rows(csv_path)
-    records = group_by_voucher(rows)
+    if args.dry_run:
+        total = preview_pages(iter_voucher_records(csv_path, use_cache=args.use_cache), layout_path)
+        if not total:
+            raise ValueError("No se encontraron vouchers en el CSV")
+        print(f"✅ Vista previa: {total} vouchers (no se escribió ningún PDF)")
+        return
+
+    profiler = StageProfiler() if args.profile else None
+    profile_path = args.profile_output or f"{output_pdf_path}.profile.json"
+    # Con el motor direct dibujar el texto cuesta menos que leerlo de disco
+    fragments = None
+    if args.fragment_cache is not None and args.engine == "reportlab":
+        fragment_dir = (
+            resolve_output_path(args.fragment_cache)
+            if args.fragment_cache
+            else os.path.join(os.path.dirname(output_pdf_path), ".fragmentos")
+        )
+        fragments = FragmentCache(fragment_dir, int(args.fragment_cache_mb * 1024 * 1024))
+        print(f"ℹ️ Caché de fragmentos: {fragment_dir}")
+
+    if args.calibrate:
+        run_calibration(args, csv_path, template_pdf_path, output_pdf_path, logo_path, layout_path, fragments)
+        return
+    if args.spool_dir or args.print_command:
+        spool_dir = resolve_output_path(args.spool_dir) if args.spool_dir else f"{os.path.splitext(output_pdf_path)[0]}_spool"
+        sink = CommandSink(args.print_command, spool_dir) if args.print_command else DirectorySink(spool_dir)
+        print(f"ℹ️ Trabajos de impresión en: {spool_dir} ({args.job_pages} páginas c/u)")
+        with profile_run(profiler, args.profile, profile_path):
+            total, delivered = spool_print_jobs(
+                template_pdf_path,
+                iter_voucher_records(csv_path, profiler, args.use_cache),
+                sink,
+                args.x_adjust_mm,
+                args.y_adjust_mm,
+                logo_path,
+                args.no_logo,
+                args.slot_1_y_adjust_mm,
+                args.slot_2_y_adjust_mm,
+                args.slot_3_y_adjust_mm,
+                workers=args.workers,
+                job_pages=args.job_pages,
+                job_prefix=Path(output_pdf_path).stem,
+                layout_path=layout_path,
+                engine=args.engine,
+                profiler=profiler,
+                fragments=fragments,
+                optimize=args.optimize,
+            )
+        if not total:
+            raise ValueError("No se encontraron vouchers en el CSV")
+        print_fragment_stats(fragments)
+        print(f"✅ Vouchers generados: {total} en {len(delivered)} trabajo(s)")
+        return
+
+    with profile_run(profiler, args.profile, profile_path):
+        total = generate_pdf(
+            template_pdf_path=template_pdf_path,
+            output_pdf_path=output_pdf_path,
+            records=iter_voucher_records(csv_path, profiler, args.use_cache),
+            x_adjust_mm=args.x_adjust_mm,
+            y_adjust_mm=args.y_adjust_mm,
+            logo_path=logo_path,
+            disable_logo=args.no_logo,
+            slot_1_y_adjust_mm=args.slot_1_y_adjust_mm,
+            slot_2_y_adjust_mm=args.slot_2_y_adjust_mm,
+            slot_3_y_adjust_mm=args.slot_3_y_adjust_mm,
+            workers=args.workers,
+            incremental=args.incremental,
+            layout_path=layout_path,
+            engine=args.engine,
+            profiler=profiler,
+            fragments=fragments,
+            optimize=args.optimize,
+        )
 
-    if not records:
+    if not total:
         raise ValueError("No se encontraron vouchers en el CSV")
-
-    generate_pdf(
-        template_pdf_path=template_pdf_path,
-        output_pdf_path=output_pdf_path,
-        records=records,
-        x_adjust_mm=args.x_adjust_mm,
-        y_adjust_mm=args.y_adjust_mm,
-        logo_path=logo_path,
-        disable_logo=args.no_logo,
-        slot_1_y_adjust_mm=args.slot_1_y_adjust_mm,
-        slot_2_y_adjust_mm=args.slot_2_y_adjust_mm,
-        slot_3_y_adjust_mm=args.slot_3_y_adjust_mm,
-    )
+    print_fragment_stats(fragments)
 
     print(f"✅ Vouchers generados: {output_pdf_path}")
-    print(f"   Total de vouchers: {len(records)}")
+    print(f"   Total de vouchers: {total}")
 
 
 if __name__ == "__main__":
@@ -32,9 +32,22 @@ else
     fi
 fi
 
-# Limpiar log
+# Detener el servicio de render Python si está corriendo
+if [ -f /tmp/suteba-render.pid ]; then
+    RENDER_PID=$(cat /tmp/suteba-render.pid)
+    if ps -p $RENDER_PID > /dev/null 2>&1; then
+        kill $RENDER_PID
+        echo "✅ Servicio de render detenido (PID: $RENDER_PID)"
+    fi
+    rm /tmp/suteba-render.pid
+fi
+
+# Limpiar logs
 if [ -f /tmp/suteba-server.log ]; then
     rm /tmp/suteba-server.log
 fi
+if [ -f /tmp/suteba-render.log ]; then
+    rm /tmp/suteba-render.log
+fi
 
 echo "✅ Limpieza completa"
@@ -0,0 +1,74 @@
+"""Rutas de import y CSV de prueba compartidos por los tests.
+
+Los CSV son sintéticos (``benchmarks/synthetic_regimen.py``) o armados en
+cada test: nunca se versionan exports reales con datos personales.
+"""
+import csv
+import sys
+from pathlib import Path
+
+import pytest
+
+
+PYTHON_DIR = Path(__file__).resolve().parent.parent / "python"
+
+# Las mismas rutas que agrega python/render_server.py
+sys.path.insert(0, str(PYTHON_DIR))
+sys.path.insert(0, str(PYTHON_DIR / "vouchersAlicante"))
+sys.path.insert(0, str(PYTHON_DIR / "fichaPax"))
+
+from benchmarks.synthetic_regimen import HEADERS, iter_regimen_rows, write_regimen_csv  # noqa: E402
+
+
+@pytest.fixture
+def synthetic_csv(tmp_path):
+    """CSV sintético de 300 pasajeros con el formato de consultaRegimenReport.csv."""
+    return write_regimen_csv(str(tmp_path / "consultaRegimenReport.csv"), 300, seed=7)
+
+
+@pytest.fixture
+def write_csv(tmp_path):
+    """Escribe un CSV con ``rows`` (dicts por encabezado) y devuelve su ruta."""
+
+    def write(rows, name="regimen.csv", header=HEADERS, encoding="utf-8", delimiter=","):
+        path = tmp_path / name
+        with open(path, mode="w", encoding=encoding, newline="") as handle:
+            writer = csv.writer(handle, delimiter=delimiter)
+            writer.writerow(header)
+            writer.writerows([row.get(column, "") for column in header] for row in rows)
+        return str(path)
+
+    return write
+
+
+# Fuera de cp1252: reportlab los dibuja con una fuente de sustitución, el motor direct con '?'
+NON_CP1252_NAME = "ŞAHIN ĞÜL"
+
+
+@pytest.fixture
+def non_cp1252_csv(write_csv):
+    """CSV sintético donde todo el primer voucher se llama ``NON_CP1252_NAME``."""
+    rows = [dict(zip(HEADERS, row)) for row in iter_regimen_rows(30, seed=5)]
+    for row in rows:
+        if row["Voucher"] == rows[0]["Voucher"]:
+            row["Apellido y nombre"] = NON_CP1252_NAME
+    return write_csv(rows)
+
+
+@pytest.fixture
+def fichas_de():
+    """Fichas (titular, pax, acompañantes, habitaciones) de los primeros ``cantidad`` vouchers del CSV.
+
+    Se arman como en ``llenar_fichas.generar``.
+    """
+    from common.csv_cache import load_groups
+    from llenar_fichas import obtener_titular_y_acompanantes
+
+    def build(csv_path, cantidad=None):
+        fichas = []
+        for grupo in list(load_groups(csv_path).values())[:cantidad]:
+            titular, acompanantes = obtener_titular_y_acompanantes(grupo.passengers)
+            fichas.append((titular, len(grupo.passengers), acompanantes, list({p.room for p in grupo.passengers})))
+        return fichas
+
+    return build
@@ -0,0 +1,97 @@
+import json
+import os
+
+import pytest
+
+import generar_vouchers_overlay as vouchers
+
+
+TEMPLATE = str(vouchers.SCRIPT_DIR / "VOUCHER ALICANTE.pdf")
+
+
+def records(count=7):
+    return [
+        vouchers.VoucherRecord(f"{index:04d}", f"PASAJERO {index}", "20111222", "HOTEL", "101", "10/01/2026", "15/01/2026", 2)
+        for index in range(count)
+    ]
+
+
+def write_offsets(path, offsets, mtime_ns=None):
+    path.write_text(json.dumps(offsets), encoding="utf-8")
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+    return str(path)
+
+
+def test_read_offsets_defaults_and_errors(tmp_path):
+    offsets = vouchers.read_offsets(write_offsets(tmp_path / "a.json", {"slot_2_y_adjust_mm": 1}))
+    assert offsets == {
+        "x_adjust_mm": 0.0,
+        "y_adjust_mm": 0.0,
+        "slot_1_y_adjust_mm": None,
+        "slot_2_y_adjust_mm": 1.0,
+        "slot_3_y_adjust_mm": None,
+    }
+    assert vouchers.offsets_as_args(offsets) == "--x-adjust-mm 0 --y-adjust-mm 0 --slot-2-y-adjust-mm 1"
+
+    with pytest.raises(ValueError, match="Claves desconocidas"):
+        vouchers.read_offsets(write_offsets(tmp_path / "b.json", {"z_adjust_mm": 1}))
+    with pytest.raises(ValueError, match="debe ser un número"):
+        vouchers.read_offsets(write_offsets(tmp_path / "c.json", {"x_adjust_mm": "2"}))
+
+
+def test_calibration_chunk():
+    assert [record.voucher for record in vouchers.calibration_chunk(records(), 3)] == ["0000", "0001", "0002"]
+    assert [record.voucher for record in vouchers.calibration_chunk(records(), 3, "0004")] == ["0003", "0004", "0005"]
+    with pytest.raises(ValueError, match="0099"):
+        vouchers.calibration_chunk(records(), 3, "0099")
+    with pytest.raises(ValueError):
+        vouchers.calibration_chunk([], 3)
+
+
+def test_calibration_page_matches_the_full_run(tmp_path):
+    pytest.importorskip("pypdf")
+    from pypdf import PdfReader
+
+    offsets = {"x_adjust_mm": 1.5, "y_adjust_mm": -2.0, "slot_1_y_adjust_mm": 4.0, "slot_2_y_adjust_mm": None, "slot_3_y_adjust_mm": 6.0}
+    full = str(tmp_path / "full.pdf")
+    vouchers.generate_pdf(
+        TEMPLATE, full, records(), 1.5, -2.0, None, True, 4.0, None, 6.0, engine="direct"
+    )
+    page = str(tmp_path / "page.pdf")
+    chunk = vouchers.calibration_chunk(records(), 3, "0004")
+    vouchers.render_calibration_page(TEMPLATE, page, chunk, offsets, None, True, engine="direct")
+
+    calibration = PdfReader(page)
+    assert len(calibration.pages) == 1
+    assert calibration.pages[0].get_contents().get_data() == PdfReader(full).pages[1].get_contents().get_data()
+
+
+def test_watch_rerenders_on_change(tmp_path, monkeypatch, capsys):
+    pytest.importorskip("pypdf")
+    offsets_path = tmp_path / "calibracion.json"
+    write_offsets(offsets_path, {"x_adjust_mm": 1}, mtime_ns=1_000_000_000)
+    output = str(tmp_path / "calibracion.pdf")
+    steps = iter(
+        [
+            lambda: write_offsets(offsets_path, {"x_adjust_mm": "mal"}, mtime_ns=2_000_000_000),
+            lambda: write_offsets(offsets_path, {"x_adjust_mm": 2.5}, mtime_ns=3_000_000_000),
+            lambda: None,
+        ]
+    )
+
+    def sleep(_):
+        step = next(steps, None)
+        if step is None:
+            raise KeyboardInterrupt
+        step()
+
+    monkeypatch.setattr(vouchers.time, "sleep", sleep)
+    vouchers.watch_calibration(TEMPLATE, output, records(3), str(offsets_path), None, True, engine="direct")
+
+    printed = capsys.readouterr().out
+    # Dos páginas renderizadas, un JSON inválido informado y sin render extra si nada cambió
+    assert printed.count("🎯") == 2
+    assert "⚠️ 'x_adjust_mm' debe ser un número" in printed
+    assert printed.strip().endswith("Ajustes para la corrida completa: --x-adjust-mm 2.5 --y-adjust-mm 0")
+    assert os.path.exists(output) and not os.path.exists(f"{output}.tmp")
@@ -0,0 +1,148 @@
+import builtins
+import os
+import struct
+
+import pytest
+
+from common import csv_cache
+from common.csv_cache import CACHE_MAGIC, build_cache, cache_path_for, load_groups, open_cache
+from common.records import Passenger, group_passengers
+from common.regimen_csv import iter_export_rows
+
+
+def text_groups(csv_path):
+    return group_passengers(Passenger.from_row(row) for row in iter_export_rows(csv_path))
+
+
+def forbid_build(monkeypatch):
+    def build(*args, **kwargs):
+        raise AssertionError("la caché se volvió a armar")
+
+    monkeypatch.setattr(csv_cache, "build_cache", build)
+
+
+def test_cache_matches_the_text_reader(synthetic_csv):
+    expected = text_groups(synthetic_csv)
+    cached = load_groups(synthetic_csv)
+    assert list(cached) == list(expected)
+    for voucher, group in expected.items():
+        assert cached[voucher].passengers == group.passengers
+
+
+def test_columns_and_groups(synthetic_csv):
+    cache = open_cache(synthetic_csv)
+    expected = text_groups(synthetic_csv)
+    assert cache.row_count == sum(group.pax for group in expected.values())
+    assert cache.group_count == len(expected)
+    ages = [passenger.age for group in expected.values() for passenger in group.passengers]
+    assert list(cache.column("age")) == ages
+    vouchers = [cache.string(string_id) for string_id in cache.column("voucher")]
+    assert vouchers == [passenger.voucher for group in expected.values() for passenger in group.passengers]
+    assert [cache.group(index).voucher for _, index in sorted(cache.vouchers())] == sorted(expected)
+
+
+def test_header_layout(synthetic_csv):
+    cache_path = build_cache(synthetic_csv)
+    with open(cache_path, "rb") as handle:
+        header = handle.read(csv_cache._HEADER.size)
+    magic, version, _, size, mtime_ns, *_ = csv_cache._HEADER.unpack(header)
+    assert (magic, version) == (CACHE_MAGIC, csv_cache.CACHE_VERSION)
+    assert (size, mtime_ns) == (os.stat(synthetic_csv).st_size, os.stat(synthetic_csv).st_mtime_ns)
+    assert struct.unpack_from("<q", header, csv_cache._MTIME_OFFSET)[0] == mtime_ns
+
+
+def test_valid_cache_is_reused(synthetic_csv, monkeypatch):
+    open_cache(synthetic_csv)
+    forbid_build(monkeypatch)
+    assert open_cache(synthetic_csv).row_count == 300
+
+
+def test_changed_csv_rebuilds(synthetic_csv, write_csv):
+    open_cache(synthetic_csv)
+    write_csv([{"Voucher": "1", "Apellido y nombre": "ÚNICO PASAJERO", "Edad": "30"}], name="consultaRegimenReport.csv")
+    cache = open_cache(synthetic_csv)
+    assert [group.voucher for group in cache.iter_groups()] == ["1"]
+    assert cache.passenger(0).name == "ÚNICO PASAJERO"
+
+
+def test_same_size_other_content_rebuilds(synthetic_csv):
+    open_cache(synthetic_csv)
+    with open(synthetic_csv, "rb") as handle:
+        data = handle.read()
+    # Mismo tamaño, un pasajero con otro nombre
+    with open(synthetic_csv, "wb") as handle:
+        handle.write(data.replace(b"ACU\xc3\x91A", b"ACUNYA", 1))
+    stat = os.stat(synthetic_csv)
+    assert stat.st_size == len(data)
+    names = {passenger.name for group in open_cache(synthetic_csv).iter_groups() for passenger in group.passengers}
+    assert any(name.startswith("ACUNYA") for name in names)
+
+
+def test_touched_csv_keeps_the_cache_and_records_the_new_mtime(synthetic_csv, monkeypatch):
+    open_cache(synthetic_csv)
+    stat = os.stat(synthetic_csv)
+    os.utime(synthetic_csv, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+    forbid_build(monkeypatch)
+    open_cache(synthetic_csv)
+    assert open_cache(synthetic_csv).source_mtime_ns == os.stat(synthetic_csv).st_mtime_ns
+
+
+def test_read_only_cache_is_still_used(synthetic_csv, monkeypatch):
+    open_cache(synthetic_csv)
+    stat = os.stat(synthetic_csv)
+    os.utime(synthetic_csv, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+
+    def read_only_open(path, mode="r", *args, **kwargs):
+        if "+" in mode or "w" in mode:
+            raise PermissionError(13, "Permission denied", path)
+        return builtins.open(path, mode, *args, **kwargs)
+
+    monkeypatch.setattr(csv_cache, "open", read_only_open, raising=False)
+    forbid_build(monkeypatch)
+    assert open_cache(synthetic_csv).row_count == 300
+
+
+def test_corrupt_cache_rebuilds(synthetic_csv):
+    with open(cache_path_for(synthetic_csv), "wb") as handle:
+        handle.write(b"no es una cache")
+    assert open_cache(synthetic_csv).row_count == 300
+
+
+def test_builders_use_their_own_temp_file(synthetic_csv, monkeypatch):
+    replaced = []
+    real_replace = os.replace
+
+    def replace(source, target):
+        replaced.append(source)
+        assert os.path.exists(source)
+        real_replace(source, target)
+
+    monkeypatch.setattr(csv_cache.os, "replace", replace)
+    build_cache(synthetic_csv)
+    build_cache(synthetic_csv)
+    assert len(set(replaced)) == 2
+    assert all(os.path.dirname(path) == os.path.dirname(synthetic_csv) for path in replaced)
+    assert [name for name in os.listdir(os.path.dirname(synthetic_csv)) if name.endswith(".tmp")] == []
+
+
+def test_unwritable_directory_falls_back_to_a_temp_cache(synthetic_csv, monkeypatch):
+    real_build = csv_cache.build_cache
+
+    def build(csv_path, cache_path=None):
+        if cache_path == cache_path_for(csv_path):
+            raise PermissionError(13, "Permission denied", cache_path)
+        return real_build(csv_path, cache_path)
+
+    monkeypatch.setattr(csv_cache, "build_cache", build)
+    assert open_cache(synthetic_csv).row_count == 300
+    assert not os.path.exists(cache_path_for(synthetic_csv))
+
+
+@pytest.mark.parametrize("field", ["magic", "version"])
+def test_other_format_rebuilds(synthetic_csv, field):
+    cache_path = build_cache(synthetic_csv)
+    with open(cache_path, "r+b") as handle:
+        handle.seek(0 if field == "magic" else 8)
+        handle.write(b"X")
+    assert not csv_cache._is_valid(cache_path, synthetic_csv)
+    assert open_cache(synthetic_csv).row_count == 300
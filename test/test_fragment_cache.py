@@ -0,0 +1,148 @@
+import os
+import pickle
+import re
+import subprocess
+import sys
+
+import pytest
+
+import generar_vouchers_overlay as vouchers
+from common.fragment_cache import FRAGMENT_SUFFIX, FragmentCache
+from common.layout import load_layout
+
+
+BLOCK = 4096
+
+
+def age(cache, key, seconds):
+    """Deja ``key`` como usado hace ``seconds`` segundos (el orden LRU en disco es la mtime)."""
+    path = os.path.join(cache.directory, f"{key}{FRAGMENT_SUFFIX}")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns - seconds * 1_000_000_000))
+
+
+def test_hits_and_misses(tmp_path):
+    cache = FragmentCache(str(tmp_path / "frag"))
+    assert cache.get("a") is None
+    cache.put("a", b"BT (A) Tj ET")
+    assert cache.get("a") == b"BT (A) Tj ET"
+    assert cache.get("b") is None
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert len(cache) == 1
+    # Tamaño en bloques de disco
+    assert cache.size == BLOCK
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = FragmentCache(str(tmp_path / "frag"), max_bytes=3 * BLOCK)
+    for key in "abc":
+        cache.put(key, key.encode() * 10)
+    assert cache.get("a") is not None
+    cache.put("d", b"d" * 10)
+    assert cache.get("b") is None
+    assert [cache.get(key) is not None for key in "acd"] == [True, True, True]
+    assert sorted(name[:1] for name in os.listdir(cache.directory)) == ["a", "c", "d"]
+    assert cache.size == 3 * BLOCK
+
+
+def test_large_fragments_count_every_block(tmp_path):
+    cache = FragmentCache(str(tmp_path / "frag"), max_bytes=3 * BLOCK)
+    cache.put("a", b"a" * 10)
+    cache.put("b", b"b" * (BLOCK + 1))
+    cache.put("c", b"c" * 10)
+    assert cache.get("a") is None
+    assert cache.size == 3 * BLOCK
+    # Un fragmento más grande que toda la caché no se guarda
+    cache.put("huge", b"x" * (4 * BLOCK))
+    assert cache.get("huge") is None and cache.get("b") is not None
+
+
+def test_order_survives_a_new_process(tmp_path):
+    directory = str(tmp_path / "frag")
+    first = FragmentCache(directory)
+    for index, key in enumerate("abc"):
+        first.put(key, key.encode())
+        age(first, key, 30 - index)
+    # "a" es el más viejo en disco; un acierto lo vuelve el más nuevo
+    assert FragmentCache(directory).get("a") == b"a"
+
+    # Con un límite menor, la carpeta se recorta al abrirla, desde el menos usado
+    smaller = FragmentCache(directory, max_bytes=2 * BLOCK)
+    assert len(smaller) == 2
+    assert smaller.get("b") is None
+    assert smaller.get("a") == b"a" and smaller.get("c") == b"c"
+
+
+def test_fragment_removed_by_another_process_is_a_miss(tmp_path):
+    cache = FragmentCache(str(tmp_path / "frag"))
+    cache.put("a", b"a")
+    os.remove(os.path.join(cache.directory, f"a{FRAGMENT_SUFFIX}"))
+    assert cache.get("a") is None
+    assert cache.size == 0
+
+
+def test_pickle_keeps_only_directory_and_limit(tmp_path):
+    cache = FragmentCache(str(tmp_path / "frag"), max_bytes=5 * BLOCK)
+    cache.put("a", b"a")
+    cache.get("a")
+    copy = pickle.loads(pickle.dumps(cache))
+    assert (copy.directory, copy.max_bytes, copy.hits, copy.misses) == (cache.directory, cache.max_bytes, 0, 0)
+    assert copy.get("a") == b"a"
+
+
+def test_negative_limit():
+    with pytest.raises(ValueError):
+        FragmentCache("frag", max_bytes=-1)
+
+
+def test_fragment_key_depends_on_renderer_version(monkeypatch):
+    reportlab = pytest.importorskip("reportlab")
+    record = vouchers.VoucherRecord("1", "PÉREZ ANA", "20111222", "HOTEL", "101", "10/01/2026", "15/01/2026", 2)
+    layout = load_layout(vouchers.DEFAULT_LAYOUT_PATH)
+    key = vouchers.fragment_key(record, layout, "reportlab")
+    assert key != vouchers.fragment_key(record, layout, "direct")
+
+    vouchers.engine_version.cache_clear()
+    monkeypatch.setattr(reportlab, "Version", "0.0.0")
+    try:
+        assert vouchers.fragment_key(record, layout, "reportlab") != key
+    finally:
+        vouchers.engine_version.cache_clear()
+
+
+def run_cli(*args):
+    script = os.path.join(os.path.dirname(vouchers.__file__), "generar_vouchers_overlay.py")
+    result = subprocess.run([sys.executable, script, *args], capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+
+def test_cli_cache_is_opt_in(synthetic_csv, tmp_path):
+    pytest.importorskip("reportlab")
+    output = str(tmp_path / "out" / "vouchers.pdf")
+    os.makedirs(os.path.dirname(output))
+    run_cli("--csv", synthetic_csv, "--output", output, "--no-incremental")
+    assert not os.path.exists(os.path.join(os.path.dirname(output), ".fragmentos"))
+
+    first = run_cli("--csv", synthetic_csv, "--output", output, "--no-incremental", "--fragment-cache")
+    assert "Fragmentos reutilizados de la caché: 0/" in first
+    assert os.listdir(os.path.join(os.path.dirname(output), ".fragmentos"))
+    second = run_cli("--csv", synthetic_csv, "--output", output, "--no-incremental", "--fragment-cache")
+    reused = second.split("Fragmentos reutilizados de la caché: ")[1].split()[0]
+    hits, total = reused.split("/")
+    assert hits == total != "0"
+
+
+def test_fragments_define_the_substitution_fonts(non_cp1252_csv, tmp_path):
+    pytest.importorskip("reportlab")
+    from pypdf import PdfReader
+
+    output = str(tmp_path / "vouchers.pdf")
+    for run in ("first", "hits"):
+        stdout = run_cli("--csv", non_cp1252_csv, "--output", output, "--no-incremental", "--fragment-cache")
+        if run == "hits":
+            hits, total = stdout.split("Fragmentos reutilizados de la caché: ")[1].split()[0].split("/")
+            assert hits == total
+        for page in PdfReader(output, strict=True).pages:
+            used = {name.decode() for name in re.findall(rb"(/F\d+) [\d.]+ Tf", page.get_contents().get_data())}
+            assert used and used <= set(page["/Resources"]["/Font"])
@@ -0,0 +1,78 @@
+"""Corridas incrementales de los vouchers: qué páginas se copian del PDF anterior y cuáles se vuelven a dibujar."""
+import pytest
+from pypdf import PdfReader
+
+import generar_vouchers_overlay as vouchers
+
+
+TEMPLATE = str(vouchers.SCRIPT_DIR / "VOUCHER ALICANTE.pdf")
+
+
+@pytest.fixture
+def rows():
+    """Seis vouchers (dos páginas) con titular y un acompañante menor cada uno."""
+    return [
+        {
+            "Voucher": str(1000 + index),
+            "Apellido y nombre": f"{role} {index}",
+            "Nro. doc.": str(20000000 + 2 * index + offset),
+            "Edad": age,
+            "Nro. habitación": str(100 + index),
+            "Fecha de ingreso": "03/02/2026",
+            "Fecha de egreso": "08/02/2026",
+        }
+        for index in range(6)
+        for offset, (role, age) in enumerate([("TITULAR", "50"), ("ACOMPAÑANTE", "10")])
+    ]
+
+
+@pytest.fixture
+def render(tmp_path, write_csv, capsys):
+    """Genera ``vouchers.pdf`` desde ``rows`` y devuelve (contenido de cada página, salida de consola)."""
+    output = str(tmp_path / "vouchers.pdf")
+
+    def run(rows, x_adjust_mm=0.0, engine="reportlab", workers=1):
+        records = vouchers.iter_voucher_records(write_csv(rows), use_cache=False)
+        vouchers.generate_pdf(
+            TEMPLATE, output, records, x_adjust_mm, 0.0, None, True, workers=workers, incremental=True, engine=engine
+        )
+        pages = [page.get_contents().get_data() for page in PdfReader(output).pages]
+        return pages, capsys.readouterr().out
+
+    return run
+
+
+def changed_pages(before, after):
+    return [index for index, (old, new) in enumerate(zip(before, after)) if old != new]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_only_the_changed_holder_is_redrawn(rows, render, workers):
+    before, _ = render(rows, workers=workers)
+    assert len(before) == 2
+
+    rows[8]["Apellido y nombre"] = "OTRO TITULAR"
+    after, out = render(rows, workers=workers)
+    assert "reutilizadas de la corrida anterior: 1/2" in out
+    assert changed_pages(before, after) == [1]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_companion_changes_reuse_every_page(rows, render, workers):
+    before, _ = render(rows, workers=workers)
+
+    rows[9]["Apellido y nombre"] = "OTRO ACOMPAÑANTE"
+    after, out = render(rows, workers=workers)
+    assert "reutilizadas de la corrida anterior: 2/2" in out
+    assert after == before
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+@pytest.mark.parametrize("option", [{"x_adjust_mm": 1.5}, {"engine": "direct"}])
+def test_render_options_redraw_every_page(rows, render, workers, option):
+    before, _ = render(rows, workers=workers)
+
+    after, out = render(rows, workers=workers, **option)
+    # Con otros parámetros el manifiesto anterior no vale: no se copia ninguna página
+    assert "reutilizadas" not in out
+    assert changed_pages(before, after) == [0, 1]
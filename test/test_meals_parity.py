@@ -0,0 +1,95 @@
+"""``common.meals`` contra ``processData`` + ``relevantDataToForm`` de ``client/src/lib``, corridos con node."""
+import json
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from benchmarks.synthetic_regimen import HEADERS, iter_regimen_rows
+from common.meals import MEAL_MULTIPLIER, MODES, meal_report_from_csv
+
+
+LIB_DIR = Path(__file__).resolve().parent.parent / "client" / "src" / "lib"
+NODE = shutil.which("node")
+
+# Carga los scripts como las páginas (globales compartidos en un solo contexto) y
+# reemplaza renderVoucher para quedarse con lo que se imprimiría en cada voucher
+HARNESS = r"""
+const fs = require('fs');
+const path = require('path');
+const vm = require('vm');
+const [libDir, csvPath, mode, multipliers] = process.argv.slice(1);
+const context = vm.createContext({ console: { log() {}, warn() {}, error() {} } });
+context.window = context;
+context.APP_CONFIG = { mode, mealMultiplier: JSON.parse(multipliers), serviceLookup: {} };
+for (const name of ['parser.js', 'business.js', 'render.js']) {
+  vm.runInContext(fs.readFileSync(path.join(libDir, name), 'utf8'), context, { filename: name });
+}
+const vouchers = [];
+context.renderVoucher = (item, cantp, mealCount) => {
+  vouchers.push({ voucher: item.voucher, dni: item.dni, cantp, mealCount, roomNumber: item.roomNumber });
+  return '';
+};
+const relevantData = context.processData(fs.readFileSync(csvPath, 'utf8'), mode, context.APP_CONFIG);
+context.relevantDataToForm(relevantData, context.APP_CONFIG);
+process.stdout.write(JSON.stringify(vouchers));
+"""
+
+FIELDS = ("voucher", "dni", "cantp", "mealCount", "roomNumber")
+
+
+def _row(voucher, document, room, services, room_type="DBL", places="2", from_date="03/02/2026", to_date="08/02/2026"):
+    return {
+        "Cód. Alojamiento": "4001",
+        "Descripción": "HOTEL 23 DE MAYO",
+        "Nro. habitación": room,
+        "Tipo habitación": room_type,
+        "Cantidad plazas": places,
+        "Voucher": voucher,
+        "Fecha de ingreso": from_date,
+        "Fecha de egreso": to_date,
+        "Nro. doc.": document,
+        "Apellido y nombre": f"PASAJERO {document}",
+        "Servicios": services,
+    }
+
+
+# Casos que el CSV sintético no trae: tipos que fijan cantp, habitaciones con
+# letras, sin voucher, DNI no numérico, desayuno con media pensión y fechas rotas
+EDGE_ROWS = [
+    _row("990001", "30111222", "12B", "MEDIA PENSIÓN", room_type="DBL MAT"),
+    _row("990001", "29111222", "13", "MEDIA PENSIÓN", room_type="DBL MAT"),
+    _row("990002", "X-1", "7", "PENSIÓN COMPLETA", room_type="TRIPLE A COMPARTIR"),
+    _row("990003", "31000111", "", "DESAYUNO Y MEDIA PENSIÓN", room_type="DBL IND"),
+    _row("", "32000111", "40", "MEDIA PENSIÓN"),
+    _row("", "32000112", "41", "PENSIÓN COMPLETA", places="3"),
+    _row("990004", "33000111", "5", "MEDIA PENSIÓN", from_date="31/02/2026", to_date="02/03/2026"),
+    _row("990005", "34000111", "6", "DESAYUNO", places=""),
+]
+
+
+@pytest.fixture
+def parity_csv(write_csv):
+    rows = [dict(zip(HEADERS, row)) for row in iter_regimen_rows(120, seed=11)]
+    return write_csv(rows + EDGE_ROWS)
+
+
+def run_client(csv_path, mode):
+    completed = subprocess.run(
+        [NODE, "-e", HARNESS, str(LIB_DIR), csv_path, mode, json.dumps(MEAL_MULTIPLIER)],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(completed.stdout)
+
+
+@pytest.mark.skipif(NODE is None, reason="node no está instalado")
+@pytest.mark.parametrize("mode", MODES)
+def test_vouchers_match_client(parity_csv, mode):
+    expected = [{name: voucher[name] for name in FIELDS} for voucher in meal_report_from_csv(parity_csv, mode).vouchers]
+    client = run_client(parity_csv, mode)
+
+    assert expected
+    assert client == expected
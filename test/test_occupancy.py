@@ -0,0 +1,119 @@
+from collections import Counter
+from datetime import date, timedelta
+
+import pytest
+
+from common.csv_cache import open_cache
+from common.meals import MEAL_MULTIPLIER, parse_date, should_include_row
+from common.occupancy import OccupancyIndex, occupancy_from_cache
+from common.regimen_csv import iter_export_rows
+
+
+D = date(2026, 2, 1)
+
+
+def day(offset):
+    return D + timedelta(days=offset)
+
+
+def brute_force(stays):
+    """Pasajeros por noche recorriendo cada estadía día por día."""
+    nights = Counter()
+    for (start, end), count in stays.items():
+        current = start
+        while current < end:
+            nights[current] += count
+            current += timedelta(days=1)
+    return nights
+
+
+STAYS = {
+    (day(0), day(3)): 2,
+    (day(1), day(2)): 1,
+    (day(2), day(6)): 4,
+    (day(5), day(6)): 3,
+    (day(4), day(4)): 5,  # sin noches
+    (day(7), day(6)): 1,  # egreso antes del ingreso
+}
+
+
+@pytest.fixture
+def index():
+    return OccupancyIndex.build(STAYS, meals_per_night=2)
+
+
+def test_build_counts_valid_and_invalid_stays(index):
+    assert index.first_day == day(0)
+    assert index.last_day == day(6)
+    assert index.stays == 10
+    assert index.invalid == 6
+    assert list(index.arrivals) == [2, 1, 4, 0, 0, 3, 0]
+    assert list(index.departures) == [0, 0, 1, 2, 0, 0, 7]
+
+
+def test_occupancy_matches_brute_force(index):
+    expected = brute_force({stay: count for stay, count in STAYS.items() if stay[1] > stay[0]})
+    for offset in range(-2, 10):
+        assert index.occupancy(day(offset)) == expected[day(offset)]
+
+
+def test_nights_and_meals_over_ranges(index):
+    expected = brute_force({stay: count for stay, count in STAYS.items() if stay[1] > stay[0]})
+    for start in range(-2, 9):
+        for end in range(start, 10):
+            nights = sum(expected[day(offset)] for offset in range(start, end))
+            assert index.nights(day(start), day(end)) == nights
+            assert index.meals(day(start), day(end)) == 2 * nights
+    assert index.nights(day(5), day(2)) == 0
+
+
+def test_peak(index):
+    assert index.peak() == (day(5), 7)
+    assert index.peak(day(0), day(2)) == (day(1), 3)
+    # Empate entre los días 3 y 4: el primero
+    assert index.peak(day(3), day(5)) == (day(3), 4)
+    assert index.peak(day(8), day(9)) == (day(8), 0)
+
+
+def test_days_detail(index):
+    detail = index.days()
+    assert [entry.day for entry in detail] == [day(offset) for offset in range(7)]
+    assert [entry.pax for entry in detail] == [2, 3, 6, 4, 4, 7, 0]
+    assert [entry.meals for entry in detail] == [4, 6, 12, 8, 8, 14, 0]
+    outside = index.days(day(-1), day(0)) + index.days(day(8), day(9))
+    assert [(entry.arrivals, entry.departures, entry.pax) for entry in outside] == [(0, 0, 0), (0, 0, 0)]
+
+
+def test_empty_index():
+    index = OccupancyIndex.build({(day(3), day(1)): 2})
+    assert index.stays == 0 and index.invalid == 2
+    assert index.days() == []
+    assert index.nights(day(0), day(5)) == 0
+    assert index.peak() == (date.min, 0)
+
+
+@pytest.mark.parametrize("mode", [None, "MAP", "PC"])
+def test_occupancy_from_cache_matches_the_csv(synthetic_csv, mode):
+    stays = Counter()
+    invalid = 0
+    for row in iter_export_rows(synthetic_csv):
+        if mode is not None and not should_include_row(row.get("Servicios"), mode):
+            continue
+        start, end = parse_date(row["Fecha de ingreso"]), parse_date(row["Fecha de egreso"])
+        if start is None or end is None or end <= start:
+            invalid += 1
+            continue
+        stays[(start, end)] += 1
+    expected = brute_force(stays)
+
+    index = occupancy_from_cache(open_cache(synthetic_csv), mode)
+    assert index.stays == sum(stays.values())
+    assert index.invalid == invalid
+    assert index.meals_per_night == (MEAL_MULTIPLIER[mode] if mode else 1)
+    assert {entry.day: entry.pax for entry in index.days() if entry.pax} == dict(expected)
+    assert index.nights(index.first_day, index.last_day) == sum(expected.values())
+
+
+def test_occupancy_from_cache_rejects_unknown_modes(synthetic_csv):
+    with pytest.raises(ValueError):
+        occupancy_from_cache(open_cache(synthetic_csv), "DESAYUNO")
@@ -0,0 +1,124 @@
+"""``client/src/lib/parser.js`` corrido con node, contra ``common.regimen_csv``."""
+import json
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from common.regimen_csv import LEGACY_COLUMNS, REGIMEN_COLUMNS, iter_export_rows
+
+
+PARSER_JS = Path(__file__).resolve().parent.parent / "client" / "src" / "lib" / "parser.js"
+NODE = shutil.which("node")
+
+pytestmark = pytest.mark.skipif(NODE is None, reason="node no está instalado")
+
+# Carga parser.js como la página (sus funciones quedan en window) y devuelve
+# el resultado de cada llamada [función, argumentos...] que recibe por stdin
+HARNESS = r"""
+const fs = require('fs');
+const vm = require('vm');
+const context = vm.createContext({ console: { log() {}, warn() {}, error() {} } });
+context.window = context;
+vm.runInContext(fs.readFileSync(process.argv[1], 'utf8'), context, { filename: 'parser.js' });
+const calls = JSON.parse(fs.readFileSync(0, 'utf8'));
+process.stdout.write(JSON.stringify(calls.map(([name, ...args]) => context[name](...args))));
+"""
+
+# Claves de parseCSV -> columna de REGIMEN_COLUMNS
+PARSED_COLUMNS = {
+    "id": "Cód. Alojamiento",
+    "hotel": "Descripción",
+    "tipo": "Tipo habitación",
+    "observacion": "Observación habitación",
+    "plazas": "Cantidad plazas",
+    "voucher": "Voucher",
+    "dinRaw": "Fecha de ingreso",
+    "doutRaw": "Fecha de egreso",
+    "dni": "Nro. doc.",
+    "servicios": "Servicios",
+}
+
+
+def run(*calls):
+    completed = subprocess.run(
+        [NODE, "-e", HARNESS, str(PARSER_JS)],
+        input=json.dumps(calls),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(completed.stdout)
+
+
+def test_split_csv_line():
+    results = run(
+        ["splitCSVLine", "a,b,,c"],
+        ["splitCSVLine", 'a,"b,c",d'],
+        ["splitCSVLine", '"dice ""hola""",x'],
+        ["splitCSVLine", '"",x,""'],
+        ["splitCSVLine", 'a;"b;c";d', ";"],
+        ["splitCSVLine", "a\tb,c\td", "\t"],
+    )
+    assert results == [
+        ["a", "b", "", "c"],
+        ["a", "b,c", "d"],
+        ['dice "hola"', "x"],
+        ["", "x", ""],
+        ["a", "b;c", "d"],
+        ["a", "b,c", "d"],
+    ]
+
+
+def regimen_fields(voucher, observation="", document="20111222"):
+    return [
+        "4001", "HOTEL 23 DE MAYO", "12B", "DBL", observation, "2", voucher, "1 - LA PLATA",
+        "03/02/2026", "08/02/2026", "2", "DNI", document, "pérez juan", "40", "SUTEBA",
+        "MEDIA PENSIÓN", "PAQ", "BUS",
+    ]
+
+
+@pytest.mark.parametrize("delimiter", [",", ";", "\t"])
+def test_parse_csv_matches_regimen_csv(tmp_path, delimiter):
+    lines = [
+        delimiter.join(REGIMEN_COLUMNS[:19]),
+        delimiter.join(regimen_fields("1001")),
+        delimiter.join(regimen_fields("1002", observation=f"CUNA{delimiter} VISTA AL MAR")),
+        delimiter.join(regimen_fields("1003", observation=f'"CON{delimiter} COMILLAS"', document="30111222")),
+        "",
+    ]
+    text = "\ufeff" + "\r\n".join(lines)
+    path = tmp_path / "regimen.csv"
+    path.write_text(text, encoding="utf-8", newline="")
+
+    (parsed,) = run(["parseCSV", text])
+    expected = list(iter_export_rows(str(path)))
+    assert len(parsed) == len(expected) == 3
+    for js_row, row in zip(parsed, expected):
+        assert {key: js_row[key] for key in PARSED_COLUMNS} == {key: row[name] for key, name in PARSED_COLUMNS.items()}
+        assert js_row["roomNumber"] == "12"
+        assert js_row["nombre"] == row["Apellido y nombre"].upper() == "PÉREZ JUAN"
+    assert parsed[1]["observacion"] == "CUNA; VISTA AL MAR"
+
+
+def test_parse_csv_detects_the_legacy_format(tmp_path):
+    legacy = ["4001", "HOTEL", "7", "DBL", "OBS", "2", "2001", "CONFIRMADA", "03/02/2026", "05/02/2026",
+              "T1", "A", "30111222", "juan", "pérez", "juan@example.com", "PENSIÓN COMPLETA", "LP", "ALICANTE"]
+    text = "\n".join([",".join(LEGACY_COLUMNS), ",".join(legacy)])
+    path = tmp_path / "legacy.csv"
+    path.write_text(text, encoding="utf-8")
+
+    ((parsed,),) = run(["parseCSV", text])
+    (row,) = iter_export_rows(str(path))
+    assert parsed["estado"] == "CONFIRMADA" and parsed["tarifa"] == "T1"
+    assert {key: parsed[key] for key in PARSED_COLUMNS} == {key: row[name] for key, name in PARSED_COLUMNS.items()}
+    (name,) = run(["normalizePassengerName", parsed["nombre"], parsed["apellido"]])
+    assert name == row["Apellido y nombre"] == "JUAN PÉREZ"
+
+
+def test_nineteen_columns_with_full_name_are_not_legacy():
+    text = "\n".join([",".join(REGIMEN_COLUMNS[:19]), ",".join(regimen_fields("1001"))])
+    ((parsed,),) = run(["parseCSV", text])
+    assert parsed["nombreCompleto"] == "PÉREZ JUAN"
+    assert "estado" not in parsed
@@ -0,0 +1,107 @@
+import csv
+import os
+
+import pytest
+
+from benchmarks.synthetic_regimen import HEADERS
+from common.passenger_index import PassengerIndex, index_path_for, load_index, read_index
+
+
+def passenger(voucher, name, document, **values):
+    return {"Voucher": voucher, "Apellido y nombre": name, "Nro. doc.": document, "Edad": "40", **values}
+
+
+ROWS = [
+    passenger("1000", "MUÑOZ AGUSTÍN", "20.123.456"),
+    passenger("1000", "MUÑOZ INÉS", "20123457"),
+    passenger("2000", "MUNOZ JOSÉ", "30111222", **{"Observación habitación": "Cuna,\nvista al mar"}),
+    passenger("3000", "PÉREZ ANA", "30111223"),
+    passenger("", "SIN VOUCHER", "30111224"),
+]
+
+
+def test_find_by_voucher_document_and_name(write_csv):
+    index = PassengerIndex.build(write_csv(ROWS))
+    assert index.find("1000") == ["1000"]
+    # El DNI se compara solo por sus dígitos
+    assert index.find("20123456") == ["1000"]
+    assert index.find("20.123.457") == ["1000"]
+    # Prefijo del apellido sin tildes ni mayúsculas
+    assert index.find("munoz") == ["1000", "2000"]
+    assert index.find("muñoz ag") == ["1000"]
+    assert index.find("perez") == ["3000"]
+    assert index.find("sin voucher") == []
+    assert index.find("99999999") == []
+
+
+def test_name_prefix_limit(write_csv):
+    index = PassengerIndex.build(write_csv(ROWS))
+    assert len(index.name_prefix_rows("mu", limit=2)) == 2
+    assert index.name_prefix_rows("") == []
+
+
+def test_group_reads_only_the_indexed_rows(write_csv):
+    index = PassengerIndex.build(write_csv(ROWS))
+    group = index.group("2000")
+    assert [passenger.name for passenger in group.passengers] == ["MUNOZ JOSÉ"]
+    # Una observación entre comillas con salto de línea no corre las filas siguientes
+    assert [passenger.name for passenger in index.group("3000").passengers] == ["PÉREZ ANA"]
+    assert [passenger.doc_number for passenger in index.group("1000").passengers] == ["20.123.456", "20123457"]
+    assert index.group("4000") is None
+
+
+def test_groups_match_the_csv(synthetic_csv):
+    index = PassengerIndex.build(synthetic_csv)
+    with open(synthetic_csv, encoding="utf-8", newline="") as handle:
+        rows = list(csv.DictReader(handle))
+    names = {}
+    for row in rows:
+        names.setdefault(row["Voucher"], []).append(row["Apellido y nombre"])
+    assert set(index.vouchers) == set(names)
+    for voucher, expected in names.items():
+        assert [passenger.name for passenger in index.group(voucher).passengers] == expected
+
+
+def test_load_index_persists_and_invalidates(write_csv):
+    csv_path = write_csv(ROWS)
+    assert read_index(csv_path) is None
+    built = load_index(csv_path)
+    assert os.path.exists(index_path_for(csv_path))
+
+    saved = read_index(csv_path)
+    assert saved is not None
+    assert saved.vouchers == built.vouchers and saved.names == built.names
+
+    # Si el CSV cambia, el índice guardado deja de valer y se rearma
+    write_csv(ROWS + [passenger("4000", "ROMERO LUCÍA", "30111225")])
+    assert read_index(csv_path) is None
+    assert load_index(csv_path).find("romero") == ["4000"]
+    assert read_index(csv_path) is not None
+
+
+@pytest.mark.parametrize("encoding, delimiter", [("cp1252", ","), ("utf-8", ";"), ("cp1252", "\t"), ("utf-8-sig", ",")])
+def test_exports_in_any_encoding_and_delimiter(write_csv, encoding, delimiter):
+    index = PassengerIndex.build(write_csv(ROWS, encoding=encoding, delimiter=delimiter))
+    assert index.find("munoz") == ["1000", "2000"]
+    assert index.find("1000") == ["1000"]
+    assert index.find("30111223") == ["3000"]
+    assert [passenger.name for passenger in index.group("1000").passengers] == ["MUÑOZ AGUSTÍN", "MUÑOZ INÉS"]
+    assert [passenger.name for passenger in index.group("3000").passengers] == ["PÉREZ ANA"]
+
+
+def test_observation_commas_are_repaired(tmp_path):
+    def line(voucher, name, observation):
+        values = {"Voucher": voucher, "Apellido y nombre": name, "Nro. doc.": "20111222", "Edad": "40"}
+        values["Observación habitación"] = observation
+        return ",".join(values.get(column, "") for column in HEADERS)
+
+    csv_path = tmp_path / "regimen.csv"
+    lines = [",".join(HEADERS), line("1000", "MUÑOZ INÉS", "CUNA, VISTA AL MAR"), line("2000", "PÉREZ ANA", "")]
+    csv_path.write_text("\n".join(lines) + "\n", encoding="cp1252")
+
+    index = PassengerIndex.build(str(csv_path))
+    assert index.find("munoz") == ["1000"]
+    (holder,) = index.group("1000").passengers
+    # Sin la reparación, los campos después de la observación quedarían corridos
+    assert (holder.name, holder.doc_number, holder.age) == ("MUÑOZ INÉS", "20111222", 40)
+    assert index.find("20111222") == ["1000", "2000"]
@@ -0,0 +1,107 @@
+import io
+
+import pytest
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import (
+    ArrayObject,
+    DecodedStreamObject,
+    DictionaryObject,
+    NameObject,
+    NumberObject,
+)
+
+from common.pdf_optimize import MIN_COMPRESS_BYTES, content_names, optimize_writer, prune_form_resources
+from generar_con_overlay import generar_fichas_en_lote
+
+
+def stream(data, **entries):
+    obj = DecodedStreamObject()
+    obj.set_data(data)
+    for key, value in entries.items():
+        obj[NameObject(f"/{key}")] = value
+    return obj
+
+
+def names(*keys):
+    return DictionaryObject({NameObject(key): NumberObject(index) for index, key in enumerate(keys)})
+
+
+def test_content_names():
+    data = b"q /Plantilla Do Q BT /F#31 9 Tf (a /b) Tj /GS0 gs [/Indexed] ET /Sp#20ace sh"
+    assert content_names(data) >= {"/Plantilla", "/F1", "/GS0", "/Indexed", "/Sp ace"}
+    assert "/F#31" not in content_names(data)
+
+
+def test_prune_form_resources():
+    resources = DictionaryObject(
+        {
+            NameObject("/Font"): names("/F1", "/F2"),
+            NameObject("/XObject"): names("/Im1"),
+            NameObject("/ProcSet"): ArrayObject([NameObject("/PDF"), NameObject("/Text")]),
+            NameObject("/Para"): names("/P1", "/P2"),
+        }
+    )
+    form = stream(b"BT /F1 9 Tf (x) Tj ET", Subtype=NameObject("/Form"), Resources=resources)
+
+    assert prune_form_resources(form) == 1 + 1 + 1 + 2
+    assert list(form["/Resources"]) == ["/Font"]
+    assert list(form["/Resources"]["/Font"]) == ["/F1"]
+    # El diccionario original (que puede estar compartido) no se toca
+    assert list(resources["/Font"]) == ["/F1", "/F2"] and "/Para" in resources
+
+
+def test_prune_keeps_forms_that_use_everything():
+    resources = DictionaryObject({NameObject("/Font"): names("/F1")})
+    form = stream(b"BT /F1 9 Tf ET", Subtype=NameObject("/Form"), Resources=resources)
+    assert prune_form_resources(form) == 0
+    assert form["/Resources"] is resources
+    assert prune_form_resources(stream(b"", Subtype=NameObject("/Form"))) == 0
+
+
+def build_writer(pages=3):
+    writer = PdfWriter()
+    for _ in range(pages):
+        page = writer.add_blank_page(100, 100)
+        page[NameObject("/Resources")] = DictionaryObject({NameObject("/Font"): names("/F1")})
+        page[NameObject("/Contents")] = writer._add_object(stream(b"BT /F1 9 Tf (x) Tj ET"))
+    return writer
+
+
+def test_optimize_writer_compresses_and_shares():
+    writer = build_writer()
+    small = writer._add_object(stream(b"x" * (MIN_COMPRESS_BYTES - 1)))
+    large = writer._add_object(stream(b"q Q\n" * 64))
+    writer.pages[0][NameObject("/Extra")] = ArrayObject([small, large])
+
+    stats = optimize_writer(writer)
+    assert stats.shared_resources == 2
+    # Los tres content streams son iguales: queda uno
+    assert stats.removed_objects >= 2
+    assert len({page.raw_get("/Resources").idnum for page in writer.pages}) == 1
+
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    reader = PdfReader(io.BytesIO(buffer.getvalue()), strict=True)
+    small_data, large_data = (obj.get_object() for obj in reader.pages[0]["/Extra"])
+    assert "/Filter" not in small_data
+    assert large_data["/Filter"] == "/FlateDecode"
+    assert large_data.get_data() == b"q Q\n" * 64
+    assert stats.compressed_streams == 1
+    assert [page["/Resources"]["/Font"]["/F1"] for page in reader.pages] == [0, 0, 0]
+
+
+@pytest.mark.parametrize("cantidad", [7, 5])
+def test_reused_pages_keep_their_fonts(tmp_path, synthetic_csv, fichas_de, capsys, cantidad):
+    salida = str(tmp_path / "fichas.pdf")
+    generar_fichas_en_lote(fichas_de(synthetic_csv, 7), salida, incremental=True, motor="direct")
+    # Segunda corrida sin cambios (o con menos fichas): todas las páginas se copian del PDF anterior
+    fichas = fichas_de(synthetic_csv, cantidad)
+    generar_fichas_en_lote(fichas, salida, incremental=True, motor="direct")
+    assert f"reutilizadas de la corrida anterior: {cantidad}/{cantidad}" in capsys.readouterr().out
+
+    reader = PdfReader(salida, strict=True)
+    assert len(reader.pages) == cantidad
+    for page, (titular, *_) in zip(reader.pages, fichas):
+        fonts = page["/Resources"]["/Font"]
+        assert fonts and all(font.get_object() is not None for font in fonts.values())
+        assert titular.voucher in page.extract_text()
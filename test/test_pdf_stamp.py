@@ -0,0 +1,82 @@
+"""Los PDF de una ficha por archivo (``SinglePageFile``) tienen que ser PDF válidos para pypdf en modo estricto."""
+import io
+import random
+import re
+
+import pytest
+from pypdf import PdfReader
+
+from common.layout import load_layout
+from common.pdf_stamp import build_single_page_file
+from common.pdf_text import engine_font_names
+from conftest import NON_CP1252_NAME
+from generar_con_overlay import POSICIONES_JSON, cargar_plantilla, generar_fichas_en_lote
+
+
+_XREF_SECTION = re.compile(rb"xref\n(\d+) (\d+)\n")
+
+
+def check_xref(data):
+    """La xref clásica apunta al comienzo de cada objeto y startxref a la tabla."""
+    startxref = int(re.search(rb"startxref\s+(\d+)\s+%%EOF\s*$", data).group(1))
+    section = _XREF_SECTION.match(data, startxref)
+    assert section, "startxref no apunta a la tabla xref"
+    first, count = int(section.group(1)), int(section.group(2))
+    entries = data[section.end() : section.end() + 20 * count]
+    for number, entry in enumerate(entries[index : index + 20] for index in range(0, len(entries), 20)):
+        offset, _, kind = entry.split()
+        if kind == b"n":
+            assert data.startswith(b"%d 0 obj" % (first + number), int(offset)), f"objeto {first + number}"
+    trailer = data[section.end() + 20 * count :]
+    assert trailer.startswith(b"trailer")
+    assert int(re.search(rb"/Size (\d+)", trailer).group(1)) == first + count
+
+
+def check_fonts(page):
+    """Cada fuente que usa el contenido (``/Fn tamaño Tf``) está en ``/Resources /Font`` de la página."""
+    used = {name.decode() for name in re.findall(rb"(/F\d+) [\d.]+ Tf", page.get_contents().get_data())}
+    assert used and used <= set(page["/Resources"]["/Font"])
+
+
+def check_pdf(data):
+    check_xref(data)
+    reader = PdfReader(io.BytesIO(data), strict=True)
+    assert len(reader.pages) == 1
+    page = reader.pages[0]
+    # Se recorre todo el árbol de la página (plantilla, fuentes, overlay)
+    page.get_contents().get_data()
+    for name, xobject in page["/Resources"]["/XObject"].items():
+        xobject.get_object().get_data()
+    return reader
+
+
+@pytest.fixture(scope="module")
+def plantilla():
+    return cargar_plantilla()
+
+
+@pytest.mark.parametrize("motor", ["reportlab", "direct"])
+@pytest.mark.parametrize("optimize", [True, False])
+def test_rendered_files_are_valid(plantilla, motor, optimize):
+    base = build_single_page_file(plantilla, engine_font_names(load_layout(POSICIONES_JSON), motor), optimize)
+    contents = [b"", b"BT /F1 10 Tf 72 720 Td (Hola) Tj ET", random.Random(0).randbytes(4096), b"q Q\n" * 5000]
+    for content in contents:
+        reader = check_pdf(base.render(content))
+        assert reader.pages[0]["/Contents"][-1].get_object().get_data() == content
+
+
+@pytest.mark.parametrize("motor", ["reportlab", "direct"])
+@pytest.mark.parametrize("optimizar", [True, False])
+def test_batch_fichas_are_valid(tmp_path, non_cp1252_csv, fichas_de, plantilla, motor, optimizar):
+    fichas = fichas_de(non_cp1252_csv)
+    assert fichas[0][0].name == NON_CP1252_NAME
+
+    generadas = generar_fichas_en_lote(
+        fichas, str(tmp_path), combinado=False, plantilla=plantilla, motor=motor, optimizar=optimizar
+    )
+    assert len(generadas) == len(fichas)
+    for ruta, (titular, *_) in zip(generadas, fichas):
+        with open(ruta, "rb") as handle:
+            reader = check_pdf(handle.read())
+        check_fonts(reader.pages[0])
+        assert titular.voucher in reader.pages[0].extract_text()
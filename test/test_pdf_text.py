@@ -0,0 +1,86 @@
+import pytest
+
+from common.layout import load_layout
+from common.pdf_text import engine_content, engine_font_names
+from generar_con_overlay import POSICIONES_JSON
+from generar_vouchers_overlay import DEFAULT_LAYOUT_PATH
+
+
+@pytest.fixture(scope="module", params=[POSICIONES_JSON, DEFAULT_LAYOUT_PATH], ids=["fichas", "vouchers"])
+def layout(request):
+    return load_layout(request.param)
+
+
+def test_reportlab_registers_its_substitution_fonts(layout):
+    font_names = engine_font_names(layout, "reportlab")
+    assert {"Symbol", "ZapfDingbats"} <= set(font_names)
+    assert len(set(font_names.values())) == len(font_names)
+    assert engine_font_names(layout, "direct").keys() == {run.font for run in layout.runs}
+
+
+def test_unregistered_fonts_are_rejected(layout):
+    values = {key: "ŞAHIN ĞÜL" for run in layout.runs for key in (op.key for op in run.ops)}
+    font_names = engine_font_names(layout, "reportlab")
+    content = engine_content(layout, [(values, layout.slots[0])], font_names, "reportlab")
+    assert font_names["ZapfDingbats"].encode() in content
+
+    without_substitutes = {font: name for font, name in font_names.items() if font not in ("Symbol", "ZapfDingbats")}
+    with pytest.raises(ValueError, match="fuentes no registradas"):
+        engine_content(layout, [(values, layout.slots[0])], without_substitutes, "reportlab")
+
+
+def placed_text(content):
+    """(texto, x, y, fuente) de cada ``Tj``, con la posición del comienzo de su línea."""
+    from pypdf.generic import ContentStream, DecodedStreamObject
+
+    stream = DecodedStreamObject()
+    stream.set_data(content)
+    placed = []
+    x = y = leading = 0.0
+    font = None
+    for operands, operator in ContentStream(stream, None).operations:
+        if operator == b"BT":
+            x = y = 0.0
+        elif operator == b"Tm":
+            x, y = (float(value) for value in operands[4:])
+        elif operator == b"Td":
+            x, y = x + float(operands[0]), y + float(operands[1])
+        elif operator == b"T*":
+            y -= leading
+        elif operator == b"TL":
+            leading = float(operands[0])
+        elif operator == b"Tf":
+            font = operands[0]
+        elif operator == b"Tj":
+            placed.append((operands[0].original_bytes.decode("cp1252"), round(x, 3), round(y, 3), font))
+    return placed
+
+
+def draw(layout, values, engine):
+    font_names = engine_font_names(layout, engine)
+    content = engine_content(layout, [(values, layout.slots[0])], font_names, engine)
+    fonts = {name: font for font, name in font_names.items()}
+    return [(text, x, y, fonts[font]) for text, x, y, font in placed_text(content)]
+
+
+def sample_values(layout, name):
+    return {key: f"{name} {index}" for index, key in enumerate(op.key for run in layout.runs for op in run.ops)}
+
+
+def test_engines_place_the_same_text(layout):
+    values = sample_values(layout, "MUÑOZ ÁNGELA")
+    direct = draw(layout, values, "direct")
+    assert sorted(text for text, *_ in direct) == sorted(values.values())
+    assert sorted(direct) == sorted(draw(layout, values, "reportlab"))
+
+
+def test_engines_differ_outside_cp1252(layout):
+    values = sample_values(layout, "ŞAHIN")
+    direct = draw(layout, values, "direct")
+    assert sorted(text for text, *_ in direct) == sorted(value.replace("Ş", "?") for value in values.values())
+
+    # reportlab dibuja la Ş con ZapfDingbats (un cuadrado negro) en la misma posición y sigue con el resto
+    reportlab = draw(layout, values, "reportlab")
+    squares = [(x, y) for text, x, y, font in reportlab if font == "ZapfDingbats"]
+    assert sorted(squares) == sorted((x, y) for _, x, y, _ in direct)
+    assert {text for text, *_, font in reportlab if font == "ZapfDingbats"} == {"n"}
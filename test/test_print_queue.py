@@ -0,0 +1,107 @@
+import os
+import shlex
+import subprocess
+import sys
+import threading
+import time
+from itertools import count
+
+import pytest
+
+from common.print_queue import CommandSink, DirectorySink, PrintJob, run_print_queue
+
+
+def make_jobs(total):
+    return [PrintJob(f"lote_{index:02d}.pdf", f"%PDF lote {index}\n".encode()) for index in range(total)]
+
+
+def test_directory_sink_delivers_in_order(tmp_path):
+    carpeta = str(tmp_path / "spool")
+    jobs = make_jobs(7)
+    delivered = run_print_queue(jobs, DirectorySink(carpeta), queue_size=2, verbose=False)
+
+    assert delivered == [os.path.join(carpeta, job.name) for job in jobs]
+    assert sorted(os.listdir(carpeta)) == [job.name for job in jobs]
+    for path, job in zip(delivered, jobs):
+        with open(path, "rb") as handle:
+            assert handle.read() == job.data
+
+
+def test_directory_sink_never_exposes_partial_files(tmp_path, monkeypatch):
+    sink = DirectorySink(str(tmp_path))
+    (tmp_path / "lote_00.pdf").write_bytes(b"anterior")
+    seen = []
+    replace = os.replace
+
+    def spy(source, target):
+        # El spooler solo ve el nombre final cuando el archivo ya está completo
+        seen.append((os.path.basename(source), os.path.basename(target), (tmp_path / "lote_00.pdf").read_bytes()))
+        replace(source, target)
+
+    monkeypatch.setattr(os, "replace", spy)
+    (job,) = make_jobs(1)
+    sink.submit(job)
+
+    assert seen == [("lote_00.pdf.tmp", "lote_00.pdf", b"anterior")]
+    assert os.listdir(tmp_path) == ["lote_00.pdf"]
+    assert (tmp_path / "lote_00.pdf").read_bytes() == job.data
+
+
+def test_command_sink_runs_the_command_per_job(tmp_path):
+    impreso = tmp_path / "impresora.txt"
+    # Hace de ``lp``: agrega cada trabajo (la ruta llega como $0) a un archivo
+    command = shlex.join(["sh", "-c", f'cat "$0" >> {shlex.quote(str(impreso))}'])
+    jobs = make_jobs(4)
+    delivered = run_print_queue(jobs, CommandSink(command, str(tmp_path / "spool")), verbose=False)
+
+    assert [os.path.basename(path) for path in delivered] == [job.name for job in jobs]
+    assert impreso.read_bytes() == b"".join(job.data for job in jobs)
+
+
+def test_command_sink_failure_propagates(tmp_path):
+    command = shlex.join([sys.executable, "-c", "raise SystemExit(3)"])
+    with pytest.raises(subprocess.CalledProcessError):
+        run_print_queue(make_jobs(3), CommandSink(command, str(tmp_path)), verbose=False)
+
+
+class FailingSink(DirectorySink):
+    def submit(self, job):
+        time.sleep(0.05)
+        raise OSError("impresora apagada")
+
+
+def test_consumer_error_stops_the_producer(tmp_path):
+    produced = []
+
+    def jobs():
+        # Render sin fin: solo termina si run_print_queue deja de pedir trabajos
+        for index in count():
+            produced.append(index)
+            yield PrintJob(f"lote_{index}.pdf", b"%PDF")
+
+    result = {}
+
+    def run():
+        try:
+            run_print_queue(jobs(), FailingSink(str(tmp_path)), queue_size=1, verbose=False)
+        except OSError as exc:
+            result["error"] = exc
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout=10)
+    assert not thread.is_alive(), "el productor quedó bloqueado con la cola llena"
+    assert str(result["error"]) == "impresora apagada"
+    # Con la cola de 1 el render no se adelanta más que un par de trabajos
+    assert len(produced) <= 4
+
+
+def test_producer_error_stops_the_consumer(tmp_path):
+    def jobs():
+        yield from make_jobs(2)
+        raise ValueError("CSV roto")
+
+    with pytest.raises(ValueError, match="CSV roto"):
+        run_print_queue(jobs(), DirectorySink(str(tmp_path)), verbose=False)
+    # Lo ya renderizado se entregó antes de cortar
+    assert sorted(os.listdir(tmp_path)) == ["lote_00.pdf", "lote_01.pdf"]
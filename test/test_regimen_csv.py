@@ -0,0 +1,156 @@
+import csv
+
+import pytest
+
+from common.regimen_csv import (
+    LEGACY_COLUMNS,
+    REGIMEN_COLUMNS,
+    IngestStats,
+    detect_encoding,
+    detect_format,
+    detect_format_text,
+    iter_export_rows,
+    iter_text_rows,
+    legacy_name,
+    write_normalized,
+)
+
+
+HEADER = ",".join(REGIMEN_COLUMNS[:19])
+
+
+def regimen_line(voucher, observation="", document="20111222", name="PÉREZ JUAN", delimiter=","):
+    fields = [
+        "4001", "HOTEL 23 DE MAYO", "12", "DBL", observation, "2", voucher, "1 - LA PLATA",
+        "03/02/2026", "08/02/2026", "2", "DNI", document, name, "40", "SUTEBA",
+        "MEDIA PENSIÓN", "PAQ", "BUS",
+    ]
+    return delimiter.join(fields)
+
+
+@pytest.fixture
+def write_text(tmp_path):
+    def write(lines, name="regimen.csv", encoding="utf-8"):
+        path = tmp_path / name
+        path.write_bytes(("\n".join(lines) + "\n").encode(encoding))
+        return str(path)
+
+    return write
+
+
+def test_detect_encoding():
+    text = "Descripción,Voucher\n"
+    assert detect_encoding(text.encode("utf-8")) == "utf-8-sig"
+    assert detect_encoding(b"\xef\xbb\xbf" + text.encode("utf-8")) == "utf-8-sig"
+    assert detect_encoding(text.encode("cp1252")) == "cp1252"
+    # Una muestra cortada a mitad de un carácter sigue siendo UTF-8
+    assert detect_encoding("Peña".encode("utf-8")[:-1]) == "utf-8-sig"
+
+
+@pytest.mark.parametrize("delimiter", [",", ";", "\t"])
+def test_detect_delimiter(delimiter):
+    export_format = detect_format_text(delimiter.join(REGIMEN_COLUMNS[:19]))
+    assert export_format.kind == "regimen"
+    assert export_format.delimiter == delimiter
+    assert export_format.header == REGIMEN_COLUMNS[:19]
+
+
+def test_header_names_are_canonicalized():
+    export_format = detect_format_text("\ufeffcod. alojamiento ,VOUCHER,Descripcion,  Nro.   doc.")
+    assert export_format.header == ("Cód. Alojamiento", "Voucher", "Descripción", "Nro. doc.")
+    assert not export_format.in_order
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError, match="Formato de CSV no reconocido"):
+        detect_format_text("a,b,c")
+
+
+@pytest.mark.parametrize("delimiter", [",", ";", "\t"])
+@pytest.mark.parametrize("encoding", ["utf-8", "utf-8-sig", "cp1252"])
+def test_rows_read_with_any_delimiter_and_encoding(write_text, delimiter, encoding):
+    path = write_text(
+        [HEADER.replace(",", delimiter), regimen_line("1001", name="MUÑOZ INÉS", delimiter=delimiter)],
+        encoding=encoding,
+    )
+    export_format = detect_format(path)
+    assert export_format.delimiter == delimiter
+    assert export_format.encoding == ("cp1252" if encoding == "cp1252" else "utf-8-sig")
+    (row,) = iter_export_rows(path)
+    assert row["Apellido y nombre"] == "MUÑOZ INÉS"
+    assert row["Servicios"] == "MEDIA PENSIÓN"
+    assert list(row) == list(REGIMEN_COLUMNS)
+
+
+def test_observation_commas_are_repaired(write_text):
+    path = write_text(
+        [
+            HEADER,
+            regimen_line("1001"),
+            regimen_line("1002", observation="CUNA, VISTA AL MAR, PB"),
+            regimen_line("1003", observation='"CON, COMILLAS"'),
+            regimen_line("1004", observation="BAJA,"),
+        ]
+    )
+    stats = IngestStats()
+    rows = list(iter_export_rows(path, stats))
+    assert [row["Observación habitación"] for row in rows] == ["", "CUNA; VISTA AL MAR; PB", "CON, COMILLAS", "BAJA;"]
+    # El resto de la fila no se corre
+    assert {row["Cantidad plazas"] for row in rows} == {"2"}
+    assert {row["Nro. doc."] for row in rows} == {"20111222"}
+    assert (stats.rows, stats.repaired, stats.padded) == (4, 2, 0)
+    assert stats.repaired_lines == [3, 5]
+
+
+def test_short_rows_are_padded_and_counted(write_text):
+    path = write_text([HEADER, "4001,HOTEL,12,DBL,,2,,1 - LA PLATA,31/02/2026"])
+    stats = IngestStats()
+    (row,) = iter_export_rows(path, stats)
+    assert row["Apellido y nombre"] == "" and row["Estado"] == ""
+    assert (stats.padded, stats.without_voucher, stats.invalid_dates) == (1, 1, 1)
+
+
+def test_legacy_format(write_text):
+    legacy = ["4001", "HOTEL", "7", "DBL", "OBS", "2", "2001", "CONFIRMADA", "03/02/2026", "05/02/2026",
+              "T1", "A", "30111222", "juan", "pérez", "juan@example.com", "PENSIÓN COMPLETA", "LP", "ALICANTE"]
+    with_email = list(legacy)
+    with_email[14] = "juan@example.com"
+    path = write_text([",".join(LEGACY_COLUMNS), ",".join(legacy), ",".join(with_email)])
+
+    export_format = detect_format(path)
+    assert export_format.kind == "legacy"
+    rows = list(iter_export_rows(path))
+    assert [row["Apellido y nombre"] for row in rows] == ["JUAN PÉREZ", "JUAN"]
+    assert rows[0]["Voucher"] == "2001" and rows[0]["Estado"] == "CONFIRMADA"
+    assert rows[0]["Tarifa"] == "T1" and "Nombre" not in rows[0]
+
+
+def test_legacy_name():
+    assert legacy_name(" ana ", " gómez ") == "ANA GÓMEZ"
+    assert legacy_name("ana", "ana@example.com") == "ANA"
+    assert legacy_name("ana", "11 4444-5555") == "ANA"
+    assert legacy_name("ana", "") == "ANA"
+
+
+def test_write_normalized(write_text, tmp_path):
+    path = write_text(
+        [HEADER.replace(",", ";"), regimen_line("1001", observation="A;B", delimiter=";")],
+        encoding="cp1252",
+    )
+    output, stats = write_normalized(path, str(tmp_path / "limpio.csv"))
+    assert stats.repaired == 1
+    with open(output, encoding="utf-8", newline="") as handle:
+        header, row = list(csv.reader(handle))
+    assert header == list(REGIMEN_COLUMNS)
+    assert row[REGIMEN_COLUMNS.index("Observación habitación")] == "A;B"
+    assert row[REGIMEN_COLUMNS.index("Servicios")] == "MEDIA PENSIÓN"
+    # La copia normalizada se lee igual que el original, sin reparaciones
+    stats = IngestStats()
+    assert list(iter_export_rows(output, stats)) == list(iter_export_rows(path))
+    assert stats.repaired == stats.padded == 0
+
+
+def test_text_rows_match_file_rows(synthetic_csv):
+    with open(synthetic_csv, encoding="utf-8") as handle:
+        text = handle.read()
+    assert list(iter_text_rows(text)) == list(iter_export_rows(synthetic_csv))
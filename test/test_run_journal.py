@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+from common import print_queue
+from generar_con_overlay import DIARIO_CORRIDA, FICHAS_POR_LOTE, generar_fichas_en_lote
+
+
+class Corte(Exception):
+    pass
+
+
+@pytest.fixture
+def fichas(synthetic_csv, fichas_de):
+    return fichas_de(synthetic_csv, 40)
+
+
+@pytest.fixture
+def entregadas(monkeypatch):
+    """Nombres de los archivos que se escriben (los que se saltean no pasan por el sink)."""
+    nombres = []
+    submit = print_queue.DirectorySink.submit
+
+    def registrar(self, job):
+        nombres.append(job.name)
+        return submit(self, job)
+
+    monkeypatch.setattr(print_queue.DirectorySink, "submit", registrar)
+    return nombres
+
+
+def cortar_despues_de(fichas, cantidad):
+    yield from fichas[:cantidad]
+    raise Corte()
+
+
+def estado(carpeta):
+    return {
+        nombre: (info.st_ino, info.st_mtime_ns)
+        for nombre in os.listdir(carpeta)
+        if nombre.endswith(".pdf")
+        for info in [os.stat(os.path.join(carpeta, nombre))]
+    }
+
+
+def test_resume_rewrites_only_missing_fichas(tmp_path, fichas, entregadas):
+    salida = str(tmp_path / "fichas")
+    generar = lambda lote, **kwargs: generar_fichas_en_lote(lote, salida, combinado=False, motor="direct", **kwargs)  # noqa: E731
+
+    with pytest.raises(Corte):
+        generar(cortar_despues_de(fichas, FICHAS_POR_LOTE + 4))
+    # El lote a medio armar se pierde; los archivos terminados quedan en el diario
+    escritas = set(entregadas)
+    assert len(escritas) == FICHAS_POR_LOTE
+    ruta_diario = os.path.join(salida, DIARIO_CORRIDA)
+    with open(ruta_diario, encoding="utf-8") as handle:
+        diario = handle.read()
+
+    # Una reimpresión con --find no lee ni toca el diario de la corrida cortada
+    generar(fichas[:1] + fichas[-1:], reanudar=False)
+    with open(ruta_diario, encoding="utf-8") as handle:
+        assert handle.read() == diario
+
+    antes = estado(salida)
+    entregadas.clear()
+    generadas = generar(fichas)
+
+    nombres = [f"ficha_voucher_{titular.voucher}.pdf" for titular, *_ in fichas]
+    assert [os.path.basename(ruta) for ruta in generadas] == nombres
+    # Solo se escriben las que el diario no tenía (la de --find no está anotada)
+    assert set(entregadas) == set(nombres) - escritas
+    despues = estado(salida)
+    assert {nombre: despues[nombre] for nombre in escritas} == {nombre: antes[nombre] for nombre in escritas}
+    assert set(despues) == set(nombres)
+    assert not os.path.exists(ruta_diario)
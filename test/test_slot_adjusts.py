@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+import generar_vouchers_overlay as vouchers
+from common.layout import load_layout, mm
+
+
+@pytest.fixture
+def four_slot_layout(tmp_path):
+    with open(vouchers.DEFAULT_LAYOUT_PATH, encoding="utf-8") as handle:
+        layout = json.load(handle)
+    layout["slots"] = [{"x_mm": 24, "y_top_mm": y} for y in (20, 90, 160, 230)]
+    path = tmp_path / "layout.json"
+    path.write_text(json.dumps(layout), encoding="utf-8")
+    return str(path)
+
+
+def test_resolve_slot_y_adjusts_sized_from_layout():
+    assert vouchers.resolve_slot_y_adjusts(1.0) is None
+    assert vouchers.resolve_slot_y_adjusts(1.0, 2.0, None, 3.0) == [2.0, 1.0, 3.0]
+    assert vouchers.resolve_slot_y_adjusts(1.0, 2.0, slot_count=5) == [2.0, 1.0, 1.0, 1.0, 1.0]
+    assert vouchers.resolve_slot_y_adjusts(1.0, None, 2.0, slot_count=2) == [1.0, 2.0]
+
+
+def test_slot_origins_with_more_slots_than_adjusts(four_slot_layout):
+    layout = load_layout(four_slot_layout)
+    plain = vouchers.slot_origins(layout, 4, 0.0, 0.0)
+    shifted = vouchers.slot_origins(layout, 4, 0.0, 0.0, [1.0, 2.0])
+    assert len(shifted) == 4
+    assert [y - base for (_, y), (_, base) in zip(shifted, plain)] == pytest.approx([1 * mm, 2 * mm, 0.0, 0.0])
+
+
+def test_generate_pdf_with_four_slot_layout(tmp_path, four_slot_layout):
+    pytest.importorskip("pypdf")
+    from pypdf import PdfReader
+
+    records = [
+        vouchers.VoucherRecord(str(index), f"PASAJERO {index}", "20000000", "HOTEL", "101", "10/01/2026", "15/01/2026", 2)
+        for index in range(6)
+    ]
+    output = str(tmp_path / "vouchers.pdf")
+    total = vouchers.generate_pdf(
+        str(vouchers.SCRIPT_DIR / "VOUCHER ALICANTE.pdf"),
+        output,
+        records,
+        0.0,
+        0.0,
+        None,
+        True,
+        slot_1_y_adjust_mm=2.0,
+        layout_path=four_slot_layout,
+        engine="direct",
+    )
+    assert total == 6
+    assert len(PdfReader(output).pages) == 2
@@ -0,0 +1,40 @@
+import generar_vouchers_overlay as vouchers
+from common.csv_cache import open_cache
+
+
+def records_from_text(csv_path):
+    return vouchers.group_by_voucher(vouchers.load_csv_rows(csv_path))
+
+
+def test_cached_records_match_group_by_voucher(synthetic_csv):
+    expected = records_from_text(synthetic_csv)
+    assert list(vouchers.iter_voucher_records(synthetic_csv)) == expected
+    assert list(vouchers.iter_cached_voucher_records(open_cache(synthetic_csv))) == expected
+
+
+def test_streamed_records_match_group_by_voucher(synthetic_csv, monkeypatch):
+    expected = records_from_text(synthetic_csv)
+    assert not vouchers.is_sorted_by_voucher(synthetic_csv)
+    # Tramos chicos para que el merge externo mezcle varios archivos
+    sort = vouchers.iter_rows_sorted_by_voucher
+    monkeypatch.setattr(vouchers, "iter_rows_sorted_by_voucher", lambda path: sort(path, run_size=17))
+    assert list(vouchers.iter_voucher_records(synthetic_csv, use_cache=False)) == expected
+
+
+def test_holder_rooms_and_empty_vouchers(write_csv):
+    rows = [
+        {"Voucher": "20", "Apellido y nombre": "gómez ana", "Nro. doc.": "DNI 30.111.222", "Edad": "45", "Nro. habitación": "12"},
+        {"Voucher": "20", "Apellido y nombre": "gómez juan", "Nro. doc.": "30111223", "Edad": "45", "Nro. habitación": "11"},
+        {"Voucher": "20", "Apellido y nombre": "gómez sol", "Nro. doc.": "40111224", "Edad": "9", "Nro. habitación": "12"},
+        {"Voucher": "", "Apellido y nombre": "SIN VOUCHER", "Edad": "50"},
+        {"Voucher": "10", "Apellido y nombre": "PÉREZ LUIS", "Nro. doc.": "20111225", "Edad": "60", "Nro. habitación": ""},
+    ]
+    csv_path = write_csv(rows)
+    records = list(vouchers.iter_voucher_records(csv_path))
+    assert records == records_from_text(csv_path)
+    assert [record.voucher for record in records] == ["10", "20"]
+    # Empate de edad: el titular es el primero del CSV
+    assert records[1].passenger == "GÓMEZ ANA"
+    assert records[1].room == "11, 12"
+    assert records[1].pax == 3
+    assert records[0].room == ""